@@ -1,35 +1,139 @@
 # server/app.py
-from elastic_transport import ObjectApiResponse
-from flask import Flask, request, jsonify, json 
+from flask import Flask, request, jsonify, Response, url_for, send_file
 from flask_cors import CORS # Needed for local development
 
 # packages to speak to  AppEEARS
-import requests as r # post and get requests to database
-import getpass, pprint, time, os, json # parsing JSON
-import geopandas as gpd # data manipulation/analysis tool for geospatial 
-from shapely.geometry import Point, mapping
-import asyncio
-from tools import LRUCache, input_parameters
-import csv
+import os, json, math # parsing JSON
+import numpy as np
+import pandas as pd
+from tools import LRUCache, SingleFlight, input_parameters, validate_box, validate_input, year_tiles, tile_year, tile_is_final, merge_tiles
+from cache_index import ORPHAN_GRACE_SECONDS, CacheIndex
+from spatial_index import PixelIndex
+from quality import QualityFilter
+from phenology import METHODS as PHENOLOGY_METHODS, MONTHS, season_metrics
+from climatology import BaselineBuilder, MonthlySeries
+from prefetch import PopularityTracker, Prefetcher
+from columnar import (COLUMNS_SUFFIX, frame_from_rows, frame_json, frame_csv, frame_records, load_columns, read_csv,
+                      read_tile, write_columns)
+from modis_grid import snap_to_pixel
+from scheduler import PRIORITIES, TERMINAL_STATUSES, MicroBatcher, SubmissionScheduler, TaskPoller
+from jobs import JobStore
+from appeears import AppEEARSClient
+from downloads import BundleDownloader, DownloadError, sweep
+from ingest import IngestQueue
+from elastic_index import (INDEX_PATTERN, REFRESH_INTERVAL, SEASON_FIELD, SEASON_RUNTIME_MAPPINGS, index_for_date,
+                           indices_for_range, put_index_template, season_months)
+import atexit
+import hashlib
 
 # packages for elastic
-from elasticsearch import Elasticsearch
-from pprint import pprint # Used for cleaner printing of JSON responses
+from elasticsearch import Elasticsearch, helpers
 from dotenv import load_dotenv
 
+from contextlib import contextmanager
 from datetime import datetime
-from threading import Thread
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 app = Flask(__name__)
 CORS(app) # Enable CORS for all origins, necessary when Vite runs on a different port
 
+load_dotenv()
+
 api = 'https://appeears.earthdatacloud.nasa.gov/api/'  # Set the AρρEEARS API to a variable
-TOKEN = None
-HEADERS = None
-TASK_ID = None
+ELASTIC_URL = "https://my-elasticsearch-project-b1ab41.es.us-central1.gcp.elastic.cloud:443"
 DOWNLOAD_DIR = 'cache_downloads'
-cache = LRUCache(5)
+CACHE_CAPACITY_BYTES = 512 * 1024 * 1024 # budget for cached CSVs on disk
+CACHE_TTL_SECONDS = 30 * 24 * 60 * 60     # extracts older than this are fetched again
+OPEN_TILE_TTL_SECONDS = 24 * 60 * 60      # the current year still gains new monthly composites
+# snap coordinates to the MOD13A3 1 km pixel so nearby requests share a cache key
+SNAP_TO_MODIS_GRID = os.getenv("SNAP_TO_MODIS_GRID", "true").lower() == "true"
+# points with the same dates are merged into one AppEEARS task within this window
+BATCH_WINDOW_SECONDS = float(os.getenv("BATCH_WINDOW_SECONDS", "0.5"))
+BATCH_MAX_POINTS = int(os.getenv("BATCH_MAX_POINTS", "50"))
+# cold requests in job mode run on this many background threads instead of web workers
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "16"))
+JOB_RETENTION_SECONDS = 60 * 60 # finished jobs and their results are kept this long
+JOB_EVENT_INTERVAL_SECONDS = 1  # how often the job event stream checks progress
+POLL_MIN_SECONDS = 2  # first check of a new AppEEARS task, fast tasks finish in seconds
+POLL_MAX_SECONDS = 60 # slowest check rate for tasks that have been queued for a long time
+POLL_MAX_AGE_SECONDS = 6 * 60 * 60 # a task without a final status by then is given up as an error
+PRODUCT = "MOD13A3.061"
+NDVI_LAYER = "_1_km_monthly_NDVI"
+# bulk ingestion: documents per bulk request and bulk requests in flight at once
+ES_BULK_CHUNK_SIZE = int(os.getenv("ES_BULK_CHUNK_SIZE", "500"))
+ES_BULK_THREADS = int(os.getenv("ES_BULK_THREADS", "4"))
+ES_PAGE_SIZE = 1000 # hits per search page, a multi-year series pages with search_after
+ES_MSEARCH_SIZE = 100 # searches per multi search request of access_data/batch
+ES_SOURCE_FIELDS = ["ID", "Category", "Latitude", "Longitude", "Date", "MODIS_Tile", "MOD13A3_061_*"]
+# streamed access_data responses: format query parameter -> mimetype
+STREAM_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_BATCH_ROWS = 1000 # rows serialized per streamed chunk
+MONTHS_PER_TILE = 12 # a year tile from Elasticsearch is only used when it holds every composite
+NDVI_FIELD = f"{PRODUCT.replace('.', '_')}_{NDVI_LAYER}" # column AppEEARS writes the layer to
+QUALITY_LAYER = "_1_km_monthly_VI_Quality"
+QUALITY_FIELD = f"{PRODUCT.replace('.', '_')}_{QUALITY_LAYER}"
+# what happens to observations the VI quality layer marks as bad: off, mask (NDVI set to null) or drop.
+# Off by default: any other action requests the VI_Quality layer with every task, which changes the
+# cache key of every task, so extracts cached without it are fetched again.
+QUALITY_FILTER = os.getenv("QUALITY_FILTER", "off").lower()
+# ndvi_stats buckets: date field and calendar interval per interval name; seasons are DJF, MAM, JJA
+# and SON, bucketed by month on the first day of their season
+STATS_INTERVALS = {"month": ("Date", "month"), "season": (SEASON_FIELD, "month"), "year": ("Date", "year")}
+STATS_PERCENTILES = [10, 25, 50, 75, 90]
+STATS_CACHE_BYTES = 32 * 1024 * 1024
+STATS_CACHE_TTL_SECONDS = 60 * 60 # new extracts are indexed all the time, recompute hourly
+BATCH_REQUEST_MAX_POINTS = int(os.getenv("BATCH_REQUEST_MAX_POINTS", "10000")) # points per access_data/batch call
+BLOOM_MAX_POINTS = int(os.getenv("BLOOM_MAX_POINTS", "10000")) # points per bloom_onset request
+ANOMALY_MAX_POINTS = int(os.getenv("ANOMALY_MAX_POINTS", "10000")) # points per ndvi_anomaly request
+# per-pixel monthly NDVI climatology, rebuilt in the background from the cache and the index
+CLIMATOLOGY_PATH = os.getenv("CLIMATOLOGY_PATH", "climatology/ndvi_baseline.npz") # outside DOWNLOAD_DIR, which the cache owns
+CLIMATOLOGY_REFRESH_SECONDS = int(os.getenv("CLIMATOLOGY_REFRESH_SECONDS", str(24 * 60 * 60)))
+CLIMATOLOGY_BUILD = os.getenv("CLIMATOLOGY_BUILD", "true").lower() == "true" # false: only load what another process built
+CLIMATOLOGY_SCAN_ROWS = 100_000 # Elasticsearch documents typed into a frame at a time during a build
+# popular pixels are refreshed in the background: every PREFETCH_INTERVAL_SECONDS the top
+# PREFETCH_TOP_N are fetched again where the cache lost them, within PREFETCH_TASK_BUDGET AppEEARS tasks (0 disables)
+PREFETCH_DB = os.getenv("PREFETCH_DB", "prefetch/popularity.sqlite3")
+PREFETCH_INTERVAL_SECONDS = int(os.getenv("PREFETCH_INTERVAL_SECONDS", str(60 * 60)))
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "200"))
+PREFETCH_TASK_BUDGET = int(os.getenv("PREFETCH_TASK_BUDGET", "5"))
+PREFETCH_EXTEND_DAYS = 62 # ranges ending this recently follow the newest monthly composites
+# bundle files of one task downloaded at once, and write buffer per file
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "4"))
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# pixels whose cached tiles are kept in the in-process spatial index, searched before Elasticsearch
+SPATIAL_INDEX_PIXELS = int(os.getenv("SPATIAL_INDEX_PIXELS", "100000"))
+SPATIAL_INDEX_RADIUS_KM = 0.5 # same reach as the Elasticsearch bounding box around a pixel
+# AppEEARS task submission: tasks per second, tasks submitted back to back, and unfinished tasks at once
+APPEEARS_TASK_RATE = float(os.getenv("APPEEARS_TASK_RATE", "0.5"))
+APPEEARS_TASK_BURST = int(os.getenv("APPEEARS_TASK_BURST", "5"))
+APPEEARS_MAX_OUTSTANDING = int(os.getenv("APPEEARS_MAX_OUTSTANDING", "20"))
+# post-download work (tiles, cache, index) runs on an ingest pool fed by a durable queue in INGEST_DIR,
+# which also holds the downloaded bundles until they are ingested
+INGEST_DIR = os.getenv("INGEST_DIR", "ingest")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", "64")) # queued jobs before producers are slowed down
+# connections kept open to AppEEARS: job workers, the poller and the batcher call it concurrently
+APPEEARS_POOL_SIZE = int(os.getenv("APPEEARS_POOL_SIZE", "32"))
 client = None
+appeears = AppEEARSClient(api, pool_size=APPEEARS_POOL_SIZE)
+downloader = BundleDownloader(appeears, max_workers=DOWNLOAD_WORKERS, chunk_size=DOWNLOAD_CHUNK_SIZE)
+
+pixels = PixelIndex(SPATIAL_INDEX_PIXELS) # pixel -> cached tiles of this process, forgets evicted files
+cache = CacheIndex(DOWNLOAD_DIR, CACHE_CAPACITY_BYTES, ttl=CACHE_TTL_SECONDS, companions=(COLUMNS_SUFFIX,),
+                   on_evict=pixels.discard_file) # shared by all worker processes
+cache.rebuild()
+flight = SingleFlight() # identical in-flight AppEEARS tasks share one submission
+stats_cache = LRUCache(STATS_CACHE_BYTES, ttl=STATS_CACHE_TTL_SECONDS) # memoized ndvi_stats responses
+jobs = JobStore(max_workers=JOB_WORKERS, retention=JOB_RETENTION_SECONDS)
+quality_filter = QualityFilter(QUALITY_FILTER) # cleans extracts once, before they are cached and indexed
+task_progress = {} # AppEEARS task id -> {"status", "progress"} as last polled
+point_tasks = {}   # (batch key, point id) -> AppEEARS task id the point is waiting on
+point_submitters = {} # (batch key, point id) -> (priority, client) of the most urgent request waiting on it
+submitters_lock = Lock()
+pending_tiles = {}    # cache key of a tile task -> (ingest job id, rows) fetched by this process, not yet cached
+pending_lock = Lock()
 
 def date_to_es_format(date: str) -> str:
     try:
@@ -42,6 +146,30 @@ def date_to_es_format(date: str) -> str:
         print(f"Error: Input date '{date}' is not in MM-DD-YYYY format.")
         return None
 
+def canonical_input(input_params: input_parameters) -> input_parameters:
+    """
+    Purpose:
+        Replaces the requested coordinates with the center of the MODIS 1 km pixel that
+        contains them when SNAP_TO_MODIS_GRID is on. The cache key, the Elasticsearch
+        search and the AppEEARS task are all built from the snapped input, so every
+        coordinate inside one pixel shares them.
+
+    Args:
+        input_params - input_parameters built from the request
+
+    Returns:
+        input_parameters with canonical coordinates and pixel_id set
+
+    Raises:
+        ValueError if the coordinates or dates are missing or malformed
+    """
+    validate_input(input_params)
+    if not SNAP_TO_MODIS_GRID:
+        return input_params
+    pixel = snap_to_pixel(input_params.lat, input_params.lon)
+    return input_parameters(pixel.latitude, pixel.longitude,
+                            input_params.date_start, input_params.date_end, pixel.pixel_id)
+
 #connect to elastic
 def connect_to_elastic():
     """
@@ -51,7 +179,7 @@ def connect_to_elastic():
     elastic_key = os.getenv("ELASTIC_API_KEY")
     try:
         client = Elasticsearch(
-        "https://my-elasticsearch-project-b1ab41.es.us-central1.gcp.elastic.cloud:443",
+        ELASTIC_URL,
         api_key=elastic_key
         )
         client.info() # Try to get cluster info
@@ -60,51 +188,106 @@ def connect_to_elastic():
         print(f"Connection failed: {e}")
         exit()
     
-    client.options(ignore_status=400).indices.create(index="fire_hazards_data", mappings={
-    "properties": {
-      "location": {
-        "type": "geo_point"
-      }
-    }
-  })
-    print(f"\nIndex 'fire_hazards_data' created (or already exists).")
+    put_index_template(client)
 
 def connect_to_api(username, password):
-    global TOKEN, HEADERS
-    token_response = r.post('{}login'.format(api), auth=(username, password)).json() # Insert API URL, call login service, provide credentials & return json
-    del username, password                                                           # Remove user and password information
-    TOKEN = token_response['token']
-    HEADERS = {'Authorization': f"Bearer {TOKEN}"}
-    # print("token response:\n", token_response)
-    # print("----------------------------------------------")    
-    # print('{}login'.format(api))
+    """
+    Purpose:
+        Logs the AppEEARS client in. The client keeps the credentials to itself and
+        renews the token when it expires.
+    """
+    appeears.login(username, password)
+    del username, password # Remove user and password information
 
-def elastic_insert(data: dict) -> None:
+def document_id(row: dict) -> str:
     """
     Purpose:
+        Deterministic Elasticsearch id of a CSV row, built from its point, date and layer.
+        Indexing the same extract twice overwrites the same documents instead of adding
+        new ones, and different extracts never overwrite each other.
 
     Args:
+        row - one row of an AppEEARS point CSV
 
     Returns:
+        document id, e.g. h12v04_1114_0468_2020-01-01_MOD13A3.061_1_km_monthly_NDVI
     """
-    print("\nIndexing documents...")
-    print("DATA", json.dumps(data, indent=2))
-    for i, order in enumerate(data):
-        # We use a custom IDfor easy reference later (optional)
-        order['location'] = {
-            "type": "Point",
-            "coordinates": [float(order['Latitude']), float(order['Longitude'])]
-        } 
-        
-        #mapping(Point(float(order['Latitude']), float(order['Longitude'])))
-        
-        response = client.index(index="fire_hazards_data", id=i + 1, document=order)
-        print(f"Indexed doc {i+1}: {response['result']}")
+    point = row.get('ID') or f"{row['Latitude']},{row['Longitude']}"
+    return f"{point}_{row['Date']}_{PRODUCT}{NDVI_LAYER}"
 
-import json
-from elasticsearch import Elasticsearch # Assuming you imported this previously
+def elastic_actions(data: list):
+    """
+    Purpose:
+        Lazily turns CSV rows into bulk index actions, leaving the rows themselves untouched.
+    """
+    for row in data:
+        document = dict(row)
+        document['location'] = {"lat": float(row['Latitude']), "lon": float(row['Longitude'])}
+        yield {"_index": index_for_date(row['Date']), "_id": document_id(row), "_source": document}
+
+_bulk_lock = Lock()
+_bulk_loads = 0
 
-import math
+@contextmanager
+def refresh_disabled(index: str):
+    """
+    Purpose:
+        Turns periodic refresh off on the indices while bulk loads run and back on when
+        the last concurrent load finishes, so segments are not rebuilt mid-load.
+        Clusters that do not allow changing refresh_interval just load with refresh on.
+    """
+    global _bulk_loads
+    with _bulk_lock:
+        _bulk_loads += 1
+        if _bulk_loads == 1:
+            set_refresh_interval(index, "-1")
+    try:
+        yield
+    finally:
+        with _bulk_lock:
+            _bulk_loads -= 1
+            if _bulk_loads == 0:
+                set_refresh_interval(index, REFRESH_INTERVAL) # back to the template setting
+                client.options(ignore_status=[400, 403, 404]).indices.refresh(index=index)
+
+def set_refresh_interval(index: str, interval) -> None:
+    try:
+        client.indices.put_settings(index=index, settings={"index": {"refresh_interval": interval}})
+    except Exception as e:
+        print(f"Could not set refresh_interval on '{index}': {e}")
+
+def elastic_insert(data: list) -> None:
+    """
+    Purpose:
+        Indexes the rows of an extract with the bulk API. Chunks of ES_BULK_CHUNK_SIZE
+        documents are sent by ES_BULK_THREADS threads in parallel, with refresh off for
+        the duration of the load. Failures are reported once per chunk.
+
+    Args:
+        data - rows of an AppEEARS point CSV
+
+    Returns:
+        None
+    """
+    if client is None or not data:
+        return
+
+    print(f"\nIndexing {len(data)} documents...")
+    indexed = 0
+    failures = {} # chunk number -> list of errors
+    with refresh_disabled(INDEX_PATTERN):
+        results = helpers.parallel_bulk(client, elastic_actions(data),
+                                        thread_count=ES_BULK_THREADS, chunk_size=ES_BULK_CHUNK_SIZE,
+                                        raise_on_error=False, raise_on_exception=False)
+        for n, (ok, info) in enumerate(results):
+            if ok:
+                indexed += 1
+            else:
+                failures.setdefault(n // ES_BULK_CHUNK_SIZE, []).append(info)
+
+    for chunk, errors in failures.items():
+        print(f"Bulk chunk {chunk}: {len(errors)} documents failed, first error: {errors[0]}")
+    print(f"Indexed {indexed} of {len(data)} documents into '{INDEX_PATTERN}'.")
 
 def get_bounding_box(latitude: float, longitude: float, half_side_km: float = 0.5):
     """
@@ -140,158 +323,435 @@ def get_bounding_box(latitude: float, longitude: float, half_side_km: float = 0.
     max_lon = longitude + lon_delta
 
     return {
-        "top_left": {"lat": min_lat, "lon": max_lon},
-        "bottom_right": {"lat": max_lat, "lon": min_lon}
+        "top_left": {"lat": max_lat, "lon": min_lon},
+        "bottom_right": {"lat": min_lat, "lon": max_lon}
     }
 
 
-# Assume 'client' is your initialized Elasticsearch connection object
+def search_body(latitude: float, longitude: float, date_start: str, date_end: str, search_after=None) -> dict:
+    """
+    Purpose:
+        Query for the series of the pixel at a coordinate: documents inside the pixel's
+        bounding box and the date range, in non-scoring filter context, nearest point
+        first and then by date. Only the CSV columns are returned.
+    """
+    location = {"lat": latitude, "lon": longitude}
+    body = {
+        "size": ES_PAGE_SIZE,
+        "track_total_hits": False,
+        "_source": ES_SOURCE_FIELDS,
+        "query": {
+            "bool": {
+                "filter": [
+                    {"range": {"Date": {"gte": date_start, "lte": date_end}}},
+                    {"geo_bounding_box": {"location": get_bounding_box(latitude, longitude, 0.5)}}
+                ]
+            }
+        },
+        "sort": [
+            {"_geo_distance": {"location": location, "order": "asc", "unit": "m"}},
+            {"ID": "asc"},
+            {"Date": "asc"}
+        ]
+    }
+    if search_after is not None:
+        body["search_after"] = search_after
+    return body
+
 @app.route('/api/elastic_search', methods=['GET'])
-def elastic_search(latitude=None, longitude=None, date=None):
+def elastic_search(latitude=None, longitude=None, date_start=None, date_end=None):
     """
     Purpose: 
-        Query Elasticsearch to retrieve data by performing an EXACT match 
-        on latitude, longitude, and date.
+        Query Elasticsearch for the NDVI series of the pixel at a coordinate over a date
+        range. Long series are paged with search_after, and only the yearly indices the
+        range touches are searched. A pixel whose tiles this process already holds in
+        the file cache is answered from the spatial index without a search.
 
     Args:
         latitude (str): latitude of the desired coordinate
         longitude (str): longitude of the desired coordinate
-        date (str): date of the desired data in MM-DD-YYYY format
+        date_start (str): Start of the date range in MM-DD-YYYY format
+        date_end (str): End of the date range in MM-DD-YYYY format, date_start if None
 
     Returns:
-        results (dict): The highest-scoring document's _source data, or None if not found.
+        results (list): rows of the nearest point in date order, None if the search failed.
     """
-
-    if not latitude or not longitude or not date:
+    from_request = not latitude or not longitude or not date_start
+    if from_request:
         latitude = request.args.get('latitude')
         longitude = request.args.get('longitude')
-        date = request.args.get('date')
+        date_start = request.args.get('date_start') or request.args.get('date')
+        date_end = request.args.get('date_end')
 
-    date = date_to_es_format(date)
+    date_end = date_end or date_start
+    if SNAP_TO_MODIS_GRID:
+        pixel = snap_to_pixel(latitude, longitude)
+        latitude, longitude = pixel.latitude, pixel.longitude
 
-    print(f"\n🔍 Searching for: 'lat: {str(latitude)}, lon: {str(longitude)}, date: {date}'")
+    rows = spatial_rows(latitude, longitude, date_start, date_end)
+    if rows is not None:
+        return jsonify(rows) if from_request else rows
+    if client is None:
+        return jsonify([]) if from_request else None
 
-    # 1. Define the Query DSL using 'bool' and 'term' clauses
-    # 'term' is for exact matching on non-analyzed fields (like dates and coordinates).
-    bounding_box = get_bounding_box(float(latitude), float(longitude), 0.5)
-    search_body = {
-        "query": {
-            "bool": {
-                "must": {
-                    "match_all": {}
-                },
-                "filter": {
-                    "geo_distance": {
-                        "distance": "100km",
-                        "location": [float(latitude), float(longitude)]
-                    }
-                }
+    date_start, date_end = date_to_es_format(date_start), date_to_es_format(date_end)
+
+    print(f"\n🔍 Searching for: 'lat: {str(latitude)}, lon: {str(longitude)}, dates: {date_start}..{date_end}'")
+
+    rows, search_after = [], None
+    try:
+        while True:
+            results = client.search(index=indices_for_range(date_start, date_end), ignore_unavailable=True,
+                                    body=search_body(float(latitude), float(longitude), date_start, date_end, search_after))
+            hits = results['hits']['hits']
+            rows.extend(hit['_source'] for hit in hits)
+            if len(hits) < ES_PAGE_SIZE:
+                break
+            search_after = hits[-1]['sort']
+    except Exception as e:
+        print(f"Elasticsearch Query Error: {e}")
+        return jsonify([]) if from_request else None
+
+    rows = nearest_series(rows)
+    print(f"Total Hits: {len(rows)}")
+    return jsonify(rows) if from_request else rows
+
+def spatial_rows(latitude, longitude, date_start: str, date_end: str):
+    """
+    Purpose:
+        Series of the nearest pixel in the spatial index, read from its cached year tiles.
+        Only answers when every year of the range is still cached, anything less is left
+        to Elasticsearch.
+
+    Args:
+        latitude, longitude - coordinate searched for
+        date_start, date_end - date range in MM-DD-YYYY
+
+    Returns:
+        rows in date order like elastic_search, None if the index cannot answer
+    """
+    found = pixels.nearest(float(latitude), float(longitude), SPATIAL_INDEX_RADIUS_KM)
+    if found is None:
+        return None
+    _, _, years = found
+    tiles = year_tiles(date_start, date_end)
+    tile_rows = {}
+    for tile in tiles:
+        key, file_path = years.get(tile_year(tile), (None, None))
+        if key is None or key not in cache:
+            return None
+        rows = read_tile(file_path)
+        if rows is None:
+            pixels.discard_file(file_path)
+            return None
+        tile_rows[tile] = rows
+    return frame_records(stitch_tiles(tile_rows, tiles, date_start, date_end))
+
+def index_tile(task: dict, tile: tuple, file_path: str, frame) -> None:
+    """
+    Purpose:
+        Adds a cached year tile to the spatial index under the pixel its rows belong to.
+        Tiles read without their id and coordinate columns are skipped.
+    """
+    if frame.empty or not {'ID', 'Latitude', 'Longitude'}.issubset(frame.columns):
+        return
+    first = frame.iloc[0]
+    pixels.add(str(first['ID']), float(first['Latitude']), float(first['Longitude']),
+               tile_year(tile), cache_key(task), file_path)
+
+def nearest_series(rows: list) -> list:
+    """
+    Purpose:
+        Hits are sorted nearest first: keeps only the series of the nearest point.
+    """
+    if rows:
+        nearest = rows[0].get('ID')
+        rows = [row for row in rows if row.get('ID') == nearest]
+    return rows
+
+def elastic_msearch(searches: list) -> list:
+    """
+    Purpose:
+        Runs the pixel series searches of many points as multi searches of up to
+        ES_MSEARCH_SIZE searches each, instead of one search round trip per point.
+        A series longer than one page is completed with a paged elastic_search, and
+        pixels the spatial index can answer are not searched at all.
+
+    Args:
+        searches - list of (latitude, longitude, date_start, date_end), dates in MM-DD-YYYY
+
+    Returns:
+        list with the rows of the nearest point for every search, None where it failed
+    """
+    local = [spatial_rows(*search) for search in searches]
+    remote = [search for search, rows in zip(searches, local) if rows is None]
+    if client is None:
+        return local
+    results = []
+    for first in range(0, len(remote), ES_MSEARCH_SIZE):
+        chunk = remote[first:first + ES_MSEARCH_SIZE]
+        body = []
+        for latitude, longitude, date_start, date_end in chunk:
+            start, end = date_to_es_format(date_start), date_to_es_format(date_end)
+            body.append({"index": indices_for_range(start, end), "ignore_unavailable": True})
+            body.append(search_body(float(latitude), float(longitude), start, end))
+        try:
+            responses = client.msearch(searches=body)['responses']
+        except Exception as e:
+            print(f"Elasticsearch Multi Search Error: {e}")
+            results.extend([None] * len(chunk))
+            continue
+        for search, response in zip(chunk, responses):
+            if 'error' in response:
+                results.append(None)
+                continue
+            hits = response['hits']['hits']
+            if len(hits) >= ES_PAGE_SIZE:
+                results.append(elastic_search(*search))
+            else:
+                results.append(nearest_series([hit['_source'] for hit in hits]))
+    remote_results = iter(results)
+    return [next(remote_results) if rows is None else rows for rows in local]
+
+def stats_aggregations(interval: str) -> dict:
+    """
+    Purpose:
+        NDVI summary per date bucket: count, mean, min, max and percentiles.
+    """
+    field, calendar_interval = STATS_INTERVALS[interval]
+    return {
+        "dates": {
+            "date_histogram": {"field": field, "calendar_interval": calendar_interval, "min_doc_count": 1},
+            "aggs": {
+                "ndvi": {"stats": {"field": NDVI_FIELD}},
+                "ndvi_percentiles": {"percentiles": {"field": NDVI_FIELD, "percents": STATS_PERCENTILES}}
             }
         }
     }
 
-    print(json.dumps(search_body, indent=2))
+def stats_buckets(aggregation: dict, interval: str) -> list:
+    """
+    Purpose:
+        Flattens date_histogram buckets into the ndvi_stats response format. Seasonal
+        buckets also carry the season name and the months they cover; a bucket that does
+        not start a season raises ValueError.
+    """
+    buckets = []
+    for bucket in aggregation["dates"]["buckets"]:
+        stats = bucket["ndvi"]
+        buckets.append({
+            "date": bucket["key_as_string"][:10],
+            "count": stats["count"],
+            "mean": stats["avg"],
+            "min": stats["min"],
+            "max": stats["max"],
+            "percentiles": bucket["ndvi_percentiles"]["values"],
+        })
+        if interval == "season":
+            buckets[-1]["season"], buckets[-1]["months"] = season_months(buckets[-1]["date"])
+    return buckets
+
+@app.route('/api/ndvi_stats', methods=['GET'])
+def ndvi_stats():
+    """
+    Purpose:
+        Monthly, seasonal or yearly NDVI mean, min, max and percentiles computed by
+        Elasticsearch over the indexed extracts, so dashboards get a few buckets instead
+        of every raw row. Responses are memoized per (cell, interval, range).
+
+    Args (query string):
+        latitude, longitude - a point; stats of its MODIS pixel
+        min_lat, min_lon, max_lat, max_lon - or a bounding box; stats per geotile cell
+        precision - geotile zoom level of the cells for a bounding box, default 10
+        interval - month, season (DJF, MAM, JJA, SON; dated by their first month, so winter
+                   starts in December of the year before) or year
+        date_start, date_end - range in MM-DD-YYYY
 
-    try:
-        # 2. Execute the search (assuming 'client' is globally available or passed in)
-        # Using client.search() from the official 'elasticsearch' client
-        results = client.search(index="fire_hazards_data", body=search_body)
-
-        # 3. Process the results
-        total_hits = results['hits']['total']['value']
-        print('results', json.dumps(results.body, indent=2))
-        print(f"Total Hits: {total_hits}")
-
-        if total_hits > 0:
-            # Return the contents of the highest-scoring document's '_source' field
-            return results['hits']['hits'][0]['_source']
+    Returns:
+        {"interval", "date_start", "date_end", "buckets"} for a point,
+        {"interval", "date_start", "date_end", "cells": [{"cell", "buckets"}]} for a box
+    """
+    interval = request.args.get('interval', 'month')
+    date_start = date_to_es_format(request.args.get('date_start'))
+    date_end = date_to_es_format(request.args.get('date_end'))
+    if interval not in STATS_INTERVALS or not date_start or not date_end:
+        return jsonify({"message": f"interval must be one of {list(STATS_INTERVALS)} and dates MM-DD-YYYY"}), 400
+
+    if request.args.get('latitude') and request.args.get('longitude'):
+        latitude, longitude = request.args.get('latitude'), request.args.get('longitude')
+        try:
+            validate_input(input_parameters(latitude, longitude, None, None))
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        if SNAP_TO_MODIS_GRID:
+            pixel = snap_to_pixel(latitude, longitude)
+            latitude, longitude, cell = pixel.latitude, pixel.longitude, pixel.pixel_id
         else:
-            return None
-            
+            cell = f"{latitude},{longitude}"
+        box = get_bounding_box(float(latitude), float(longitude), 0.5)
+        precision = None
+    else:
+        try:
+            min_lat, min_lon, max_lat, max_lon = (float(request.args[name]) for name in ('min_lat', 'min_lon', 'max_lat', 'max_lon'))
+            precision = int(request.args.get('precision', 10))
+        except (KeyError, ValueError):
+            return jsonify({"message": "Provide latitude/longitude or min_lat, min_lon, max_lat, max_lon"}), 400
+        try:
+            validate_box(min_lat, min_lon, max_lat, max_lon, precision)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        box = {"top_left": {"lat": max_lat, "lon": min_lon}, "bottom_right": {"lat": min_lat, "lon": max_lon}}
+        cell = f"{min_lat},{min_lon},{max_lat},{max_lon}@{precision}"
+    if client is None:
+        return jsonify({"message": "Elasticsearch is not connected"}), 503
+
+    key = json.dumps([cell, interval, date_start, date_end])
+    memoized = stats_cache.get(key)
+    if memoized is not None:
+        return Response(memoized, mimetype='application/json')
+
+    aggregations = stats_aggregations(interval)
+    if precision is not None:
+        aggregations = {"cells": {"geotile_grid": {"field": "location", "precision": precision}, "aggs": aggregations}}
+    body = {
+        "size": 0,
+        "query": {
+            "bool": {
+                "filter": [
+                    {"range": {"Date": {"gte": date_start, "lte": date_end}}},
+                    {"geo_bounding_box": {"location": box}}
+                ]
+            }
+        },
+        "aggs": aggregations
+    }
+    if interval == "season":
+        body["runtime_mappings"] = SEASON_RUNTIME_MAPPINGS
+    try:
+        results = client.search(index=indices_for_range(date_start, date_end), ignore_unavailable=True, body=body)
     except Exception as e:
-        print(f"Elasticsearch Query Error: {e}")
-        return None
+        print(f"Elasticsearch Aggregation Error: {e}")
+        return jsonify({"message": "Aggregation failed"}), 502
+
+    reply = {"interval": interval, "date_start": date_start, "date_end": date_end}
+    aggregations = results.get('aggregations', {})
+    try:
+        if precision is None:
+            reply["buckets"] = stats_buckets(aggregations, interval) if aggregations else []
+        else:
+            reply["cells"] = [{"cell": bucket["key"], "buckets": stats_buckets(bucket, interval)}
+                              for bucket in aggregations.get("cells", {}).get("buckets", [])]
+    except ValueError as e:
+        print(f"Elasticsearch Aggregation Error: {e}")
+        return jsonify({"message": "Aggregation failed"}), 502
+    payload = json.dumps(reply)
+    stats_cache.put(key, payload, size=len(payload))
+    return Response(payload, mimetype='application/json')
+
+def cache_key(task: dict) -> str:
+    """
+    Purpose:
+        Canonical cache key of a task, independent of dict insertion order.
+
+    Args:
+        task - json query that would've been sent to the databases
+
+    Returns:
+        JSON string used as the key in the cache
+    """
+    return json.dumps(task, sort_keys=True)
 
 def within_cache(task: dict) -> bool:
     """
     Purpose:
+        Checks whether the task is cached without counting a hit or promoting the entry.
 
     Args:
+        task - json query that would've been sent to the databases
 
     Returns:
+        True if the task has a live cache entry
     """
-    key = json.dumps(task)
-    if(cache.get(key) == ""):
-        return False
-    else:
-        return True
+    return cache_key(task) in cache
     
-def read_data(filepath: str) -> dict:
+def read_data(filepath: str, columns: list = None):
     """
     Purpose:
+        Reads a cached tile as typed columns from its columnar copy, memory-mapped, instead
+        of parsing the CSV text again on every hit.
 
     Args:
+        filepath - path of the cached CSV
+        columns - names of the columns to load, all of them if None
 
     Returns:
+        DataFrame with float32 NDVI, datetime64 dates and categorical ids, None if not found
     """
-    data = []
-    try:
-        # 'r' mode for reading, 'newline=""' is important for cross-platform compatibility
-        with open(filepath, mode='r', newline='', encoding='utf-8') as csvfile:
-            # csv.DictReader uses the first row as field names (keys)
-            reader = csv.DictReader(csvfile)
-            
-            # Iterate over each row (which is already a dictionary)
-            for row in reader:
-                data.append(row)
-    except FileNotFoundError:
+    frame = read_tile(filepath, columns)
+    if frame is None:
         print(f"Error: The file '{filepath}' was not found.")
         # logger.error(f"Error: The file '{filepath}' was not found.")
-        return None
-    
-    return data
+    return frame
 
-def cached_task(task: dict) -> dict:
+def cached_path(task: dict) -> str:
     """
-    Purpose: 
-        Task was already queried within the last 5 queries. 
-        This function reads the local cached data and returns it. 
-        Function avoids using the network for highly-request data
+    Purpose:
+        Looks the task up in the cache with a single atomic lookup and returns the path
+        of the cached file without reading it.
 
     Args:
         task - json query that would've been sent to the databases
 
     Returns:
-        data that was cached from previous search to give to the backend
+        file path of the cached data, None on a miss
     """
-    
-    key = json.dumps(task)
+    key = cache_key(task)
 
     file_path = cache.get(key)
+    if file_path is not None and not os.path.exists(file_path):
+        cache.pop(key) # file vanished from disk, forget the entry
+        pixels.discard_file(file_path)
+        return None
+    return file_path
 
-    data = read_data(file_path)
-    return data
+def cached_task(task: dict, columns: list = None):
+    """
+    Purpose: 
+        Looks the task up in the cache with a single atomic lookup.
+        If it is cached, this function reads the local cached data and returns it.
+        Function avoids using the network for highly-request data
 
-def push_to_cache(task: dict, file_path: str) -> None:
+    Args:
+        task - json query that would've been sent to the databases
+        columns - names of the columns to load, all of them if None
+
+    Returns:
+        DataFrame of the data cached by a previous search, None on a miss
+    """
+    file_path = cached_path(task)
+    if file_path is None:
+        return None
+    return read_data(file_path, columns)
+
+def push_to_cache(task: dict, file_path: str, ttl: float = None) -> None:
     """
     Purpose:
         Function takes in the task as the key and the filepath as the value for the cache.
-        This allows us to download the data locally and maintain it.
+        This allows us to download the data locally and maintain it. Entries are
+        weighted by the size of the file and its columnar copy, evicted files are deleted
+        by the cache index.
 
     Args:
         task - JSON string that has all the parameters user wants.
         file_path - file path of the cached data
+        ttl - lifetime of the entry in seconds, CACHE_TTL_SECONDS if None
 
     Returns:
         None
     """
-    old_file_path = cache.put(json.dumps(task), file_path)
-    if(old_file_path == ""):
-        return
-    else:
-        os.remove(old_file_path)
+    cache.put(cache_key(task), file_path, size=cache.file_size(file_path), ttl=ttl)
 
-def make_task(input_params: input_parameters) -> dict:
+def make_task(input_params: input_parameters, dates: list = None) -> dict:
     """
     Purpose:
         Converts input data object from frontend to a JSON string usable to backend framework.
@@ -304,76 +764,143 @@ def make_task(input_params: input_parameters) -> dict:
             * date_end   - End of the date range for which to extract data: MM-DD-YYYY
             * recurring  - Makes the data ignore one year and return data for a range of years
             * year_range - [-1,-1] if not recurring, [year start, year end] if recurring is true
+        dates - list of {"startDate", "endDate"} ranges to request instead of the input's range
         
     Returns:
         JSON string with the parameters provided from input_parameters object
     """
+    if dates is None:
+        dates = [{"startDate": input_params.date_start, "endDate": input_params.date_end}]
+
+    coordinate = {
+        "latitude": input_params.lat,
+        "longitude": input_params.lon
+    }
+    if input_params.pixel_id:
+        coordinate["id"] = input_params.pixel_id
+    layers = [{"layer": NDVI_LAYER, "product": PRODUCT}]
+    if quality_filter.enabled:
+        layers.append({"layer": QUALITY_LAYER, "product": PRODUCT})
 
     request_json = {
     "task_type": "point",
     "task_name": "NDVI_Multi_Point_Extract",
     "params": {
-        "dates": [
-            {
-                "startDate": input_params.date_start,
-                "endDate": input_params.date_end
-            }
-        ],
-        "layers": [
-            {"layer": "_1_km_monthly_NDVI", "product": "MOD13A3.061"},
-        ],
+        "dates": dates,
+        "layers": layers,
         "output": {
             "format": {"type": "csv"}
         },
         
-        "coordinates": [{
-        "latitude": input_params.lat,
-        "longitude": input_params.lon}
-        ]
+        "coordinates": [coordinate]
         
         }
     }
     return request_json
 
-def enqueue_data(request_json: dict) -> dict:
+def post_task(request_json: dict) -> dict:
     """
     Purpose:
-        Enqueues the data to the AppEEARS database and returns. 
+        Posts a task to AppEEARS; called by the submission scheduler only.
+    """
+    submit_response_obj = appeears.post("task", json=request_json)
+
+    submit_response = submit_response_obj.json()
+    return submit_response
+
+submissions = SubmissionScheduler(post_task, rate=APPEEARS_TASK_RATE, burst=APPEEARS_TASK_BURST,
+                                  max_outstanding=APPEEARS_MAX_OUTSTANDING)
+
+def enqueue_data(request_json: dict, priority: str = 'interactive', client: str = None) -> dict:
+    """
+    Purpose:
+        Enqueues the data to the AppEEARS database and returns. The task waits in the
+        submission scheduler until the rate limit and the cap on unfinished tasks allow it,
+        behind more urgent work and taking turns with other clients.
     
     Args:
         request_json - JSON string that has parameters given from the frontend.
+        priority - 'interactive', 'batch' or 'prefetch'
+        client - who asked for the task, for fair sharing among clients
 
     returns:
         AppEEARS reply after we push to queue our request
     """
-    submit_response_obj = r.post(f"{api}task", headers=HEADERS, json=request_json)
+    return submissions.submit(request_json, priority, client).result()
 
-    submit_response = submit_response_obj.json()
-    return submit_response
+def request_client() -> str:
+    """
+    Purpose:
+        Client a request counts against for fair sharing: the X-Client-Id header, or the
+        remote address.
+    """
+    return request.headers.get('X-Client-Id') or request.remote_addr
+
+def claim_points(key: str, ids, priority: str, client: str) -> None:
+    """
+    Purpose:
+        Records who waits for points of a batch, so the batch's task is submitted with the
+        most urgent priority among its points.
+    """
+    with submitters_lock:
+        for id in ids:
+            current = point_submitters.get((key, id))
+            if current is None or PRIORITIES.index(priority) < PRIORITIES.index(current[0]):
+                point_submitters[(key, id)] = (priority, client)
+
+def batch_submitter(key: str, points: dict) -> tuple:
+    """
+    Purpose:
+        (priority, client) a batch's task is submitted with; points nobody claimed count
+        as interactive.
+    """
+    with submitters_lock:
+        submitters = [point_submitters.pop((key, id), ('interactive', None)) for id in points]
+    return min(submitters, key=lambda submitter: PRIORITIES.index(submitter[0]))
+
+def bulk_status() -> dict:
+    """
+    Purpose:
+        Status of every task of the user that is still being processed, in one call.
+
+    Returns:
+        dict of task id -> status dict
+    """
+    status_response = appeears.get("status").json()
+    return {status['task_id']: status for status in status_response if 'task_id' in status}
+
+def task_status(id) -> dict:
+    """
+    Purpose:
+        Status of a single task, including finished ones that bulk_status no longer lists.
+    """
+    return appeears.get(f"task/{id}").json()
+
+def record_status(id, status, progress) -> None:
+    task_progress[id] = {"status": status, "progress": progress}
+    if status in TERMINAL_STATUSES:
+        submissions.release(id) # no longer counts against APPEEARS_MAX_OUTSTANDING
+    print(f"Task {id} status: {status} ({progress}%)")
+
+poller = TaskPoller(bulk_status, task_status, on_status=record_status,
+                    min_interval=POLL_MIN_SECONDS, max_interval=POLL_MAX_SECONDS, max_age=POLL_MAX_AGE_SECONDS)
 
 def data_ready(id):
     """
     Purpose: 
-        Check the status of the task until it is done. 
-        Checks status every 5 seconds until the task is complete
-        or fails.
+        Waits until the task is done. The shared poller checks the status of all
+        outstanding tasks with adaptive intervals; this thread only waits on the
+        future it hands out.
 
     Args:
-        None
+        id - AppEEARS task id
         
     Returns:
         True if task is done, False if task failed
     """
 
     print("--- Waiting for Task to Process ---")
-    status = 'pending'
-    while status not in ['done', 'failed', 'error']:
-        time.sleep(5) # Poll every 5 seconds
-        
-        status_response = r.get(f"{api}status/{id}", headers=HEADERS).json()
-        status = status_response.get('status', 'unknown')
-        progress = status_response.get('progress', 0)
-        print(f"Current Status: {status} ({progress}%)")
+    status = poller.watch(id).result()
 
     if status != 'done':
         print(f"Task failed or ended with status: {status}. Check AppEEARS site for details.")
@@ -384,95 +911,1100 @@ def fetch_data(id):
     """
     Purpose: 
         Downloads the data from the AppEEARS database once the task is complete. 
-        Saves the data to a local directory for later use. It transforms the csv into a
-        dict and returns it. None if not found.
+        Every CSV of the bundle is downloaded concurrently, resumably and verified against
+        the manifest before it appears under its final name. The CSVs are parsed once,
+        into typed columns; the files stay in the ingest directory until the ingest pool
+        has turned them into cache tiles.
 
     Args:
-        None
+        id - AppEEARS task id
         
     Returns:
-        Python dictionary object that's structured like a JSON string
+        DataFrame of the extract and the paths of the downloaded CSVs, (None, None) if not found
         
     """
 
     print("--- Task done. Retrieving file manifest ---")
-    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 
     # 5a. Get the file manifest
-    files_response = r.get(f"{api}bundle/{id}", headers=HEADERS).json()
+    files_response = appeears.get(f"bundle/{id}").json()
     file_list = files_response.get('files', [])
 
-    # 5b. Find the main ZIP file output
-    data_file_details = next((f for f in file_list if f.get('file_type') == 'csv'), None)
+    # 5b. Find the CSV outputs, one per product
+    csv_files = [f for f in file_list if f.get('file_type') == 'csv']
+    if not csv_files:
+        print("Download failed: Could not find the main CSV output file in the bundle.")
+        return None, None
 
-    if data_file_details:
-        FILE_ID = data_file_details['file_id']
-        FILE_NAME = FILE_ID+".csv"
-        
-        download_path = os.path.join(DOWNLOAD_DIR, FILE_NAME)
-        download_url = f"{api}bundle/{id}/{FILE_ID}"
-        
-        print(f"Starting download of {FILE_NAME} to {download_path}")
+    bundle_dir = os.path.join(INGEST_DIR, 'bundles') # outside the cache directory, whose rebuild deletes unindexed files
+    print(f"Starting download of {len(csv_files)} file(s) to {bundle_dir}")
+    try:
+        paths = list(downloader.download(id, csv_files, bundle_dir).values())
+    except DownloadError as e:
+        print(f"Download failed: {e}")
+        return None, None
+    print("Download complete! Your NDVI data is ready for analysis.")
 
-        # 5c. Stream the file download
-        file_response = r.get(download_url, headers=HEADERS, stream=True)
-        
-        if file_response.status_code == 200:
-            with open(download_path, 'wb') as file:
-                for chunk in file_response.iter_content(chunk_size=1024):
-                    if chunk:
-                        file.write(chunk)
-            print("Download complete! Your NDVI data is ready for analysis.")
-            filepath = os.path.join(DOWNLOAD_DIR, FILE_NAME)
-            
-            return read_data(filepath), download_path
+    frames = [read_csv(path) for path in paths]
+    data = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    return data, paths
+
+def tile_task(input_params: input_parameters, tile: tuple) -> dict:
+    """
+    Purpose:
+        Task for a single year tile of the input, used as the tile's cache key.
+    """
+    return make_task(input_params, [{"startDate": tile[0], "endDate": tile[1]}])
+
+def write_tile(file_path: str, frame) -> None:
+    """
+    Purpose:
+        Writes the rows of one year tile to its own CSV so it can be cached on its own,
+        with its typed columnar copy next to it for cache reads. Both are written under a
+        temporary name and renamed, so a crash never leaves a truncated tile behind.
+    """
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, mode='w', newline='', encoding='utf-8') as csvfile:
+        csvfile.write(frame_csv(frame))
+    write_columns(frame, file_path)
+    os.replace(tmp_path, file_path)
+
+def point_id(input_params: input_parameters) -> str:
+    """
+    Purpose:
+        Id of the request's point inside a multi-coordinate task: the MODIS pixel id when
+        coordinates are snapped, the coordinate pair otherwise.
+    """
+    return input_params.pixel_id or f"{input_params.lat},{input_params.lon}"
+
+def batch_key(task: dict) -> str:
+    """
+    Purpose:
+        Key shared by every task that differs only in its coordinates, i.e. requests that
+        can be merged into one multi-coordinate AppEEARS task.
+    """
+    return cache_key(dict(task, params=dict(task["params"], coordinates=[])))
+
+def point_tiles(tiles: list, frame) -> dict:
+    """
+    Purpose:
+        Splits the rows of one point into its year tiles, in memory.
+
+    Returns:
+        dict of tile -> DataFrame
+    """
+    years = frame['Date'].dt.year.values
+    return {tile: frame[years == tile_year(tile)].reset_index(drop=True) for tile in tiles}
+
+def split_tiles(input_params: input_parameters, tiles: list, frame, base_path: str):
+    """
+    Purpose:
+        Splits the rows of one point into one CSV per year tile.
+
+    Returns:
+        dict of tile -> DataFrame, and a list of (tile task, file path, ttl) to cache
+    """
+    tile_rows, tile_files = point_tiles(tiles, frame), []
+    for tile, year_rows in tile_rows.items():
+        tile_path = f"{base_path}_{tile_year(tile)}.csv"
+        write_tile(tile_path, year_rows)
+        task = tile_task(input_params, tile)
+        index_tile(task, tile, tile_path, year_rows)
+        tile_files.append((task, tile_path, None if tile_is_final(tile) else OPEN_TILE_TTL_SECONDS))
+    return tile_rows, tile_files
+
+def run_point_batch(key: str, points: dict) -> dict:
+    """
+    Purpose:
+        Runs one batch from the micro-batcher: submits a single AppEEARS task with every
+        point as a coordinate with its own id, waits for it, then splits the downloaded
+        CSV back out per point and per year tile and caches each piece.
+
+    Args:
+        key - batch key shared by the points (product, layer and dates)
+        points - dict of point id -> (input_parameters, year tiles)
+
+    Returns:
+        dict of point id -> (dict of tile -> DataFrame); empty if the task failed
+    """
+    task = batch_task(points)
+    reply = enqueue_data(task, *batch_submitter(key, points))
+    
+    # check reply if its valid ----------------------------------------------
+    print(reply)
+
+    task_id = reply['task_id']
+    for id in points:
+        point_tasks[(key, id)] = task_id
+    try:
+        if not data_ready(task_id): # wait while data is getting processed 
+            return {}
+        data, file_paths = fetch_data(task_id)
+    finally:
+        for id in points:
+            point_tasks.pop((key, id), None)
+        task_progress.pop(task_id, None)
+    if data is None or not file_paths:
+        return {}
+    return store_batch(points, data, file_paths)
+
+def batch_task(points: dict) -> dict:
+    """
+    Purpose:
+        Multi-coordinate task of a batch: every point is a coordinate with its own id.
+    """
+    first_input, tiles = next(iter(points.values()))
+    task = make_task(first_input, merge_tiles(tiles))
+    task["params"]["coordinates"] = [
+        {"id": id, "latitude": input_params.lat, "longitude": input_params.lon}
+        for id, (input_params, _) in points.items()
+    ]
+    return task
+
+def point_rows(points: dict, data):
+    """
+    Purpose:
+        Rows of every point of a batch, matched by the id each coordinate was sent with.
+
+    Returns:
+        generator of (n, point id, input_parameters, year tiles, DataFrame)
+    """
+    ids = data['ID'].astype(str).values if 'ID' in data.columns else None
+    for n, (id, (input_params, tiles)) in enumerate(points.items()):
+        yield n, id, input_params, tiles, data[ids == id] if ids is not None else data.iloc[:0]
+
+def store_batch(points: dict, data, file_paths: list) -> dict:
+    """
+    Purpose:
+        Post-download half of a batch: filters the extract by quality once and answers
+        the waiting requests from it, split per point and year tile in memory. The filtered
+        extract is stored as one columnar file in place of the downloaded CSVs and queued
+        for the ingest pool, which writes, caches and indexes the tiles off the request
+        path. Until that job is done this process serves the tiles from memory.
+
+    Args:
+        points - dict of point id -> (input_parameters, year tiles)
+        data - typed extract of the batch's task
+        file_paths - downloaded CSVs of the extract, removed once their columns are stored
+
+    Returns:
+        dict of point id -> (dict of tile -> DataFrame)
+    """
+    data = quality_filter.apply(data, [NDVI_FIELD], QUALITY_FIELD)
+    results = {}
+    for _, id, input_params, tiles, rows in point_rows(points, data):
+        results[id] = point_tiles(tiles, rows)
+
+    columns_path = write_columns(data, os.path.splitext(file_paths[0])[0])
+    for file_path in file_paths:
+        os.remove(file_path)
+    prune_pending_tiles()
+    job = ingest.put({
+        "points": [[id, input_params.lat, input_params.lon, input_params.date_start, input_params.date_end,
+                    input_params.pixel_id, tiles] for id, (input_params, tiles) in points.items()],
+        "files": [columns_path],
+    })
+    if job is not None:
+        with pending_lock:
+            for id, (input_params, tiles) in points.items():
+                for tile, year_rows in results[id].items():
+                    pending_tiles[cache_key(tile_task(input_params, tile))] = (job, year_rows)
+    return results
+
+def prune_pending_tiles() -> None:
+    """
+    Purpose:
+        Drops the rows this process holds for ingest jobs that are no longer queued or
+        running in any process: their tiles are cached now (or the job was given up), so
+        reads go through the cache and its TTLs again.
+    """
+    with pending_lock:
+        jobs = {job for job, _ in pending_tiles.values()}
+    if not jobs:
+        return
+    unfinished = ingest.unfinished(jobs)
+    with pending_lock:
+        for key in [key for key, (job, _) in pending_tiles.items() if job not in unfinished]:
+            del pending_tiles[key]
+
+def pending_rows(input_params: input_parameters, tile: tuple):
+    """
+    Purpose:
+        Rows of a tile this process fetched and whose ingest job has not finished yet,
+        None otherwise.
+    """
+    with pending_lock:
+        entry = pending_tiles.get(cache_key(tile_task(input_params, tile)))
+    if entry is None or entry[0] not in ingest.unfinished([entry[0]]):
+        return None
+    return entry[1]
+
+def ingest_batch(payload: dict) -> None:
+    """
+    Purpose:
+        Ingest job of a batch, run by the ingest pool: loads the filtered extract stored
+        by store_batch, writes one cache tile per point and year, registers the tiles in
+        the cache and indexes the rows, then removes the extract. Safe to replay: tiles
+        are replaced, documents have deterministic ids, and a job whose extract is gone
+        already finished.
+
+    Args:
+        payload - {"points": [[id, latitude, longitude, date_start, date_end, pixel_id, tiles]],
+                   "files": [columnar file of the filtered extract]}
+    """
+    points = {id: (input_parameters(lat, lon, date_start, date_end, pixel_id), [tuple(tile) for tile in tiles])
+              for id, lat, lon, date_start, date_end, pixel_id, tiles in payload["points"]}
+    columns_path = payload["files"][0]
+    if not os.path.exists(columns_path):
+        return # removed after a completed run, e.g. before a crash that left the job queued
+    data = load_columns(columns_path)
+
+    base_path = os.path.join(DOWNLOAD_DIR, os.path.splitext(os.path.basename(columns_path))[0])
+    tile_files = []
+    for n, id, input_params, tiles, rows in point_rows(points, data):
+        _, files = split_tiles(input_params, tiles, rows, f"{base_path}_{n}")
+        tile_files.extend(files)
+    perform_background_uploads(tile_files, data)
+    os.remove(columns_path)
+
+def discard_bundle(payload: dict) -> None:
+    """
+    Purpose:
+        Deletes the stored extract of an ingest job that was given up.
+    """
+    for file_path in payload["files"]:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+ingest = IngestQueue(os.path.join(INGEST_DIR, 'queue.sqlite3'), ingest_batch, workers=INGEST_WORKERS,
+                     max_pending=INGEST_MAX_PENDING, on_failed=discard_bundle)
+# .part files of failed downloads and bundles no unfinished ingest job needs any more
+sweep(os.path.join(INGEST_DIR, 'bundles'), keep={path for payload in ingest.payloads() for path in payload["files"]},
+      grace=ORPHAN_GRACE_SECONDS)
+atexit.register(ingest.drain) # finish queued ingest work on shutdown, the rest is replayed on the next start
+
+batcher = MicroBatcher(run_point_batch, window=BATCH_WINDOW_SECONDS, max_batch=BATCH_MAX_POINTS)
+
+def prefetch_popular(entries: list, task_budget: int):
+    """
+    Purpose:
+        Prefetch cycle: brings the most requested pixels back into the file cache. Each
+        entry's range is extended to today when it ends recently, so new monthly
+        composites are fetched before anyone asks. Tiles Elasticsearch holds completely
+        are copied from it; the rest go to AppEEARS as multi-point tasks, which cache
+        and index them like any other batch, until the task budget is spent.
+
+    Args:
+        entries - popular pixels, most popular first, see PopularityTracker.top
+        task_budget - AppEEARS tasks this cycle may submit
+
+    Returns:
+        (tasks submitted, points refreshed through AppEEARS)
+    """
+    today = datetime.now()
+    groups = {} # batch key -> {point id: (input, missing tiles)}
+    for entry in entries:
+        date_end = entry["date_end"]
+        if (today - datetime.strptime(date_end, '%m-%d-%Y')).days <= PREFETCH_EXTEND_DAYS:
+            date_end = today.strftime('%m-%d-%Y')
+        input = canonical_input(input_parameters(entry["latitude"], entry["longitude"], entry["date_start"], date_end))
+        tiles = year_tiles(input.date_start, input.date_end)
+        # within_cache neither promotes entries nor counts hits, prefetching must not skew either
+        missing = [tile for tile in tiles if not within_cache(tile_task(input, tile))]
+        if missing:
+            found = elastic_tiles(input, missing)
+            missing = [tile for tile in missing if tile not in found]
+        if missing:
+            key = batch_key(make_task(input, merge_tiles(missing)))
+            groups.setdefault(key, {})[point_id(input)] = (input, missing)
+
+    tasks = refreshed = 0
+    for key, group in groups.items():
+        points = list(group.items())
+        for first in range(0, len(points), BATCH_MAX_POINTS):
+            if tasks >= task_budget:
+                return tasks, refreshed
+            batch = dict(points[first:first + BATCH_MAX_POINTS])
+            claim_points(key, batch, 'prefetch', None)
+            tasks += 1
+            if run_point_batch(key, batch):
+                refreshed += len(batch)
+    return tasks, refreshed
+
+prefetcher = Prefetcher(PopularityTracker(PREFETCH_DB), prefetch_popular, interval=PREFETCH_INTERVAL_SECONDS,
+                        top_n=PREFETCH_TOP_N, task_budget=PREFETCH_TASK_BUDGET)
+
+def record_request(input_params: input_parameters) -> None:
+    """
+    Purpose:
+        Counts a request for the prefetcher's popularity ranking.
+    """
+    prefetcher.record(point_id(input_params), input_params.lat, input_params.lon,
+                      input_params.date_start, input_params.date_end)
+
+def fetch_tiles(input_params: input_parameters, tiles: list, priority: str = 'interactive', client: str = None):
+    """
+    Purpose:
+        Requests the given year tiles of a point from AppEEARS. The point waits in the
+        micro-batcher for other points with the same dates, so one task covers them all.
+
+    Args:
+        input_params - canonical input of the request
+        tiles - list of (startDate, endDate) year tiles missing from the cache
+        priority, client - submission priority and client of the request, see enqueue_data
+
+    Returns:
+        dict of tile -> DataFrame, None if the task failed
+    """
+    return submit_tiles(input_params, tiles, priority, client).result()
+
+def submit_tiles(input_params: input_parameters, tiles: list, priority: str = 'interactive',
+                 client: str = None):
+    """
+    Purpose:
+        fetch_tiles without waiting: hands the point to the micro-batcher.
+
+    Returns:
+        Future of the dict of tile -> DataFrame, None if the task failed
+    """
+    task = make_task(input_params, merge_tiles(tiles))
+    key = batch_key(task)
+    claim_points(key, [point_id(input_params)], priority, client)
+    return batcher.submit(key, point_id(input_params), (input_params, tiles))
+
+def stitch_tiles(tile_rows: dict, tiles: list, date_start: str, date_end: str):
+    """
+    Purpose:
+        Joins the rows of the year tiles back together in date order and trims them to
+        the requested range, since the first and last tile may cover more than was asked.
+
+    Args:
+        tile_rows - dict of tile -> DataFrame
+        tiles - year tiles of the request, in order
+        date_start - Start of the requested range: MM-DD-YYYY
+        date_end - End of the requested range: MM-DD-YYYY
+
+    Returns:
+        DataFrame of the rows within the requested range, sorted by date
+    """
+    first, last = date_to_es_format(date_start), date_to_es_format(date_end)
+    frame = pd.concat([tile_rows[tile] for tile in tiles], ignore_index=True)
+    dates = frame['Date'].values.astype('datetime64[D]')
+    frame = frame[(dates >= np.datetime64(first)) & (dates <= np.datetime64(last))]
+    return frame.sort_values('Date', kind='stable', ignore_index=True)
+
+def perform_background_uploads(tile_files, data_for_elastic):
+    for task, file_path, ttl in tile_files:
+        push_to_cache(task, file_path, ttl)
+    elastic_insert(frame_records(data_for_elastic))
+
+def elastic_tiles(input_params: input_parameters, tiles: list) -> dict:
+    """
+    Purpose:
+        Serves missing year tiles from Elasticsearch with one date range search. A tile is
+        only used if it is final and holds every monthly composite; those tiles are also
+        written to the file cache so the next request reads them locally.
+
+    Args:
+        input_params - canonical input of the request
+        tiles - year tiles missing from the cache, in order
+
+    Returns:
+        dict of tile -> DataFrame for the tiles Elasticsearch could answer
+    """
+    final = [tile for tile in tiles if tile_is_final(tile)]
+    if not final:
+        return {}
+    rows = elastic_search(input_params.lat, input_params.lon, final[0][0], final[-1][1])
+    return tiles_from_rows(input_params, final, rows)
+
+def tiles_from_rows(input_params: input_parameters, final: list, rows: list) -> dict:
+    """
+    Purpose:
+        Keeps the final year tiles an Elasticsearch series holds completely, and writes
+        them to the file cache.
+
+    Args:
+        input_params - canonical input of the request
+        final - final year tiles that were searched, in order
+        rows - rows of the series, None or empty if nothing was found
+
+    Returns:
+        dict of tile -> DataFrame for the complete tiles
+    """
+    if not rows:
+        return {}
+    frame = frame_from_rows(rows)
+    years = frame['Date'].dt.year.values
+
+    found = {}
+    for tile in final:
+        year_rows = frame[years == tile_year(tile)].reset_index(drop=True)
+        if year_rows['Date'].nunique() < MONTHS_PER_TILE:
+            continue
+        task = tile_task(input_params, tile)
+        tile_path = os.path.join(DOWNLOAD_DIR, f"es_{hashlib.sha1(cache_key(task).encode()).hexdigest()[:16]}.csv")
+        write_tile(tile_path, year_rows)
+        push_to_cache(task, tile_path)
+        index_tile(task, tile, tile_path, year_rows)
+        found[tile] = year_rows
+    return found
+
+def cached_tiles(input_params: input_parameters, tiles: list):
+    """
+    Purpose:
+        Looks every year tile of the input up in the file cache.
+
+    Returns:
+        dict of tile -> cached file path, and the list of tiles that are not cached
+    """
+    tile_paths, missing = {}, []
+    for tile in tiles:
+        file_path = cached_path(tile_task(input_params, tile))
+        if file_path is None:
+            missing.append(tile)
         else:
-            print(f"Download failed. HTTP Status Code: {file_response.status_code}")
-            return None, None
-    else:
-        print("Download failed: Could not find the main CSV output file in the bundle.")
-        return None, None
+            tile_paths[tile] = file_path
+    return tile_paths, missing
+
+def load_tiles(input_params: input_parameters, tile_paths: dict, missing: list, columns: list = None,
+               elastic: bool = True):
+    """
+    Purpose:
+        Reads the cached tiles and takes what is still missing from Elasticsearch, leaving
+        only the tiles AppEEARS has to be asked for.
+
+    Args:
+        input_params - canonical input of the request
+        tile_paths - dict of tile -> cached file path
+        missing - tiles that are not cached
+        columns - columns to load from the cached tiles, all of them if None
+        elastic - False to skip Elasticsearch, e.g. when the caller searches in bulk
+
+    Returns:
+        dict of tile -> DataFrame, and the tiles still missing, in order
+    """
+    tile_rows, missing = {}, list(missing)
+    for tile, file_path in tile_paths.items():
+        rows = read_data(file_path, columns)
+        if rows is None:
+            missing.append(tile)
+        else:
+            index_tile(tile_task(input_params, tile), tile, file_path, rows)
+            tile_rows[tile] = rows
+    for tile in list(missing) if pending_tiles else ():
+        rows = pending_rows(input_params, tile) # fetched here, still being ingested
+        if rows is not None:
+            tile_rows[tile] = rows if columns is None else rows[[name for name in rows.columns if name in columns]]
+            missing.remove(tile)
+    missing.sort(key=tile_year)
+
+    if missing and elastic:
+        found = elastic_tiles(input_params, missing)
+        tile_rows.update(found)
+        missing = [tile for tile in missing if tile not in found]
+    return tile_rows, missing
+
+def point_series(input_params: input_parameters, columns: list = None, priority: str = 'interactive',
+                 client: str = None):
+    """
+    Purpose:
+        NDVI rows of one canonical input from the cache, Elasticsearch and, for whatever is
+        left, AppEEARS; the blocking counterpart of access_data for internal callers.
+
+    Returns:
+        DataFrame of the rows, or a dict with a message if nothing could be fetched
+    """
+    tiles = year_tiles(input_params.date_start, input_params.date_end)
+    tile_paths, missing = cached_tiles(input_params, tiles)
+    tile_rows, missing = load_tiles(input_params, tile_paths, missing, columns)
+    return finish_request(input_params, tiles, tile_rows, missing, priority, client)
+
+def finish_request(input_params: input_parameters, tiles: list, tile_rows: dict, missing: list,
+                   priority: str = 'interactive', client: str = None):
+    """
+    Purpose:
+        Fetches the missing year tiles from AppEEARS and stitches the response. This is
+        the slow part of access_data that runs as a job in job mode.
+
+    Returns:
+        DataFrame of the rows, or a dict with a message if nothing could be fetched
+    """
+    if missing:
+        # concurrent requests for the same missing tiles wait on a single AppEEARS task
+        miss_key = cache_key(make_task(input_params, merge_tiles(missing)))
+        fetched = flight.do(miss_key, fetch_tiles, input_params, missing, priority, client)
+        if fetched is None:
+            return {"message": "Task failed or ended with error"}
+        tile_rows.update(fetched)
+
+    data = stitch_tiles(tile_rows, tiles, input_params.date_start, input_params.date_end)
+    if data.empty:
+        print("No data fetched.")
+        return {"message": "No data fetched"}
+    return data
+
+def job_progress(job) -> int:
+    """
+    Purpose:
+        Progress of a running job from the status AppEEARS last reported for its task,
+        0 while it is still queued or batching.
+    """
+    progress = []
+    for progress_key in job.progress_keys:
+        status = task_progress.get(point_tasks.get(progress_key))
+        progress.append(status["progress"] if status else 0)
+    return min(progress) if progress else 0
+
+def result_json(result) -> str:
+    """
+    Purpose:
+        JSON body of an access_data result: a DataFrame of rows or a dict with a message.
+    """
+    if isinstance(result, pd.DataFrame):
+        return frame_json(result)
+    return json.dumps(result)
 
-def perform_background_uploads(task, file_path, data_for_elastic):
-    push_to_cache(task, file_path)
-    elastic_insert(data_for_elastic)
+def json_response(result) -> Response:
+    return Response(result_json(result), mimetype='application/json')
+
+def format_rows(frame, fmt: str, header: bool = False) -> str:
+    return frame_csv(frame, header=header) if fmt == 'csv' else frame_json(frame, lines=True)
+
+def stream_rows(rows, fmt: str) -> Response:
+    """
+    Purpose:
+        Streams rows that are already in memory as NDJSON or CSV, STREAM_BATCH_ROWS rows
+        at a time, instead of serializing the whole response into one string.
+    """
+    def generate():
+        for start in range(0, max(len(rows), 1), STREAM_BATCH_ROWS):
+            yield format_rows(rows.iloc[start:start + STREAM_BATCH_ROWS], fmt, header=start == 0)
+
+    return Response(generate(), mimetype=STREAM_MIMETYPES[fmt])
+
+def stream_tiles(tiles: list, tile_paths: dict, date_start: str, date_end: str, fmt: str) -> Response:
+    """
+    Purpose:
+        Streams cached year tiles straight from their files as NDJSON or CSV, so memory
+        per request stays flat and the first bytes go out before the last tile is read.
+        CSV tiles that lie fully inside the range are copied as raw file chunks, and a
+        single such tile is handed to send_file.
+
+    Args:
+        tiles - year tiles of the request, in order
+        tile_paths - dict of tile -> cached file path
+        date_start - Start of the requested range: MM-DD-YYYY
+        date_end - End of the requested range: MM-DD-YYYY
+        fmt - 'ndjson' or 'csv'
+
+    Returns:
+        streaming Response, None if a tile could no longer be read
+    """
+    first, last = date_to_es_format(date_start), date_to_es_format(date_end)
+    inside = {tile: first <= date_to_es_format(tile[0]) and date_to_es_format(tile[1]) <= last for tile in tiles}
+    single = fmt == 'csv' and len(tiles) == 1 and inside[tiles[0]]
+
+    # open every file, and map every columnar copy, up front so a concurrent eviction
+    # cannot remove one mid-stream; a tile evicted before that leaves the request to
+    # the non-streaming path instead of a gap in the series
+    sources = []
+    for tile in tiles:
+        try:
+            if single:
+                source = open(tile_paths[tile], mode='rb')
+            elif fmt == 'csv' and inside[tile]:
+                source = open(tile_paths[tile], mode='r', newline='', encoding='utf-8')
+            else:
+                source = read_data(tile_paths[tile])
+        except OSError as e:
+            print(f"Could not open {tile_paths[tile]}: {e}")
+            source = None
+        if source is None:
+            for _, opened in sources:
+                if hasattr(opened, 'close'):
+                    opened.close()
+            return None
+        sources.append((tile, source))
+
+    if single:
+        return send_file(sources[0][1], mimetype=STREAM_MIMETYPES[fmt])
+
+    def generate():
+        header_sent = False
+        try:
+            for tile, source in sources:
+                if not isinstance(source, pd.DataFrame):
+                    header = source.readline()
+                    if not header_sent:
+                        header_sent = True
+                        yield header
+                    while chunk := source.read(STREAM_CHUNK_SIZE):
+                        yield chunk
+                    continue
+                dates = source['Date'].values.astype('datetime64[D]')
+                rows = source[(dates >= np.datetime64(first)) & (dates <= np.datetime64(last))]
+                for start in range(0, len(rows), STREAM_BATCH_ROWS):
+                    yield format_rows(rows.iloc[start:start + STREAM_BATCH_ROWS], fmt, header=not header_sent)
+                    header_sent = True
+        finally:
+            for _, source in sources:
+                if hasattr(source, 'close'):
+                    source.close()
+
+    return Response(generate(), mimetype=STREAM_MIMETYPES[fmt])
 
 @app.route('/api/access_data', methods=['GET'])
 def access_data():
     """
+    Purpose:
+        Returns the NDVI rows for a coordinate and date range. The range is split into
+        year tiles: tiles already cached are read locally, complete tiles are then taken
+        from Elasticsearch, and only what is still missing is requested from AppEEARS,
+        in a single task.
+        With mode=job, a request that needs AppEEARS returns 202 with a job id right away
+        instead of blocking the worker; cache and Elasticsearch hits still return directly.
+        With format=ndjson or format=csv the rows are streamed instead of returned as one
+        JSON array; fully cached ranges stream straight from the cached files.
     """
     lat = request.args.get('latitude')
     lon = request.args.get('longitude')
     date_s = request.args.get('date_start')
     date_e = request.args.get('date_end')
-    input = input_parameters(lat, lon, date_s, date_e)
+    job_mode = request.args.get('mode') == 'job'
+    fmt = request.args.get('format', 'json')
+    if fmt != 'json' and fmt not in STREAM_MIMETYPES:
+        return jsonify({"message": f"format must be json, {', '.join(STREAM_MIMETYPES)}"}), 400
+    try:
+        input = canonical_input(input_parameters(lat, lon, date_s, date_e))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    tiles = year_tiles(input.date_start, input.date_end)
+    record_request(input)
+    tile_paths, missing = cached_tiles(input, tiles)
+
+    if not missing and fmt != 'json':
+        response = stream_tiles(tiles, tile_paths, input.date_start, input.date_end, fmt)
+        if response is not None:
+            return response
+
+    tile_rows, missing = load_tiles(input, tile_paths, missing)
+
+    if missing and job_mode:
+        progress_key = (batch_key(make_task(input, merge_tiles(missing))), point_id(input))
+        job = jobs.submit(finish_request, input, tiles, tile_rows, missing, 'interactive', request_client(),
+                          progress_keys=[progress_key])
+        status_url = url_for('job_status', job_id=job.id)
+        reply = job.to_dict()
+        reply["status_url"] = status_url
+        reply["result_url"] = url_for('job_result', job_id=job.id)
+        reply["events_url"] = url_for('job_events', job_id=job.id)
+        return jsonify(reply), 202, {"Location": status_url}
+
+    data = finish_request(input, tiles, tile_rows, missing, 'interactive', request_client())
+    if fmt == 'json' or isinstance(data, dict):
+        return json_response(data)
+    return stream_rows(data, fmt)
+
+def batch_inputs(body: dict, args) -> list:
+    """
+    Purpose:
+        Reads the points of an access_data batch: either {"points": [{"id", "latitude",
+        "longitude", "date_start", "date_end"}, ...]} or a GeoJSON FeatureCollection of
+        Point features with the id (and optionally dates) in their properties. Dates
+        missing from a point default to the date_start/date_end of the body or query.
 
-    task = make_task(input)
+    Returns:
+        list of (id, canonical input_parameters)
 
-    if(within_cache(task)):
-        return jsonify(cached_task(task))
+    Raises:
+        ValueError if a point has no coordinates or dates
+    """
+    default_start = body.get('date_start') or args.get('date_start')
+    default_end = body.get('date_end') or args.get('date_end')
+    points = []
+    if body.get('type') == 'FeatureCollection':
+        for n, feature in enumerate(body.get('features', [])):
+            geometry = feature.get('geometry') or {}
+            properties = feature.get('properties') or {}
+            if geometry.get('type') != 'Point':
+                raise ValueError(f"feature {n} is not a Point")
+            longitude, latitude = geometry['coordinates'][:2]
+            points.append((properties.get('id', feature.get('id', n)), latitude, longitude,
+                           properties.get('date_start'), properties.get('date_end')))
+    else:
+        for n, point in enumerate(body.get('points', [])):
+            points.append((point.get('id', n), point.get('latitude'), point.get('longitude'),
+                           point.get('date_start'), point.get('date_end')))
+
+    inputs = []
+    for id, latitude, longitude, date_start, date_end in points:
+        date_start, date_end = date_start or default_start, date_end or default_end
+        if latitude is None or longitude is None or not date_start or not date_end:
+            raise ValueError(f"point {id} needs latitude, longitude, date_start and date_end")
+        inputs.append((id, canonical_input(input_parameters(latitude, longitude, date_start, date_end))))
+    return inputs
+
+def batch_line(id, data) -> str:
+    if isinstance(data, pd.DataFrame):
+        return f'{{"id": {json.dumps(id)}, "rows": {frame_json(data)}}}\n'
+    return json.dumps({"id": id, **data}) + "\n"
+
+@app.route('/api/access_data/batch', methods=['POST'])
+def access_data_batch():
+    """
+    Purpose:
+        access_data for many points in one call. Cached tiles of every point are read
+        first, the points' remaining final years are looked up in Elasticsearch with
+        multi searches, and only what is still missing goes to AppEEARS, through the
+        micro-batcher, as a few multi-point tasks.
+        Results stream back as NDJSON, one {"id", "rows"} (or {"id", "message"}) line per
+        point: points answered locally first, the others as their tasks finish.
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        inputs = batch_inputs(body, request.args)
+    except (ValueError, KeyError, TypeError, IndexError) as e:
+        return jsonify({"message": str(e)}), 400
+    if not inputs or len(inputs) > BATCH_REQUEST_MAX_POINTS:
+        return jsonify({"message": f"between 1 and {BATCH_REQUEST_MAX_POINTS} points are required"}), 400
+
+    # cache tier, then one round of multi searches for every point's final missing years
+    points = []
+    for id, input in inputs:
+        tiles = year_tiles(input.date_start, input.date_end)
+        record_request(input)
+        tile_paths, missing = cached_tiles(input, tiles)
+        tile_rows, missing = load_tiles(input, tile_paths, missing, elastic=False)
+        points.append((id, input, tiles, tile_rows, missing))
+
+    searched = [(n, [tile for tile in point[4] if tile_is_final(tile)]) for n, point in enumerate(points)]
+    searched = [(n, final) for n, final in searched if final]
+    series = elastic_msearch([(points[n][1].lat, points[n][1].lon, final[0][0], final[-1][1]) for n, final in searched])
+    for (n, final), rows in zip(searched, series):
+        id, input, tiles, tile_rows, missing = points[n]
+        found = tiles_from_rows(input, final, rows)
+        tile_rows.update(found)
+        points[n] = (id, input, tiles, tile_rows, [tile for tile in missing if tile not in found])
+
+    client = request_client()
+
+    def generate():
+        waiting = {} # future -> points waiting on it; repeated points share one future
+        for id, input, tiles, tile_rows, missing in points:
+            if not missing:
+                yield batch_line(id, finish_request(input, tiles, tile_rows, missing))
+                continue
+            # the futures resolve when the point's multi-point task is done; a fetch of
+            # the same tiles already in flight, from any route, is joined instead
+            miss_key = cache_key(make_task(input, merge_tiles(missing)))
+            future = flight.submit(miss_key, submit_tiles, input, missing, 'batch', client)
+            waiting.setdefault(future, []).append((id, input, tiles, tile_rows))
+        for future in as_completed(waiting):
+            try:
+                fetched = future.result()
+            except Exception as e:
+                print(f"Batch points {[point[0] for point in waiting[future]]} failed: {e}")
+                fetched = None
+            for id, input, tiles, tile_rows in waiting[future]:
+                if fetched is None:
+                    yield batch_line(id, {"message": "Task failed or ended with error"})
+                    continue
+                tile_rows.update(fetched)
+                yield batch_line(id, finish_request(input, tiles, tile_rows, []))
+
+    return Response(generate(), mimetype=STREAM_MIMETYPES["ndjson"])
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Purpose:
+        Status of an access_data job, with the progress AppEEARS reports for its task.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"message": "Unknown job"}), 404
+    return jsonify(job.to_dict(job_progress(job)))
 
-    data  = elastic_search(input.lat, input.lon, input.date_start) # only searching start date for now
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """
+    Purpose:
+        Result of a finished access_data job: the same body access_data would have
+        returned. 202 with the job status while it is still running.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"message": "Unknown job"}), 404
+    if job.status == 'failed':
+        return jsonify(job.to_dict()), 500
+    if job.status != 'done':
+        return jsonify(job.to_dict(job_progress(job))), 202
+    return json_response(job.result)
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Purpose:
+        Server-sent events stream of an access_data job: a "progress" event whenever the
+        progress changes, then a "result" (or "failed") event with the final body.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"message": "Unknown job"}), 404
+
+    def stream():
+        last = None
+        while not job.done.wait(timeout=JOB_EVENT_INTERVAL_SECONDS):
+            status = job.to_dict(job_progress(job))
+            if status != last:
+                last = status
+                yield f"event: progress\ndata: {json.dumps(status)}\n\n"
+        if job.status == 'done':
+            yield f"event: result\ndata: {result_json(job.result)}\n\n"
+        else:
+            yield f"event: failed\ndata: {json.dumps(job.to_dict())}\n\n"
 
-    if data:
-        return jsonify(data)
-    reply = enqueue_data(task)
-    
-    # check reply if its valid ----------------------------------------------
-    print(reply)
+    return Response(stream(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache"})
+
+def point_inputs(points: list, date_start: str, date_end: str) -> list:
+    """
+    Purpose:
+        Canonical inputs of the points of a multi-point request over one date range.
+
+    Args:
+        points - list of (latitude, longitude)
+        date_start - Start of the date range: MM-DD-YYYY
+        date_end - End of the date range: MM-DD-YYYY
+
+    Raises:
+        ValueError naming the first point with malformed coordinates or dates
+    """
+    inputs = []
+    for n, (lat, lon) in enumerate(points):
+        try:
+            inputs.append(canonical_input(input_parameters(lat, lon, date_start, date_end)))
+        except ValueError as e:
+            raise ValueError(f"point {n}: {e}")
+    return inputs
+
+def bloom_points(inputs: list, client: str = None):
+    """
+    Purpose:
+        Loads the NDVI series of many points for the phenology engine. Points run
+        concurrently so the ones missing from the cache and Elasticsearch meet in the
+        micro-batcher and go to AppEEARS as a few multi-point tasks.
+
+    Args:
+        inputs - canonical inputs of the points, see point_inputs
+        client - client of the request; points missing everywhere are submitted as batch work
+
+    Returns:
+        DataFrame with a 'point' column holding the index of each row's point, a list
+        of {"point", "message"} for the points that could not be loaded, and the inputs
+    """
+    with ThreadPoolExecutor(max_workers=min(len(inputs), BATCH_MAX_POINTS)) as pool:
+        series = list(pool.map(lambda input: point_series(input, ["Date", NDVI_FIELD], 'batch', client), inputs))
+
+    frames, errors = [], []
+    for n, rows in enumerate(series):
+        if isinstance(rows, pd.DataFrame):
+            frames.append(rows[["Date", NDVI_FIELD]].assign(point=n))
+        else:
+            errors.append({"point": n, **rows})
+    if not frames:
+        return pd.DataFrame({"point": [], "Date": pd.to_datetime([]), NDVI_FIELD: []}), errors, inputs
+    return pd.concat(frames, ignore_index=True), errors, inputs
+
+@app.route('/api/bloom_onset', methods=['GET', 'POST'])
+def bloom_onset():
+    """
+    Purpose:
+        Start of season (bloom onset), peak and end of season per point and calendar year,
+        computed server side by the vectorized phenology engine from the same cache,
+        Elasticsearch and AppEEARS tiers as access_data.
+        GET takes one point as latitude/longitude query parameters; POST takes
+        {"points": [{"latitude", "longitude"}, ...], "date_start", "date_end"} for up to
+        BLOOM_MAX_POINTS points. Both accept method (threshold or derivative), threshold
+        (fraction of the seasonal amplitude) and window (smoothing in months).
+
+    Returns:
+        {"method", "seasons": [...], "errors": [...]}; every season carries the index of
+        its point in the request and the snapped pixel coordinates
+    """
+    params = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    if request.method == 'POST':
+        points = [(point.get('latitude'), point.get('longitude')) for point in params.get('points', [])]
+    else:
+        points = [(params.get('latitude'), params.get('longitude'))]
+    if not points or len(points) > BLOOM_MAX_POINTS:
+        return jsonify({"message": f"between 1 and {BLOOM_MAX_POINTS} points are required"}), 400
+    if not params.get('date_start') or not params.get('date_end'):
+        return jsonify({"message": "date_start and date_end are required"}), 400
+    method = params.get('method', 'threshold')
+    if method not in PHENOLOGY_METHODS:
+        return jsonify({"message": f"method must be one of {', '.join(PHENOLOGY_METHODS)}"}), 400
+    try:
+        threshold = float(params.get('threshold', 0.5))
+        window = int(params.get('window', 3))
+    except (TypeError, ValueError):
+        return jsonify({"message": "threshold must be a number and window an integer"}), 400
+    if not 0 <= threshold <= 1 or not 1 <= window <= MONTHS:
+        return jsonify({"message": f"threshold must be between 0 and 1 and window between 1 and "
+                                   f"{MONTHS} months"}), 400
+
+    try:
+        inputs = point_inputs(points, params.get('date_start'), params.get('date_end'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    rows, errors, inputs = bloom_points(inputs, request_client())
+    seasons = season_metrics(rows, NDVI_FIELD, id_column='point', method=method, threshold=threshold, window=window)
+    point = seasons['point'].to_numpy(dtype=int)
+    seasons.insert(1, "latitude", np.array([float(input.lat) for input in inputs])[point])
+    seasons.insert(2, "longitude", np.array([float(input.lon) for input in inputs])[point])
+    return jsonify({"method": method, "seasons": frame_records(seasons), "errors": errors})
+
+def pixel_key(latitude, longitude) -> str:
+    """
+    Purpose:
+        Key the climatology stores a pixel under: the id of the point a request for the
+        coordinate would use.
+    """
+    return point_id(canonical_input(input_parameters(float(latitude), float(longitude), None, None)))
 
-    if data_ready(reply['task_id']): # wait while data is getting processed 
-        data, file_path = fetch_data(reply['task_id'])
-        if not data or not file_path:
-            print("No data fetched.")
-            return jsonify({"message": "No data fetched"})
-        if not data:
-            print("No data fetched.")
-            return jsonify({"message": "No data fetched"})
-        perform_background_uploads(task, file_path, data)
-        print("DATA:", data)
-        return jsonify(data)
-    return jsonify({"message": "Task failed or ended with error"})
+def keyed_rows(frame):
+    """
+    Purpose:
+        Date and NDVI rows of a frame with the pixel key of their coordinates, computed once
+        per distinct coordinate.
+    """
+    if frame.empty or not {'Latitude', 'Longitude', 'Date', NDVI_FIELD}.issubset(frame.columns):
+        return None
+    coordinates, pixel = np.unique(frame[['Latitude', 'Longitude']].to_numpy(dtype=np.float64),
+                                   axis=0, return_inverse=True)
+    keys = np.array([pixel_key(latitude, longitude) for latitude, longitude in coordinates])
+    return pd.DataFrame({"pixel": keys[pixel.ravel()], "Date": frame['Date'].values,
+                         NDVI_FIELD: frame[NDVI_FIELD].to_numpy(dtype=np.float32, na_value=np.nan)})
+
+def climatology_series() -> MonthlySeries:
+    """
+    Purpose:
+        Every NDVI observation the service holds, for the climatology build: the tiles in
+        the file cache, then the documents indexed in Elasticsearch, scanned in pages.
+        Each tile and each chunk of the scan is folded into the monthly series right away,
+        so the build never holds the raw rows. Observations found in both are counted once.
+
+    Returns:
+        MonthlySeries keyed by pixel
+    """
+    columns = ['Latitude', 'Longitude', 'Date', NDVI_FIELD]
+    series = MonthlySeries()
+    for file_path in cache.file_paths():
+        if os.path.exists(file_path):
+            series.add(keyed_rows(read_tile(file_path, columns)), NDVI_FIELD, 'pixel')
+
+    if client is not None:
+        chunk = []
+        try:
+            for hit in helpers.scan(client, index=INDEX_PATTERN, size=ES_PAGE_SIZE, _source=columns,
+                                    query={"query": {"exists": {"field": NDVI_FIELD}}}):
+                chunk.append(hit['_source'])
+                if len(chunk) >= CLIMATOLOGY_SCAN_ROWS:
+                    series.add(keyed_rows(frame_from_rows(chunk, columns)), NDVI_FIELD, 'pixel')
+                    chunk = []
+        except Exception as e:
+            print(f"Elasticsearch Scan Error: {e}")
+        if chunk:
+            series.add(keyed_rows(frame_from_rows(chunk, columns)), NDVI_FIELD, 'pixel')
+    return series
+
+baseline = BaselineBuilder(climatology_series, CLIMATOLOGY_PATH, interval=CLIMATOLOGY_REFRESH_SECONDS,
+                           build=CLIMATOLOGY_BUILD)
+
+@app.route('/api/ndvi_anomaly', methods=['GET', 'POST'])
+def ndvi_anomaly():
+    """
+    Purpose:
+        Monthly NDVI anomalies of one or many points over a date range: every observation
+        is compared with the precomputed climatology of its pixel and calendar month in one
+        vectorized pass, so an anomaly map is a baseline lookup rather than a multi-year
+        fetch per pixel. The observations of the range come from the same cache,
+        Elasticsearch and AppEEARS tiers as access_data.
+        GET takes one point as latitude/longitude query parameters; POST takes
+        {"points": [{"latitude", "longitude"}, ...], "date_start", "date_end"} for up to
+        ANOMALY_MAX_POINTS points.
+
+    Returns:
+        {"baseline": {"years", "built_at"}, "anomalies": [...], "errors": [...]}; every
+        anomaly carries the index of its point in the request, the snapped pixel
+        coordinates, the NDVI, the baseline mean and std, z and the percentile reached
+    """
+    params = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    if request.method == 'POST':
+        points = [(point.get('latitude'), point.get('longitude')) for point in params.get('points', [])]
+    else:
+        points = [(params.get('latitude'), params.get('longitude'))]
+    if not points or len(points) > ANOMALY_MAX_POINTS:
+        return jsonify({"message": f"between 1 and {ANOMALY_MAX_POINTS} points are required"}), 400
+    if not params.get('date_start') or not params.get('date_end'):
+        return jsonify({"message": "date_start and date_end are required"}), 400
+    try:
+        inputs = point_inputs(points, params.get('date_start'), params.get('date_end'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    climatology = baseline.current()
+    if climatology is None:
+        return jsonify({"message": "The NDVI climatology is still being built, try again later"}), 503
+
+    rows, errors, inputs = bloom_points(inputs, request_client())
+    point = rows['point'].to_numpy(dtype=int)
+    keys = np.array([pixel_key(input.lat, input.lon) for input in inputs], dtype=str)
+    no_baseline = np.flatnonzero(climatology.rows(keys) < 0)
+    loaded = np.isin(np.arange(len(inputs)), point)
+    errors.extend({"point": int(n), "message": "No climatology for this pixel"} for n in no_baseline if loaded[n])
+
+    scores = climatology.anomalies(keys[point], rows['Date'].values, rows[NDVI_FIELD].values)
+    anomalies = pd.DataFrame({
+        "point": point,
+        "latitude": np.array([float(input.lat) for input in inputs])[point],
+        "longitude": np.array([float(input.lon) for input in inputs])[point],
+        "Date": rows['Date'].values,
+        "ndvi": rows[NDVI_FIELD].to_numpy(dtype=np.float32, na_value=np.nan),
+    }).join(scores)
+    anomalies = anomalies[~np.isin(point, no_baseline)]
+    return jsonify({"baseline": {"years": list(climatology.years), "built_at": climatology.built_at},
+                    "anomalies": frame_records(anomalies), "errors": errors})
+
+@app.route('/api/cache_stats', methods=['GET'])
+def cache_stats():
+    """
+    Purpose:
+        Exposes the hit/miss/eviction counters and byte usage of the cache for scraping,
+        along with how many AppEEARS requests were coalesced onto an in-flight task.
+    """
+    stats = cache.stats()
+    stats["single_flight"] = flight.stats()
+    stats["batching"] = batcher.stats()
+    stats["jobs"] = jobs.stats()
+    stats["polling"] = poller.stats()
+    stats["quality"] = quality_filter.stats()
+    stats["downloads"] = downloader.stats()
+    stats["spatial_index"] = pixels.stats()
+    stats["climatology"] = baseline.stats()
+    stats["prefetch"] = prefetcher.stats()
+    stats["submissions"] = submissions.stats()
+    stats["ingest"] = ingest.stats()
+    return jsonify(stats)
+
+# started on import rather than in __main__, so replayed jobs also run under a WSGI server
+# and the climatology is loaded or built before the first anomaly request; at the end of
+# the module because both use everything defined above
+ingest.start()
+baseline.start()
 
 if __name__ == '__main__':
     # Flask runs on port 5000 by default
@@ -0,0 +1,87 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import requests as r
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRIED_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}) # idempotent, safe to send again
+
+class AppEEARSClient:
+    """
+    Client for the AppEEARS API. All calls share one pooled Session, so connections are
+    kept alive instead of opening a new TLS connection per call. Transient failures
+    (connection resets, 429 and 5xx) are retried with exponential backoff, and the
+    bearer token is renewed when it expires or a call comes back 401.
+    Args:
+    - api (string)         : base URL of the API, ending in a slash
+    - pool_size (int)      : connections kept open to the API, roughly the number of
+                             threads that call it at the same time
+    - retries (int)        : attempts after the first one for transient failures
+    - backoff (float)      : backoff factor in seconds between retries (0.5, 1, 2, ...)
+    - timeout (tuple)      : (connect, read) timeout of every call in seconds
+    """
+    def __init__(self, api: str, pool_size: int = 32, retries: int = 4, backoff: float = 0.5,
+                 timeout: tuple = (10, 120)):
+        self.api          = api
+        self.timeout      = timeout
+        self.lock         = threading.Lock()
+        self.token        = None
+        self.expires      = None
+        self._credentials = None
+
+        # Read errors and 429/5xx replies are only retried for the idempotent methods: a
+        # POST /task that timed out or got a 5xx may still have been queued, so sending it
+        # again could submit the task twice. Connection errors, where the request never
+        # reached the API, are retried for every method, POST /task and login included.
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries,
+                      backoff_factor=backoff, backoff_jitter=backoff,
+                      allowed_methods=RETRIED_METHODS, status_forcelist=(429, 500, 502, 503, 504),
+                      respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session = r.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def login(self, username: str = None, password: str = None) -> None:
+        """
+        Logs in and keeps the credentials in this client only, so the token can be renewed.
+        Without arguments, logs in again with the stored credentials.
+        """
+        if username is not None:
+            self._credentials = (username, password)
+        token_response = self.session.post(f"{self.api}login", auth=self._credentials, timeout=self.timeout)
+        token_response.raise_for_status()
+        token_response = token_response.json()
+        self.token = token_response['token']
+        self.expires = parse_expiration(token_response.get('expiration'))
+        print(f"AppEEARS token acquired, expires {self.expires}")
+
+    def _headers(self, stale_token: str = None) -> dict:
+        with self.lock:
+            expired = self.expires is not None and datetime.now(timezone.utc) >= self.expires - timedelta(minutes=5)
+            # only one thread renews; the others see the new token once it is set
+            if self._credentials and (self.token is None or expired or self.token == stale_token):
+                self.login()
+            return {'Authorization': f"Bearer {self.token}"}
+
+    def request(self, method: str, path: str, **kwargs) -> r.Response:
+        """
+        Sends a call to the API, renewing the token and sending it again once on a 401.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        extra_headers = kwargs.pop('headers', None) or {}
+        headers = {**extra_headers, **self._headers()}
+        response = self.session.request(method, f"{self.api}{path}", headers=headers, **kwargs)
+        if response.status_code == 401 and self._credentials:
+            response.close()
+            stale_token = headers['Authorization'].split(' ', 1)[1]
+            response = self.session.request(method, f"{self.api}{path}",
+                                            headers={**extra_headers, **self._headers(stale_token)}, **kwargs)
+        return response
+
+    def get(self, path: str, **kwargs) -> r.Response:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> r.Response:
+        return self.request('POST', path, **kwargs)
@@ -0,0 +1,229 @@
+# server/asgi.py
+# Async serving mode, run from BackEnd with e.g.: uvicorn asgi:app --workers 4
+# /api/access_data runs as a coroutine: the cache lookup, Elasticsearch search, AppEEARS
+# submission and polling are awaited instead of each holding a thread, so one process
+# keeps thousands of slow upstream waits in flight. Tasks are submitted through the
+# app's submission scheduler, so both serving modes share its rate limit and priorities.
+# Every other route is the Flask app, served through a WSGI adapter.
+import asyncio
+import os
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from elasticsearch import AsyncElasticsearch
+
+import app as backend
+from app import (BATCH_MAX_POINTS, BATCH_WINDOW_SECONDS, ELASTIC_URL, ES_PAGE_SIZE, STREAM_BATCH_ROWS,
+                 STREAM_MIMETYPES, batch_key, batch_submitter, cache_key, cached_tiles, canonical_input,
+                 claim_points, date_to_es_format, format_rows, load_tiles, make_task, merge_tiles, nearest_series,
+                 point_id, point_tasks, result_json, search_body, spatial_rows, stitch_tiles, task_progress,
+                 tile_is_final, tiles_from_rows)
+from elastic_index import indices_for_range
+from scheduler import AsyncMicroBatcher
+from tools import input_parameters, year_tiles
+
+es = None        # AsyncElasticsearch, None when no API key is configured
+inflight = {}    # cache key of missing tiles -> future of the batch fetching them
+
+async def elastic_search(latitude, longitude, date_start: str, date_end: str):
+    """
+    Purpose:
+        Async app.elastic_search: the paged pixel series search, awaited on the event loop,
+        after the spatial index of the process was asked on a worker thread.
+
+    Returns:
+        rows of the nearest point in date order, None if the search failed
+    """
+    rows = await asyncio.to_thread(spatial_rows, latitude, longitude, date_start, date_end)
+    if rows is not None:
+        return rows
+    if es is None:
+        return None
+    date_start, date_end = date_to_es_format(date_start), date_to_es_format(date_end)
+    rows, search_after = [], None
+    try:
+        while True:
+            results = await es.search(index=indices_for_range(date_start, date_end), ignore_unavailable=True,
+                                      body=search_body(float(latitude), float(longitude), date_start, date_end,
+                                                       search_after))
+            hits = results['hits']['hits']
+            rows.extend(hit['_source'] for hit in hits)
+            if len(hits) < ES_PAGE_SIZE:
+                break
+            search_after = hits[-1]['sort']
+    except Exception as e:
+        print(f"Elasticsearch Query Error: {e}")
+        return None
+    return nearest_series(rows)
+
+async def elastic_tiles(input_params: input_parameters, tiles: list) -> dict:
+    """
+    Purpose:
+        Async app.elastic_tiles: complete final years from Elasticsearch, written to the
+        file cache on a worker thread.
+    """
+    final = [tile for tile in tiles if tile_is_final(tile)]
+    if not final:
+        return {}
+    rows = await elastic_search(input_params.lat, input_params.lon, final[0][0], final[-1][1])
+    return await asyncio.to_thread(tiles_from_rows, input_params, final, rows)
+
+async def run_point_batch(key: str, points: dict) -> dict:
+    """
+    Purpose:
+        Async app.run_point_batch: queues the multi-coordinate task in the shared
+        submission scheduler and waits for it and the shared poller without holding a
+        thread. The download and the CPU-bound split into cached tiles run on worker threads.
+    """
+    task = backend.batch_task(points)
+    reply = await asyncio.wrap_future(backend.submissions.submit(task, *batch_submitter(key, points)))
+    task_id = reply.get('task_id') if isinstance(reply, dict) else None
+    if task_id is None:
+        print(f"AppEEARS did not accept the task: {reply}")
+        return {} # every point of the batch gets the "Task failed" message
+    for id in points:
+        point_tasks[(key, id)] = task_id
+    try:
+        status = await asyncio.wrap_future(backend.poller.watch(task_id))
+        if status != 'done':
+            print(f"Task failed or ended with status: {status}. Check AppEEARS site for details.")
+            return {}
+        data, file_paths = await asyncio.to_thread(backend.fetch_data, task_id)
+    finally:
+        for id in points:
+            point_tasks.pop((key, id), None)
+        task_progress.pop(task_id, None)
+    if data is None or not file_paths:
+        return {}
+    return await asyncio.to_thread(backend.store_batch, points, data, file_paths)
+
+batcher = AsyncMicroBatcher(run_point_batch, window=BATCH_WINDOW_SECONDS, max_batch=BATCH_MAX_POINTS)
+
+async def fetch_tiles(input_params: input_parameters, missing: list, client: str = None):
+    """
+    Purpose:
+        Missing tiles of a point from AppEEARS through the async micro-batcher. Requests
+        for the same missing tiles while a batch is running await the same future.
+    """
+    key = cache_key(make_task(input_params, merge_tiles(missing)))
+    future = inflight.get(key)
+    if future is None:
+        point_key = batch_key(make_task(input_params, merge_tiles(missing)))
+        claim_points(point_key, [point_id(input_params)], 'interactive', client)
+        future = batcher.submit(point_key, point_id(input_params), (input_params, missing))
+        inflight[key] = future
+        future.add_done_callback(lambda _: inflight.pop(key, None))
+    return await asyncio.shield(future)
+
+async def finish_request(input_params: input_parameters, tiles: list, tile_rows: dict, missing: list,
+                         client: str = None):
+    """
+    Purpose:
+        Async app.finish_request.
+
+    Returns:
+        DataFrame of the rows, or a dict with a message if nothing could be fetched
+    """
+    if missing:
+        fetched = await fetch_tiles(input_params, missing, client)
+        if fetched is None:
+            return {"message": "Task failed or ended with error"}
+        tile_rows.update(fetched)
+
+    data = await asyncio.to_thread(stitch_tiles, tile_rows, tiles, input_params.date_start, input_params.date_end)
+    if data.empty:
+        print("No data fetched.")
+        return {"message": "No data fetched"}
+    return data
+
+def scope_client(scope) -> str:
+    """
+    app.request_client for an ASGI scope: the X-Client-Id header, or the remote address.
+    """
+    headers = dict(scope.get('headers') or [])
+    if b'x-client-id' in headers:
+        return headers[b'x-client-id'].decode()
+    return scope['client'][0] if scope.get('client') else None
+
+async def send_body(send, status: int, mimetype: str, body: str) -> None:
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", mimetype.encode()), (b"access-control-allow-origin", b"*")]})
+    await send({"type": "http.response.body", "body": body.encode()})
+
+async def access_data(scope, send, args: dict) -> None:
+    """
+    Purpose:
+        /api/access_data as a coroutine, with the same tiers, formats and status codes as
+        app.access_data (mode=job requests are served by the Flask app). Unlike the Flask
+        route, streamed formats are always serialized from the rows, cached CSV files are
+        not copied through as is, and identical fetches are coalesced in this module's
+        `inflight` map, separately from the Flask app's SingleFlight.
+    """
+    fmt = args.get('format', 'json')
+    if fmt != 'json' and fmt not in STREAM_MIMETYPES:
+        return await send_body(send, 400, 'application/json',
+                               result_json({"message": f"format must be json, {', '.join(STREAM_MIMETYPES)}"}))
+    try:
+        input = canonical_input(input_parameters(args.get('latitude'), args.get('longitude'),
+                                                 args.get('date_start'), args.get('date_end')))
+    except ValueError as e:
+        return await send_body(send, 400, 'application/json', result_json({"message": str(e)}))
+
+    tiles = year_tiles(input.date_start, input.date_end)
+    backend.record_request(input)
+    tile_paths, missing = await asyncio.to_thread(cached_tiles, input, tiles)
+    tile_rows, missing = await asyncio.to_thread(load_tiles, input, tile_paths, missing, None, False)
+    if missing:
+        found = await elastic_tiles(input, missing)
+        tile_rows.update(found)
+        missing = [tile for tile in missing if tile not in found]
+
+    data = await finish_request(input, tiles, tile_rows, missing, scope_client(scope))
+    if fmt == 'json' or isinstance(data, dict):
+        return await send_body(send, 200, 'application/json', await asyncio.to_thread(result_json, data))
+
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", STREAM_MIMETYPES[fmt].encode()), (b"access-control-allow-origin", b"*")]})
+    for start in range(0, len(data), STREAM_BATCH_ROWS):
+        chunk = await asyncio.to_thread(format_rows, data.iloc[start:start + STREAM_BATCH_ROWS], fmt, start == 0)
+        await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+async def startup() -> None:
+    global es
+    elastic_key = os.getenv("ELASTIC_API_KEY")
+    if elastic_key:
+        await asyncio.to_thread(backend.connect_to_elastic) # ingestion stays on the sync client
+        es = AsyncElasticsearch(ELASTIC_URL, api_key=elastic_key, node_class="httpxasync")
+    username = os.getenv("APPEEARS_USERNAME")
+    if username:
+        await asyncio.to_thread(backend.connect_to_api, username, os.getenv("APPEEARS_PASSWORD"))
+
+async def shutdown() -> None:
+    await asyncio.to_thread(backend.ingest.drain)
+    if es is not None:
+        await es.close()
+
+flask_app = WsgiToAsgi(backend.app)
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message['type'] == 'lifespan.shutdown':
+                await shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope['type'] == 'http' and scope['path'] == '/api/access_data' and scope['method'] == 'GET':
+        args = {name: values[0] for name, values in parse_qs(scope['query_string'].decode()).items()}
+        if args.get('mode') != 'job':
+            try:
+                return await access_data(scope, send, args)
+            except Exception as e:
+                print(f"access_data failed: {e}")
+                return await send_body(send, 500, 'application/json', result_json({"message": str(e)}))
+    await flask_app(scope, receive, send)
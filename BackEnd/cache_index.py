@@ -0,0 +1,296 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+INDEX_NAME = 'index.sqlite3'
+KEY_SUFFIX = '.key'          # sidecar next to every cached file holding its cache key
+ORPHAN_GRACE_SECONDS = 600   # unindexed files younger than this may still be downloading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    file_path   TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    expires_at  REAL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access);
+CREATE INDEX IF NOT EXISTS entries_file_path ON entries(file_path);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+class CacheIndex:
+    """
+    On-disk least-recently-used index of the files in the download directory. It maps
+    a task key to the file path, size and last access of the cached CSV, and is stored
+    in SQLite so that every worker process shares it and it survives restarts.
+    The byte budget, TTL and hit/miss/eviction counters behave like tools.LRUCache,
+    but the index owns the files: evicted and expired files are deleted by whichever
+    process evicts them.
+    Args:
+    - directory (string)     : directory holding the cached files and the index
+    - capacity_bytes (int)   : total size of all cached files before the oldest ones are evicted
+    - ttl (float)            : default lifetime of an entry in seconds, None to never expire
+    - companions (tuple)     : suffixes of files derived from a cached file (e.g. its columnar
+                               copy) that live and die with it
+    - on_evict (callable)    : called as on_evict(file_path) for every file this process
+                               deletes because it was evicted, expired or replaced
+    """
+    def __init__(self, directory: str, capacity_bytes: int, ttl: float = None, companions: tuple = (),
+                 on_evict=None):
+        self.directory      = directory
+        self.capacity_bytes = capacity_bytes
+        self.ttl            = ttl
+        self.companions     = tuple(companions)
+        self.on_evict       = on_evict
+        self.path           = os.path.join(directory, INDEX_NAME)
+        self.local          = threading.local()
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            # autocommit mode, transactions are opened explicitly with BEGIN IMMEDIATE
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self.local.db = db
+        return db
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def _count(self, db, name: str, amount: int = 1) -> None:
+        db.execute("INSERT INTO counters(name, value) VALUES (?, ?) "
+                   "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+    def _delete(self, db, key: str):
+        row = db.execute("SELECT file_path FROM entries WHERE key = ?", (key,)).fetchone()
+        db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        return row[0] if row else None
+
+    def _remove_files(self, file_paths) -> None:
+        """
+        Deletes evicted files, their key sidecars and companions unless another entry still
+        points at them.
+        """
+        db = self._connection()
+        for file_path in file_paths:
+            if db.execute("SELECT 1 FROM entries WHERE file_path = ?", (file_path,)).fetchone():
+                continue
+            for path in (file_path, file_path + KEY_SUFFIX, *(file_path + suffix for suffix in self.companions)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            if self.on_evict is not None:
+                self.on_evict(file_path)
+
+    def __contains__(self, key: str) -> bool:
+        row = self._connection().execute(
+            "SELECT expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        return row is not None and (row[0] is None or row[0] > time.time())
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, key: str):
+        """
+        Single atomic lookup: returns the file path and marks it most recently used,
+        or None on a miss. Expired entries count as misses and are evicted.
+        """
+        now = time.time()
+        expired = []
+        with self._transaction() as db:
+            row = db.execute("SELECT file_path, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                expired.append(self._delete(db, key))
+                self._count(db, 'expirations')
+                row = None
+            if row is None:
+                self._count(db, 'misses')
+                value = None
+            else:
+                db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                self._count(db, 'hits')
+                value = row[0]
+        self._remove_files(expired)
+        return value
+
+    def put(self, key: str, file_path: str, size: int = 0, ttl: float = None) -> list:
+        """
+        Inserts or replaces an entry of `size` bytes, evicting the least recently used
+        entries across all processes until the directory fits its byte budget again.
+        A file larger than the whole budget is not stored and is deleted.
+
+        Returns:
+            list of file paths that were evicted by this call
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        evicted = []
+        with self._transaction() as db:
+            old_path = self._delete(db, key)
+            if old_path is not None and old_path != file_path:
+                evicted.append(old_path)
+            if size > self.capacity_bytes:
+                evicted.append(file_path)
+                self._count(db, 'evictions')
+            else:
+                db.execute("INSERT INTO entries(key, file_path, size, last_access, expires_at) "
+                           "VALUES (?, ?, ?, ?, ?)", (key, file_path, size, now, expires_at))
+                evicted.extend(self._evict_to_budget(db))
+        if file_path not in evicted:
+            self._write_key(key, file_path, expires_at)
+        self._remove_files(evicted)
+        return evicted
+
+    def _evict_to_budget(self, db) -> list:
+        evicted = []
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        while total > self.capacity_bytes:
+            key, file_path, size = db.execute(
+                "SELECT key, file_path, size FROM entries ORDER BY last_access LIMIT 1").fetchone()
+            self._delete(db, key)
+            self._count(db, 'evictions')
+            evicted.append(file_path)
+            total -= size
+        return evicted
+
+    def _write_key(self, key: str, file_path: str, expires_at: float) -> None:
+        """
+        Records the cache key next to the file so rebuild() can re-index it.
+        """
+        sidecar = file_path + KEY_SUFFIX
+        tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({"key": key, "expires_at": expires_at}, file)
+        os.replace(tmp_path, sidecar)
+
+    def pop(self, key: str):
+        """
+        Removes an entry without deleting its file, e.g. when the file vanished from disk.
+        Returns the file path or None if the key was not cached.
+        """
+        with self._transaction() as db:
+            return self._delete(db, key)
+
+    def rebuild(self) -> dict:
+        """
+        Reconciles the index with the directory at startup:
+        * entries whose file is gone are dropped
+        * cached files missing from the index are re-indexed from their key sidecar
+        * files without a sidecar, and sidecars or companions without a file, are orphans and deleted
+
+        Returns:
+            counts of dropped, restored and removed entries
+        """
+        now = time.time()
+        result = {"dropped": 0, "restored": 0, "removed": 0}
+        orphans = []
+        with self._transaction() as db:
+            for key, file_path in db.execute("SELECT key, file_path FROM entries").fetchall():
+                if not os.path.exists(file_path):
+                    self._delete(db, key)
+                    result["dropped"] += 1
+            indexed = {row[0] for row in db.execute("SELECT file_path FROM entries")}
+
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name.startswith(INDEX_NAME) or not os.path.isfile(path):
+                    continue
+                if name.endswith(KEY_SUFFIX):
+                    if not os.path.exists(path[:-len(KEY_SUFFIX)]):
+                        orphans.append(path)
+                    continue
+                suffix = next((suffix for suffix in self.companions if name.endswith(suffix)), None)
+                if suffix is not None:
+                    if not os.path.exists(path[:-len(suffix)]) and now - os.path.getmtime(path) > ORPHAN_GRACE_SECONDS:
+                        orphans.append(path)
+                    continue
+                if path in indexed:
+                    continue
+                restored = self._restore(db, path, now)
+                if restored:
+                    result["restored"] += 1
+                elif now - os.path.getmtime(path) > ORPHAN_GRACE_SECONDS:
+                    orphans.append(path)
+            evicted = self._evict_to_budget(db)
+
+        for path in orphans:
+            try:
+                os.remove(path)
+                result["removed"] += 1
+            except FileNotFoundError:
+                pass
+        self._remove_files(evicted)
+        print(f"Cache index rebuilt: {result}")
+        return result
+
+    def _restore(self, db, file_path: str, now: float) -> bool:
+        try:
+            with open(file_path + KEY_SUFFIX, encoding='utf-8') as file:
+                meta = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return False
+        if meta.get("expires_at") is not None and meta["expires_at"] <= now:
+            return False
+        db.execute("INSERT OR REPLACE INTO entries(key, file_path, size, last_access, expires_at) "
+                   "VALUES (?, ?, ?, ?, ?)",
+                   (meta["key"], file_path, self.file_size(file_path),
+                    os.path.getmtime(file_path), meta.get("expires_at")))
+        return True
+
+    def file_size(self, file_path: str) -> int:
+        """
+        Bytes a cached file takes on disk, counting its companions.
+        """
+        size = os.path.getsize(file_path)
+        for suffix in self.companions:
+            if os.path.exists(file_path + suffix):
+                size += os.path.getsize(file_path + suffix)
+        return size
+
+    def file_paths(self) -> list:
+        """
+        Paths of every live (not expired) cached file, e.g. for background jobs that scan the cache.
+        """
+        rows = self._connection().execute(
+            "SELECT DISTINCT file_path FROM entries WHERE expires_at IS NULL OR expires_at > ?", (time.time(),))
+        return [row[0] for row in rows]
+
+    def stats(self) -> dict:
+        db = self._connection()
+        entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        counters = dict(db.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "entries": entries,
+            "size_bytes": size,
+            "capacity_bytes": self.capacity_bytes,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+            "expirations": counters.get("expirations", 0),
+        }
+
+class _Transaction:
+    """
+    BEGIN IMMEDIATE ... COMMIT block. IMMEDIATE takes the write lock up front so
+    concurrent workers serialize instead of failing on lock upgrades.
+    """
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
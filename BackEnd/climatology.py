@@ -0,0 +1,293 @@
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from phenology import MONTHS, season_matrix
+
+PERCENTILES = (10, 25, 50, 75, 90)
+MIN_YEARS = 3         # years a pixel needs in a month before its standard deviation means anything
+MIN_STD = 1e-6        # float32 rounding leaves ~1e-8 of spread on identical years, which is no spread
+CHUNK_PIXELS = 4096   # pixels whose years x months cube is reduced at once, bounds the build's memory
+
+class Climatology:
+    """
+    Per-pixel monthly NDVI baseline: mean, standard deviation, percentiles and number of
+    years for every pixel and calendar month, as float32 arrays with one row per pixel.
+    Args:
+    - pixels (array)      : pixel keys, sorted; row i of every array belongs to pixels[i]
+    - mean (array)        : (pixels, 12) mean NDVI per month
+    - std (array)         : (pixels, 12) standard deviation per month
+    - percentiles (array) : (pixels, len(levels), 12) NDVI at each percentile level
+    - count (array)       : (pixels, 12) years that went into each month
+    - levels (tuple)      : percentile levels of the percentiles array
+    - years (tuple)       : first and last year of the extracts the baseline was built from
+    - built_at (float)    : epoch seconds of the build
+    """
+    def __init__(self, pixels, mean, std, percentiles, count, levels=PERCENTILES, years=(None, None),
+                 built_at: float = None):
+        self.pixels      = np.asarray(pixels, dtype=str)
+        self.mean        = mean
+        self.std         = std
+        self.percentiles = percentiles
+        self.count       = count
+        self.levels      = tuple(int(level) for level in levels)
+        self.years       = years
+        self.built_at    = built_at if built_at is not None else time.time()
+
+    def __len__(self) -> int:
+        return len(self.pixels)
+
+    def rows(self, keys) -> np.ndarray:
+        """
+        Row of every pixel key, -1 where the pixel has no baseline.
+        """
+        keys = np.asarray(keys, dtype=str)
+        if not len(self.pixels):
+            return np.full(len(keys), -1)
+        rows = np.searchsorted(self.pixels, keys)
+        rows = np.minimum(rows, len(self.pixels) - 1)
+        return np.where(self.pixels[rows] == keys, rows, -1)
+
+    def anomalies(self, keys, dates, values) -> pd.DataFrame:
+        """
+        Purpose:
+            Compares observations against the baseline of their pixel and calendar month
+            in one vectorized pass.
+
+        Args:
+            keys - pixel key of every observation
+            dates - datetime64 date of every observation
+            values - NDVI of every observation
+
+        Returns:
+            DataFrame with mean, std, z (NaN where the month has fewer than MIN_YEARS years
+            or no variation beyond MIN_STD) and percentile: the highest percentile level the value
+            reaches, 0 below the lowest one; all NaN for pixels without a baseline
+        """
+        rows = self.rows(keys)
+        known = rows >= 0
+        row = np.where(known, rows, 0)
+        month = pd.DatetimeIndex(dates).month.values - 1
+        values = np.asarray(values, dtype=np.float32)
+
+        mean = np.where(known, self.mean[row, month], np.nan)
+        std = np.where(known, self.std[row, month], np.nan)
+        usable = known & (self.count[row, month] >= MIN_YEARS) & (std > MIN_STD)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = np.where(usable, (values - mean) / std, np.nan)
+
+        levels = self.percentiles[row, :, month]               # (observations, levels)
+        reached = (values[:, None] >= levels).sum(axis=1)     # how many levels the value reaches
+        level_values = np.array((0,) + self.levels, dtype=np.float32)
+        percentile = np.where(known & ~np.isnan(values) & ~np.isnan(levels).all(axis=1),
+                              level_values[reached], np.nan)
+        return pd.DataFrame({"mean": mean.astype(np.float32), "std": std.astype(np.float32),
+                             "z": z.astype(np.float32), "percentile": percentile.astype(np.float32)})
+
+    def save(self, path: str) -> None:
+        """
+        Writes the baseline as an uncompressed .npz, under a temporary name that is renamed
+        into place so readers in other processes never see a partial file.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            np.savez(file, pixels=self.pixels, mean=self.mean, std=self.std, percentiles=self.percentiles,
+                     count=self.count, levels=np.array(self.levels),
+                     years=np.array([-1 if year is None else year for year in self.years]),
+                     built_at=np.array(self.built_at))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Baseline saved by save(), None if there is none.
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as arrays:
+            years = tuple(None if year < 0 else int(year) for year in arrays['years'])
+            return cls(arrays['pixels'], arrays['mean'], arrays['std'], arrays['percentiles'], arrays['count'],
+                       tuple(arrays['levels']), years, float(arrays['built_at']))
+
+class MonthlySeries:
+    """
+    Monthly NDVI of every pixel and calendar year, filled in a chunk of rows at a time, so
+    a build holds 12 float32 values per pixel and year instead of every row it read.
+    A month already filled keeps its value: the first source added wins.
+    """
+    def __init__(self):
+        self.seasons      = {} # (pixel key, year) -> float32 array of the 12 months
+        self.observations = 0
+
+    def __len__(self) -> int:
+        return len(self.seasons)
+
+    def add(self, frame: pd.DataFrame, value_column: str, id_column: str = 'ID') -> None:
+        """
+        Adds the rows of a frame with id_column, a datetime Date column and value_column.
+        """
+        if frame is None or frame.empty:
+            return
+        self.observations += len(frame)
+        ids, years, values = season_matrix(frame, value_column, id_column)
+        for key, months in zip(zip(ids.tolist(), years.tolist()), values):
+            known = self.seasons.get(key)
+            if known is None:
+                self.seasons[key] = months.copy() # not a view that keeps the chunk alive
+            else:
+                np.copyto(known, months, where=np.isnan(known))
+
+    def matrix(self) -> tuple:
+        """
+        (ids, years, values) laid out like phenology.season_matrix.
+        """
+        if not self.seasons:
+            return np.array([], dtype=str), np.array([], dtype=np.int32), np.empty((0, MONTHS), dtype=np.float32)
+        keys = list(self.seasons)
+        return (np.array([key[0] for key in keys], dtype=str), np.array([key[1] for key in keys], dtype=np.int32),
+                np.stack(list(self.seasons.values())))
+
+def monthly_climatology(frame: pd.DataFrame, value_column: str, id_column: str = 'ID',
+                        levels: tuple = PERCENTILES) -> Climatology:
+    """
+    Purpose:
+        Builds the monthly baseline of every pixel from its multi-year series.
+
+    Args:
+        frame - rows with id_column, a datetime Date column and value_column
+        value_column - column holding the NDVI values
+        id_column - column holding the pixel key of each row
+
+    Returns:
+        Climatology of every pixel in the frame
+    """
+    return seasonal_climatology(*season_matrix(frame, value_column, id_column), levels)
+
+def seasonal_climatology(ids, years, values, levels: tuple = PERCENTILES) -> Climatology:
+    """
+    Purpose:
+        Builds the monthly baseline from (pixel, year) rows of 12 months: the series are
+        laid out as a (pixels, years, 12) cube, a block of pixels at a time, and reduced
+        along the years.
+
+    Args:
+        ids, years, values - see phenology.season_matrix or MonthlySeries.matrix
+
+    Returns:
+        Climatology of every pixel
+    """
+    pixels, pixel_row = np.unique(np.asarray(ids, dtype=str), return_inverse=True)
+    first_year = int(years.min()) if len(years) else 0
+    span = int(years.max()) - first_year + 1 if len(years) else 1
+
+    mean = np.full((len(pixels), MONTHS), np.nan, dtype=np.float32)
+    std = np.full((len(pixels), MONTHS), np.nan, dtype=np.float32)
+    percentiles = np.full((len(pixels), len(levels), MONTHS), np.nan, dtype=np.float32)
+    count = np.zeros((len(pixels), MONTHS), dtype=np.int16)
+
+    order = np.argsort(pixel_row, kind='stable')
+    bounds = np.searchsorted(pixel_row[order], np.arange(0, len(pixels) + CHUNK_PIXELS, CHUNK_PIXELS))
+    for block, (low, high) in enumerate(zip(bounds[:-1], bounds[1:])):
+        if low == high:
+            continue
+        seasons = order[low:high]
+        first_pixel = block * CHUNK_PIXELS
+        block_pixels = min(CHUNK_PIXELS, len(pixels) - first_pixel)
+        cube = np.full((block_pixels, span, MONTHS), np.nan, dtype=np.float32)
+        cube[pixel_row[seasons] - first_pixel, years[seasons] - first_year] = values[seasons]
+
+        block_rows = slice(first_pixel, first_pixel + block_pixels)
+        count[block_rows] = (~np.isnan(cube)).sum(axis=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning) # months without any year
+            mean[block_rows] = np.nanmean(cube, axis=1)
+            std[block_rows] = np.nanstd(cube, axis=1)
+            percentiles[block_rows] = np.moveaxis(np.nanpercentile(cube, levels, axis=1), 0, 1)
+
+    year_range = (first_year, first_year + span - 1) if len(years) else (None, None)
+    return Climatology(pixels, mean, std, percentiles, count, levels, year_range)
+
+class BaselineBuilder:
+    """
+    Rebuilds the climatology on a background thread every `interval` seconds from the
+    monthly series `load_series` returns, and keeps the current baseline for lookups.
+    The baseline is saved to `path`, so a restart, or another worker process, loads it
+    instead of building it again while it is younger than `interval`.
+    Args:
+    - load_series (callable) : returns the MonthlySeries of every pixel
+    - path (string)          : .npz the baseline is saved to and loaded from
+    - interval (float)       : seconds between builds
+    - build (bool)           : False to only load baselines other processes saved
+    """
+    def __init__(self, load_series, path: str, interval: float = 24 * 60 * 60, build: bool = True):
+        self.load_series  = load_series
+        self.path         = path
+        self.interval     = interval
+        self.build        = build
+        self.lock         = threading.Lock()
+        self.thread       = None
+        self.baseline     = Climatology.load(path)
+        self.loaded_mtime = os.path.getmtime(path) if self.baseline is not None else None
+        self.builds       = 0
+        self.last_error   = None
+
+    def start(self) -> None:
+        """
+        Starts the background thread, which loads or builds the first baseline right away.
+        """
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='climatology', daemon=True)
+                self.thread.start()
+
+    def current(self):
+        """
+        The latest baseline, None until the first build finished.
+        """
+        with self.lock:
+            return self.baseline
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._refresh()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Climatology build failed: {e}")
+            time.sleep(min(self.interval, 60 * 60) if self.build else 60)
+
+    def _refresh(self) -> None:
+        saved = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if saved is not None and saved != self.loaded_mtime:
+            baseline = Climatology.load(self.path) # saved by another process
+            with self.lock:
+                self.baseline, self.loaded_mtime = baseline, saved
+        if not self.build or (saved is not None and time.time() - saved < self.interval):
+            return
+
+        started = time.monotonic()
+        series = self.load_series()
+        baseline = seasonal_climatology(*series.matrix())
+        baseline.save(self.path)
+        with self.lock:
+            self.baseline, self.loaded_mtime = baseline, os.path.getmtime(self.path)
+            self.builds += 1
+            self.last_error = None
+        print(f"Climatology built for {len(baseline)} pixels from {series.observations} rows "
+              f"in {time.monotonic() - started:.1f}s")
+
+    def stats(self) -> dict:
+        with self.lock:
+            baseline = self.baseline
+            return {
+                "pixels": len(baseline) if baseline is not None else 0,
+                "years": list(baseline.years) if baseline is not None else None,
+                "built_at": baseline.built_at if baseline is not None else None,
+                "builds": self.builds,
+                "last_error": self.last_error,
+            }
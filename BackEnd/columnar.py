@@ -0,0 +1,211 @@
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+COLUMNS_SUFFIX = '.npz'      # typed columnar copy written next to every cached CSV
+SCHEMA_MEMBER  = '__schema__' # column names and kinds, in CSV order
+
+# column kinds: how a CSV column is typed and stored
+FLOAT32     = 'float32'      # NDVI values
+FLOAT64     = 'float64'      # coordinates
+INT16       = 'int16'        # pixel line/sample inside the tile
+UINT16      = 'uint16'       # VI quality bitmask
+DATE        = 'date'         # datetime64
+CATEGORICAL = 'categorical'  # ids, tiles and any other string: int32 codes + categories
+
+def column_kind(name: str) -> str:
+    if name == 'Date':
+        return DATE
+    if name.endswith('_NDVI'):
+        return FLOAT32
+    if name in ('Latitude', 'Longitude'):
+        return FLOAT64
+    if name.endswith('_Line_Y_1km') or name.endswith('_Sample_X_1km'):
+        return INT16
+    if name.endswith('_VI_Quality'):
+        return UINT16
+    return CATEGORICAL
+
+def frame_from_rows(rows: list, fieldnames: list = None) -> pd.DataFrame:
+    """
+    Purpose:
+        Types the string rows of an AppEEARS CSV (or Elasticsearch _source) column by column.
+
+    Args:
+        rows - list of dicts with string values
+        fieldnames - column order, the keys of the first row if None
+
+    Returns:
+        DataFrame with float32 NDVI, datetime64 dates and categorical ids
+    """
+    if fieldnames is None:
+        fieldnames = list(rows[0].keys()) if rows else []
+    frame = pd.DataFrame.from_records(rows, columns=fieldnames)
+    return type_frame(frame)
+
+def read_csv(file_path: str) -> pd.DataFrame:
+    """
+    Purpose:
+        Parses a cached CSV once into typed columns.
+    """
+    frame = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    return type_frame(frame)
+
+def type_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    typed = {}
+    for name in frame.columns:
+        kind = column_kind(name)
+        values = frame[name]
+        if kind == DATE:
+            typed[name] = pd.to_datetime(values, format='%Y-%m-%d').values.astype('datetime64[D]')
+        elif kind == CATEGORICAL:
+            typed[name] = pd.Categorical(values)
+        else:
+            numbers = pd.to_numeric(values, errors='coerce')
+            if kind in (INT16, UINT16) and numbers.isna().any():
+                typed[name] = numbers.astype('float32') # keep missing values as NaN
+            else:
+                typed[name] = numbers.astype(kind)
+    return pd.DataFrame(typed, columns=list(frame.columns))
+
+def write_columns(frame: pd.DataFrame, file_path: str) -> str:
+    """
+    Purpose:
+        Stores a typed frame next to its CSV as an uncompressed .npz: one .npy member per
+        column (two for categoricals), which load_columns memory-maps individually.
+        Written to a temporary file and renamed, so readers never see a partial file.
+
+    Args:
+        frame - typed frame, as returned by frame_from_rows or read_csv
+        file_path - path of the cached CSV the columns belong to
+
+    Returns:
+        path of the columnar file
+    """
+    arrays = {}
+    schema = []
+    for name in frame.columns:
+        values = frame[name]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            arrays[f"{name}.codes"] = values.cat.codes.values.astype('int32')
+            arrays[f"{name}.categories"] = np.asarray(values.cat.categories, dtype=str)
+            schema.append((name, CATEGORICAL))
+        else:
+            arrays[name] = values.values
+            schema.append((name, str(values.dtype)))
+    arrays[SCHEMA_MEMBER] = np.array(schema, dtype=str).reshape(-1, 2)
+
+    columns_path = file_path + COLUMNS_SUFFIX
+    tmp_path = f"{columns_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, **arrays)
+    os.replace(tmp_path, columns_path)
+    return columns_path
+
+def _member(archive: zipfile.ZipFile, path: str, name: str) -> np.ndarray:
+    """
+    Memory-maps one stored .npy member of the archive, or reads it if it cannot be mapped.
+    """
+    info = archive.getinfo(f"{name}.npy")
+    with archive.open(info) as member:
+        version = np.lib.format.read_magic(member)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(member)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(member)
+        header_size = member.tell()
+    if info.compress_type != zipfile.ZIP_STORED or dtype.hasobject:
+        with archive.open(info) as member:
+            return np.lib.format.read_array(member)
+
+    # data of a stored member starts after its local header, file name and extra field
+    with open(path, 'rb') as file:
+        file.seek(info.header_offset + 26)
+        name_length, extra_length = struct.unpack('<HH', file.read(4))
+    offset = info.header_offset + 30 + name_length + extra_length + header_size
+    if not shape or 0 in shape:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran_order else 'C')
+
+def load_columns(columns_path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Purpose:
+        Loads a columnar cache file as a typed frame. Only the requested columns are
+        touched, and every numeric column is a read-only memory map of the file.
+
+    Args:
+        columns_path - path of the .npz written by write_columns
+        columns - names of the columns to load, all of them if None
+
+    Returns:
+        typed DataFrame with the requested columns in file order
+    """
+    with zipfile.ZipFile(columns_path) as archive:
+        schema = archive.open(f"{SCHEMA_MEMBER}.npy")
+        schema = np.lib.format.read_array(schema)
+        typed = {}
+        for name, kind in schema:
+            if columns is not None and name not in columns:
+                continue
+            if kind == CATEGORICAL:
+                codes = _member(archive, columns_path, f"{name}.codes")
+                categories = _member(archive, columns_path, f"{name}.categories")
+                typed[name] = pd.Categorical.from_codes(codes, categories=categories)
+            else:
+                typed[name] = _member(archive, columns_path, name)
+    return pd.DataFrame(typed, copy=False)
+
+def read_tile(file_path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Purpose:
+        Typed frame of a cached CSV. Uses its columnar copy, creating it the first time a
+        CSV without one (e.g. cached before the columnar format existed) is read.
+
+    Returns:
+        typed DataFrame, None if the CSV is gone
+    """
+    columns_path = file_path + COLUMNS_SUFFIX
+    if os.path.exists(columns_path):
+        try:
+            return load_columns(columns_path, columns)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            print(f"Unreadable columnar file '{columns_path}', rebuilding it: {e}")
+    if not os.path.exists(file_path):
+        return None
+    frame = read_csv(file_path)
+    write_columns(frame, file_path)
+    return frame if columns is None else frame[[name for name in frame.columns if name in columns]]
+
+def format_dates(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Every datetime column as YYYY-MM-DD strings, missing dates as None.
+    """
+    dates = {name: frame[name].dt.strftime('%Y-%m-%d') for name in frame.select_dtypes('datetime').columns}
+    return frame.assign(**dates) if dates else frame
+
+def frame_json(frame: pd.DataFrame, lines: bool = False) -> str:
+    """
+    Purpose:
+        Serializes a typed frame as a JSON array of records (or NDJSON with lines=True)
+        in one vectorized pass, with dates as YYYY-MM-DD.
+    """
+    frame = format_dates(frame)
+    if frame.empty:
+        return '' if lines else '[]'
+    return frame.to_json(orient='records', lines=lines, double_precision=6)
+
+def frame_records(frame: pd.DataFrame) -> list:
+    """
+    Purpose:
+        Plain list of dicts with JSON types, e.g. for bulk indexing into Elasticsearch.
+    """
+    return json.loads(frame_json(frame))
+
+def frame_csv(frame: pd.DataFrame, header: bool = True) -> str:
+    frame = format_dates(frame)
+    return frame.to_csv(index=False, header=header)
@@ -0,0 +1,168 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests as r
+
+PART_SUFFIX = '.part' # bytes of a download in progress; renamed into place once verified
+READ_SIZE = 64 * 1024 # bytes taken off the socket per read: a broken read loses at most this much
+
+class DownloadError(Exception):
+    """
+    A bundle file could not be downloaded completely, or did not match its manifest entry.
+    """
+
+class BundleDownloader:
+    """
+    Downloads the files of an AppEEARS bundle. Files go to a .part file next to their
+    destination and are only renamed into place once their size and checksum match the
+    manifest, so a crash never leaves a truncated file where the cache would find it.
+    A download that breaks off resumes where it stopped with an HTTP Range request.
+    Args:
+    - client (AppEEARSClient) : client whose get() is used for the bundle files
+    - max_workers (int)       : files of one bundle downloaded at the same time
+    - chunk_size (int)        : write buffer of the .part file, and block size when hashing
+    - attempts (int)          : tries per file before giving up, resuming each time
+    - backoff (float)         : seconds before the second try, doubled for every further one
+    """
+    def __init__(self, client, max_workers: int = 4, chunk_size: int = 1024 * 1024,
+                 attempts: int = 5, backoff: float = 1):
+        self.client      = client
+        self.max_workers = max_workers
+        self.chunk_size  = chunk_size
+        self.attempts    = attempts
+        self.backoff     = backoff
+        self.lock        = threading.Lock()
+        self.files       = 0
+        self.bytes       = 0
+        self.resumed     = 0
+        self.failed      = 0
+
+    def download(self, task_id: str, files: list, directory: str) -> dict:
+        """
+        Purpose:
+            Downloads the given manifest entries of a bundle concurrently.
+
+        Args:
+            task_id - AppEEARS task id of the bundle
+            files - manifest entries, each with file_id and optionally file_name,
+                    file_size and sha256
+            directory - directory the files are written to, as <file_id><extension>
+
+        Returns:
+            dict of file_id -> path of the verified file
+
+        Raises:
+            DownloadError if any file could not be downloaded
+        """
+        os.makedirs(directory, exist_ok=True)
+        if len(files) == 1:
+            entry = files[0]
+            return {entry['file_id']: self.download_file(task_id, entry, directory)}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(files)) or 1,
+                                thread_name_prefix='download') as pool:
+            futures = {entry['file_id']: pool.submit(self.download_file, task_id, entry, directory)
+                       for entry in files}
+            return {file_id: future.result() for file_id, future in futures.items()}
+
+    def download_file(self, task_id: str, entry: dict, directory: str) -> str:
+        """
+        Purpose:
+            Downloads one bundle file into its .part file, resuming after failures, then
+            verifies it and renames it into place.
+
+        Returns:
+            path of the verified file
+        """
+        extension = os.path.splitext(entry.get('file_name', ''))[1] or f".{entry.get('file_type', 'dat')}"
+        path = os.path.join(directory, f"{entry['file_id']}{extension}")
+        part_path = path + PART_SUFFIX
+        expected_size = entry.get('file_size')
+
+        for attempt in range(self.attempts):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                self._fetch(task_id, entry['file_id'], part_path, expected_size)
+                self._verify(part_path, entry)
+            except (r.RequestException, OSError, DownloadError) as e:
+                print(f"Download of {entry['file_id']} failed (attempt {attempt + 1}/{self.attempts}): {e}")
+                if isinstance(e, DownloadError):
+                    _remove(part_path) # corrupt bytes cannot be resumed
+                continue
+            os.replace(part_path, path)
+            with self.lock:
+                self.files += 1
+            return path
+
+        _remove(part_path) # the request failed for good, nobody resumes it
+        with self.lock:
+            self.failed += 1
+        raise DownloadError(f"Could not download {entry['file_id']} of task {task_id}")
+
+    def _fetch(self, task_id: str, file_id: str, part_path: str, expected_size: int) -> None:
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if expected_size is not None and offset >= expected_size:
+            return # already complete, only the verification or rename was missing
+        headers = {'Range': f"bytes={offset}-"} if offset else {}
+        with self.client.get(f"bundle/{task_id}/{file_id}", stream=True, headers=headers) as response:
+            if response.status_code == 416: # nothing left past the offset
+                return
+            if response.status_code not in (200, 206):
+                raise DownloadError(f"HTTP {response.status_code}")
+            resuming = offset and response.status_code == 206
+            if resuming:
+                with self.lock:
+                    self.resumed += 1
+            with open(part_path, 'ab' if resuming else 'wb', buffering=self.chunk_size) as file:
+                for chunk in response.iter_content(chunk_size=READ_SIZE):
+                    file.write(chunk)
+                    with self.lock:
+                        self.bytes += len(chunk)
+
+    def _verify(self, part_path: str, entry: dict) -> None:
+        size = os.path.getsize(part_path)
+        if entry.get('file_size') is not None and size != entry['file_size']:
+            if size < entry['file_size']:
+                raise OSError(f"incomplete, {size} of {entry['file_size']} bytes") # resumable
+            raise DownloadError(f"size {size} does not match the manifest ({entry['file_size']})")
+        if entry.get('sha256'):
+            digest = hashlib.sha256()
+            with open(part_path, 'rb') as file:
+                while block := file.read(self.chunk_size):
+                    digest.update(block)
+            if digest.hexdigest() != entry['sha256'].lower():
+                raise DownloadError("sha256 does not match the manifest")
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"files": self.files, "bytes": self.bytes, "resumed": self.resumed, "failed": self.failed}
+
+def sweep(directory: str, keep=(), grace: float = 600) -> int:
+    """
+    Purpose:
+        Deletes the leftovers of failed downloads and abandoned bundles from a download
+        directory: every file older than `grace` seconds that is not in `keep`. Younger
+        files may still be downloading or waiting to be picked up.
+
+    Returns:
+        number of files deleted
+    """
+    if not os.path.isdir(directory):
+        return 0
+    keep, now, removed = set(keep), time.time(), 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if path in keep or not os.path.isfile(path) or now - os.path.getmtime(path) <= grace:
+            continue
+        _remove(path)
+        removed += 1
+    return removed
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,140 @@
+from elasticsearch import BadRequestError
+
+# Bump TEMPLATE_VERSION whenever the mapping changes: new documents then go to a new
+# set of indices created from the new template, and the old ones can be reindexed or dropped.
+TEMPLATE_VERSION = 1
+TEMPLATE_NAME    = "ndvi-timeseries"
+INDEX_ALIAS      = "ndvi"                              # every NDVI index, for queries without dates
+INDEX_PREFIX     = f"ndvi-v{TEMPLATE_VERSION}"
+INDEX_PATTERN    = f"{INDEX_PREFIX}-*"
+REFRESH_INTERVAL = "30s"                               # documents only arrive in bulk after an extract
+
+MAPPINGS = {
+    "dynamic_templates": [
+        # human readable descriptions AppEEARS adds next to decoded layers: kept, never queried
+        {"descriptions": {"match": "*_Description", "mapping": {"type": "keyword", "index": False, "doc_values": False}}},
+        {"ndvi": {"match": "*_NDVI", "mapping": {"type": "float"}}},
+        # 16-bit VI quality bitmask, does not fit a signed short
+        {"quality": {"match": "*_VI_Quality", "mapping": {"type": "integer"}}},
+        # decoded quality bit fields come as bit strings such as 0b01
+        {"quality_bits": {"match": "*_VI_Quality_*", "mapping": {"type": "keyword"}}},
+        {"other_strings": {"match_mapping_type": "string", "mapping": {"type": "keyword", "index": False, "doc_values": False}}},
+    ],
+    "properties": {
+        "ID": {"type": "keyword"},
+        "Category": {"type": "keyword"},
+        "Date": {"type": "date", "format": "yyyy-MM-dd||strict_date_optional_time"},
+        "MODIS_Tile": {"type": "keyword"},
+        "location": {"type": "geo_point"},
+        # the point itself is queried through location; keep the raw values only in _source
+        "Latitude": {"type": "float", "index": False, "doc_values": False},
+        "Longitude": {"type": "float", "index": False, "doc_values": False},
+        "MOD13A3_061_Line_Y_1km": {"type": "short"},
+        "MOD13A3_061_Sample_X_1km": {"type": "short"},
+    },
+}
+
+# meteorological seasons: first month -> name; December opens the winter of the following year
+SEASONS = {12: "DJF", 3: "MAM", 6: "JJA", 9: "SON"}
+SEASON_FIELD = "season_start"
+# search-time field holding the first day of a document's season, so a date_histogram on it
+# with a monthly interval has exactly one bucket per season (date_histogram offsets are fixed
+# durations and cannot shift calendar quarters by a month)
+SEASON_RUNTIME_MAPPINGS = {
+    SEASON_FIELD: {
+        "type": "date",
+        "script": {"source": "ZonedDateTime date = doc['Date'].value; "
+                             "emit(date.truncatedTo(ChronoUnit.DAYS).withDayOfMonth(1)"
+                             ".minusMonths(date.getMonthValue() % 3).toInstant().toEpochMilli());"},
+    }
+}
+
+SETTINGS = {
+    # a year of monthly composites for even 10k points is ~120k small documents: one shard
+    "number_of_shards": 1,
+    "number_of_replicas": 1,
+    "refresh_interval": REFRESH_INTERVAL,
+    "codec": "best_compression",
+}
+
+def index_for_date(date: str) -> str:
+    """
+    Purpose:
+        Yearly index a document with the given date belongs to.
+
+    Args:
+        date - date of the document: YYYY-MM-DD
+
+    Returns:
+        index name, e.g. ndvi-v1-2020
+    """
+    return f"{INDEX_PREFIX}-{date[:4]}"
+
+def indices_for_range(date_start: str, date_end: str) -> str:
+    """
+    Purpose:
+        Indices a date range query has to touch, so it skips every other year.
+
+    Args:
+        date_start - Start of the range: YYYY-MM-DD
+        date_end - End of the range: YYYY-MM-DD
+
+    Returns:
+        comma separated index names, for use with ignore_unavailable
+    """
+    years = range(int(date_start[:4]), int(date_end[:4]) + 1)
+    return ",".join(f"{INDEX_PREFIX}-{year}" for year in years)
+
+def season_start(date: str) -> str:
+    """
+    Purpose:
+        First day of the meteorological season a date belongs to, as computed by the
+        season_start runtime field.
+
+    Args:
+        date - YYYY-MM-DD
+
+    Returns:
+        YYYY-MM-01 of the season's first month, e.g. 2020-12-01 for 2021-02-15
+    """
+    year, month = int(date[:4]), int(date[5:7])
+    month -= month % 3
+    if month == 0:
+        year, month = year - 1, 12
+    return f"{year:04d}-{month:02d}-01"
+
+def season_months(start: str) -> list:
+    """
+    Purpose:
+        Name and months of the season a season_start bucket stands for.
+
+    Args:
+        start - first day of the season: YYYY-MM-DD
+
+    Returns:
+        (name, ["YYYY-MM", ...]) with the three months of the season, e.g.
+        ("DJF", ["2020-12", "2021-01", "2021-02"]); ValueError if start opens no season
+    """
+    year, month = int(start[:4]), int(start[5:7])
+    if month not in SEASONS or start[8:10] != "01":
+        raise ValueError(f"{start} is not the first day of a season")
+    months = [(year + (month + n - 1) // 12, (month + n - 1) % 12 + 1) for n in range(3)]
+    return SEASONS[month], [f"{y:04d}-{m:02d}" for y, m in months]
+
+def put_index_template(client) -> None:
+    """
+    Purpose:
+        Creates or updates the versioned index template for the yearly NDVI indices.
+        Serverless projects manage shards and replicas themselves and reject those
+        settings, so the template is retried without them.
+    """
+    template = {"settings": SETTINGS, "mappings": MAPPINGS, "aliases": {INDEX_ALIAS: {}}}
+    try:
+        client.indices.put_index_template(name=TEMPLATE_NAME, index_patterns=[INDEX_PATTERN],
+                                          template=template, version=TEMPLATE_VERSION, priority=100)
+    except BadRequestError as e:
+        print(f"Index template rejected ({e}), retrying without shard settings.")
+        template["settings"] = {"refresh_interval": REFRESH_INTERVAL}
+        client.indices.put_index_template(name=TEMPLATE_NAME, index_patterns=[INDEX_PATTERN],
+                                          template=template, version=TEMPLATE_VERSION, priority=100)
+    print(f"Index template '{TEMPLATE_NAME}' v{TEMPLATE_VERSION} installed for '{INDEX_PATTERN}'.")
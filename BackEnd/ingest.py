@@ -0,0 +1,251 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload     TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    owner       INTEGER,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, id);
+"""
+QUEUED, RUNNING, FAILED = 'queued', 'running', 'failed'
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class IngestQueue:
+    """
+    Durable queue of post-download work, worked off by a pool of threads so requests do
+    not wait for it. Jobs are JSON payloads in a SQLite table shared by every worker
+    process: a job stays in the table until `handler` finished it, so jobs that were
+    queued or running when a process died are replayed once the workers start again
+    (start(), or the first put()). The handler must therefore be idempotent. Create one
+    queue per file and process: running jobs owned by this process id when the queue is
+    created belong to an earlier process that had the same id, e.g. PID 1 in a container.
+    Args:
+    - path (string)         : SQLite file of the queue
+    - handler (callable)    : called as handler(payload) on a worker thread
+    - workers (int)         : worker threads of this process
+    - max_pending (int)     : queued jobs (of all processes) before put() pushes back
+    - block_timeout (float) : seconds put() waits for room before running the job itself
+    - max_attempts (int)    : runs of a failing job before it is kept as failed
+    - on_failed (callable)  : called as on_failed(payload) when a job is given up, e.g. to
+                              delete the files it would have consumed
+    """
+    def __init__(self, path: str, handler, workers: int = 2, max_pending: int = 64,
+                 block_timeout: float = 30, max_attempts: int = 3, on_failed=None):
+        self.path          = path
+        self.handler       = handler
+        self.workers       = workers
+        self.max_pending   = max_pending
+        self.block_timeout = block_timeout
+        self.max_attempts  = max_attempts
+        self.on_failed     = on_failed
+        self.local         = threading.local()
+        self.condition     = threading.Condition()
+        self.threads       = []
+        self.stopping      = False
+        self.active        = 0
+        self.processed     = 0
+        self.failed        = 0
+        self.inline        = 0
+        self.replayed      = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._connection().executescript(SCHEMA)
+        self.replay(own=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self.local.db = db
+        return db
+
+    def _pending(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM jobs WHERE state = ?", (QUEUED,)).fetchone()[0]
+
+    def start(self) -> None:
+        """
+        Starts the worker threads, which also pick up jobs replayed from an earlier run.
+        """
+        with self.condition:
+            self.threads = [thread for thread in self.threads if thread.is_alive()]
+            while len(self.threads) < self.workers and not self.stopping:
+                thread = threading.Thread(target=self._run, name=f'ingest-{len(self.threads)}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def put(self, payload: dict):
+        """
+        Queues a job. While the queue holds max_pending jobs the caller waits for room,
+        and after block_timeout (or during shutdown) runs the job on its own thread, so
+        a backlog slows producers down instead of growing without bound.
+
+        Returns:
+            id of the queued job, None if the job already ran on the caller's thread
+        """
+        deadline = time.monotonic() + self.block_timeout
+        while not self.stopping and self._pending() >= self.max_pending and time.monotonic() < deadline:
+            with self.condition:
+                self.condition.wait(0.5)
+        if self.stopping or self._pending() >= self.max_pending:
+            with self.condition:
+                self.inline += 1
+            self.handler(payload)
+            return None
+        id = self._connection().execute("INSERT INTO jobs(payload, state, enqueued_at) VALUES (?, ?, ?)",
+                                        (json.dumps(payload), QUEUED, time.time())).lastrowid
+        self.start()
+        with self.condition:
+            self.condition.notify()
+        return id
+
+    def unfinished(self, ids) -> set:
+        """
+        Which of the given jobs are still queued or running, in any process.
+        """
+        ids = list(ids)
+        if not ids:
+            return set()
+        rows = self._connection().execute(
+            f"SELECT id FROM jobs WHERE state IN (?, ?) AND id IN ({', '.join('?' * len(ids))})",
+            (QUEUED, RUNNING, *ids))
+        return {row[0] for row in rows}
+
+    def replay(self, own: bool = False) -> int:
+        """
+        Requeues jobs left running by processes that no longer exist.
+
+        Args:
+            own - also requeue the jobs owned by this process id, only right after a
+                  (re)start when this process cannot be running any job yet
+
+        Returns:
+            number of requeued jobs
+        """
+        pid = os.getpid()
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            orphaned = [id for id, owner in db.execute("SELECT id, owner FROM jobs WHERE state = ?", (RUNNING,))
+                        if owner is None or (own and owner == pid) or not _alive(owner)]
+            db.executemany("UPDATE jobs SET state = ?, owner = NULL WHERE id = ?", [(QUEUED, id) for id in orphaned])
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        self.replayed += len(orphaned)
+        if orphaned:
+            print(f"Ingest queue: replaying {len(orphaned)} unfinished job(s)")
+        return len(orphaned)
+
+    def _claim(self):
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute("SELECT id, payload FROM jobs WHERE state = ? ORDER BY id LIMIT 1", (QUEUED,)).fetchone()
+            if row is not None:
+                db.execute("UPDATE jobs SET state = ?, owner = ?, attempts = attempts + 1 WHERE id = ?",
+                           (RUNNING, os.getpid(), row[0]))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return row
+
+    def _run(self) -> None:
+        db = self._connection()
+        while True:
+            with self.condition:
+                if self.stopping:
+                    return
+            job = self._claim()
+            if job is None:
+                with self.condition:
+                    self.condition.wait(1) # also picks up jobs queued by other processes
+                continue
+            id, payload = job
+            with self.condition:
+                self.active += 1
+            try:
+                self.handler(json.loads(payload))
+            except Exception as e:
+                print(f"Ingest job {id} failed: {e}")
+                attempts = db.execute("SELECT attempts FROM jobs WHERE id = ?", (id,)).fetchone()[0]
+                state = FAILED if attempts >= self.max_attempts else QUEUED
+                db.execute("UPDATE jobs SET state = ?, owner = NULL, error = ? WHERE id = ?", (state, str(e), id))
+                with self.condition:
+                    self.failed += state == FAILED
+                if state == FAILED and self.on_failed is not None:
+                    self.on_failed(json.loads(payload))
+            else:
+                db.execute("DELETE FROM jobs WHERE id = ?", (id,))
+                with self.condition:
+                    self.processed += 1
+            finally:
+                with self.condition:
+                    self.active -= 1
+                    self.condition.notify_all()
+
+    def payloads(self) -> list:
+        """
+        Payloads of the jobs still queued or running, in any process.
+        """
+        rows = self._connection().execute("SELECT payload FROM jobs WHERE state IN (?, ?)", (QUEUED, RUNNING))
+        return [json.loads(row[0]) for row in rows]
+
+    def drain(self, timeout: float = 60) -> bool:
+        """
+        Graceful shutdown: waits up to `timeout` seconds for the queued jobs to be worked
+        off, then stops the workers after their current job. Jobs still queued stay in
+        the table and are replayed by the next start.
+
+        Returns:
+            True if the queue was empty when the workers stopped
+        """
+        if self.stopping and not any(thread.is_alive() for thread in self.threads):
+            return not self._pending() # already drained, e.g. by the server's shutdown hook
+        deadline = time.monotonic() + timeout
+        while self._pending() and time.monotonic() < deadline and any(t.is_alive() for t in self.threads):
+            with self.condition:
+                self.condition.wait(0.5)
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(max(deadline - time.monotonic(), 0) + 5)
+        empty = not self._pending()
+        print(f"Ingest queue drained{'' if empty else ', unfinished jobs are replayed on the next start'}")
+        return empty
+
+    def stats(self) -> dict:
+        counts = dict(self._connection().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        with self.condition:
+            return {
+                "queued": counts.get(QUEUED, 0),
+                "running": counts.get(RUNNING, 0),
+                "failed_jobs": counts.get(FAILED, 0),
+                "max_pending": self.max_pending,
+                "workers": len([thread for thread in self.threads if thread.is_alive()]),
+                "active": self.active,
+                "processed": self.processed,
+                "failed": self.failed,
+                "inline": self.inline,
+                "replayed": self.replayed,
+            }
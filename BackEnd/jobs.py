@@ -0,0 +1,89 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+class Job:
+    """
+    A request that runs in the background instead of blocking a web worker.
+    Args:
+    - progress_keys (list) : keys into the shared AppEEARS progress registry that this job
+                             waits on; used to report progress while the job is running
+    """
+    def __init__(self, progress_keys=None):
+        self.id            = uuid.uuid4().hex
+        self.status        = 'queued'
+        self.result        = None
+        self.error         = None
+        self.created       = time.time()
+        self.finished      = None
+        self.progress_keys = progress_keys or []
+        self.done          = threading.Event()
+
+    def to_dict(self, progress: int = None) -> dict:
+        if self.status == 'done':
+            progress = 100
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": progress if progress is not None else 0,
+            "created": self.created,
+            "finished": self.finished,
+            "error": self.error,
+        }
+
+class JobStore:
+    """
+    Runs jobs on a bounded thread pool and keeps them, with their result, until
+    `retention` seconds after they finished.
+    Args:
+    - max_workers (int)  : number of jobs running at the same time, the rest stay queued
+    - retention (float)  : seconds a finished job and its result are kept
+    """
+    def __init__(self, max_workers: int = 8, retention: float = 3600):
+        self.executor  = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.retention = retention
+        self.lock      = threading.Lock()
+        self.jobs      = {}
+
+    def submit(self, fn, *args, progress_keys=None) -> Job:
+        """
+        Queues fn(*args) as a job. Its return value becomes the job result; a raised
+        exception marks the job as failed.
+        """
+        self._prune()
+        job = Job(progress_keys)
+        with self.lock:
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job: Job, fn, args) -> None:
+        job.status = 'running'
+        try:
+            job.result = fn(*args)
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            print(f"Job {job.id} failed: {e}")
+        finally:
+            job.finished = time.time()
+            job.done.set()
+
+    def get(self, job_id: str) -> Job:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        with self.lock:
+            for job_id in [id for id, job in self.jobs.items() if job.finished and job.finished < cutoff]:
+                del self.jobs[job_id]
+
+    def stats(self) -> dict:
+        with self.lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
@@ -0,0 +1,69 @@
+import math
+from typing import NamedTuple
+
+from pyproj import Transformer
+
+# MODIS sinusoidal grid: 36 x 18 tiles of 1200 x 1200 pixels at 1 km
+MODIS_SINUSOIDAL = "+proj=sinu +R=6371007.181 +nadgrids=@null +wktext +units=m +no_defs"
+GRID_X_MIN = -20015109.354
+GRID_Y_MAX = 10007554.677
+TILE_SIZE_M = 1111950.5196666666
+PIXELS_PER_TILE = 1200
+PIXEL_SIZE_M = TILE_SIZE_M / PIXELS_PER_TILE
+COORD_DECIMALS = 6
+
+_to_sinusoidal = Transformer.from_crs("EPSG:4326", MODIS_SINUSOIDAL, always_xy=True)
+_to_geographic = Transformer.from_crs(MODIS_SINUSOIDAL, "EPSG:4326", always_xy=True)
+
+class ModisPixel(NamedTuple):
+    """
+    A 1 km MODIS sinusoidal grid cell.
+    - pixel_id (string)  : canonical id, e.g. h12v04_0412_0987 (tile, line, sample)
+    - tile (string)      : MODIS tile, e.g. h12v04
+    - line (int)         : row of the pixel inside the tile
+    - sample (int)       : column of the pixel inside the tile
+    - latitude (string)  : latitude of the pixel center
+    - longitude (string) : longitude of the pixel center
+    """
+    pixel_id: str
+    tile: str
+    line: int
+    sample: int
+    latitude: str
+    longitude: str
+
+def snap_to_pixel(latitude, longitude) -> ModisPixel:
+    """
+    Purpose:
+        Maps a coordinate to the MOD13A3 1 km pixel that contains it. Every coordinate
+        inside the same pixel maps to the same id and the same center coordinates, so
+        they can be used to build a canonical cache key.
+
+    Args:
+        latitude - latitude of the desired coordinate (string or float)
+        longitude - longitude of the desired coordinate (string or float)
+
+    Returns:
+        ModisPixel of the grid cell containing the coordinate
+    """
+    x, y = _to_sinusoidal.transform(float(longitude), float(latitude))
+
+    # global pixel column/row counted from the upper left corner of the grid
+    column = math.floor((x - GRID_X_MIN) / PIXEL_SIZE_M)
+    row = math.floor((GRID_Y_MAX - y) / PIXEL_SIZE_M)
+    h, sample = divmod(column, PIXELS_PER_TILE)
+    v, line = divmod(row, PIXELS_PER_TILE)
+
+    center_x = GRID_X_MIN + (column + 0.5) * PIXEL_SIZE_M
+    center_y = GRID_Y_MAX - (row + 0.5) * PIXEL_SIZE_M
+    center_lon, center_lat = _to_geographic.transform(center_x, center_y)
+
+    tile = f"h{h:02d}v{v:02d}"
+    return ModisPixel(
+        pixel_id=f"{tile}_{line:04d}_{sample:04d}",
+        tile=tile,
+        line=line,
+        sample=sample,
+        latitude=f"{center_lat:.{COORD_DECIMALS}f}",
+        longitude=f"{center_lon:.{COORD_DECIMALS}f}",
+    )
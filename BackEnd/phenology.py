@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+MONTHS = 12
+METHODS = ('threshold', 'derivative')
+VALID_NDVI = (-0.2, 1.0)  # MOD13A3 fill value is -0.3 (-3000 scaled), anything outside is not a measurement
+MIN_OBSERVATIONS = 6      # valid months a point needs in a year before a season is reported
+MIN_AMPLITUDE = 0.05      # seasons flatter than this (evergreen, water, bare soil) have no onset
+
+def season_matrix(frame: pd.DataFrame, value_column: str, id_column: str = 'ID'):
+    """
+    Purpose:
+        Lays the monthly series of every point out as one row of 12 months per point and
+        calendar year, so all seasons are processed as a single 2-D array.
+
+    Args:
+        frame - rows with id_column, a datetime Date column and value_column
+        value_column - column holding the NDVI values
+        id_column - column identifying the point of each row
+
+    Returns:
+        (ids, years, values): ids and years of every row of the matrix, and a float32
+        array of shape (seasons, 12) with NaN where a month is missing or invalid
+    """
+    dates = pd.DatetimeIndex(frame['Date'])
+    points, point_ids = pd.factorize(frame[id_column], sort=True)
+    years = dates.year.values.astype(np.int64)
+    first_year = years.min() if len(years) else 0
+    span = years.max() - first_year + 1 if len(years) else 1
+    seasons, row = np.unique(points * span + (years - first_year), return_inverse=True)
+
+    values = np.full((len(seasons), MONTHS), np.nan, dtype=np.float32)
+    ndvi = frame[value_column].to_numpy(dtype=np.float32, na_value=np.nan)
+    ndvi = np.where((ndvi >= VALID_NDVI[0]) & (ndvi <= VALID_NDVI[1]), ndvi, np.nan)
+    values[row, dates.month.values - 1] = ndvi
+
+    ids = np.asarray(point_ids)[seasons // span]
+    return ids, (seasons % span + first_year).astype(np.int32), values
+
+def smooth(values: np.ndarray, window: int = 3) -> np.ndarray:
+    """
+    Purpose:
+        Centered moving average along the months that skips missing months, computed for
+        every season at once from cumulative sums. A window of 1 returns the values as is;
+        an even window reaches one month further back than forward.
+    """
+    if window < 1:
+        raise ValueError("window must be at least 1 month")
+    if window == 1:
+        return values
+    half = window // 2
+    valid = ~np.isnan(values)
+    # one extra leading zero so the difference of cumulative sums `window` apart covers months i-half..i-half+window-1
+    padding = ((0, 0), (half + 1, window - 1 - half))
+    padded = np.pad(np.where(valid, values, 0), padding)
+    counts = np.pad(valid.astype(np.float32), padding)
+    sums = np.cumsum(padded, axis=1)
+    sums = sums[:, window:] - sums[:, :-window]
+    counts = np.cumsum(counts, axis=1)
+    counts = counts[:, window:] - counts[:, :-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan).astype(np.float32)
+
+def _threshold_crossings(values: np.ndarray, peak: np.ndarray, level: np.ndarray):
+    """
+    Fractional month positions where the season first rises above, and last falls below,
+    the level on either side of the peak, linearly interpolated between months.
+    """
+    months = np.arange(MONTHS)
+    seasons = np.arange(len(values))
+    above = values >= level[:, None]
+
+    # start: first month at or above the level up to the peak, the crossing lies just before it
+    first = np.argmax(above & (months <= peak[:, None]), axis=1)
+    before = values[seasons, np.maximum(first - 1, 0)]
+    at = values[seasons, first]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        start = np.where((first > 0) & ~np.isnan(before),
+                         first - 1 + (level - before) / (at - before), first)
+
+    # end: last month at or above the level from the peak on, the crossing lies just after it
+    last = MONTHS - 1 - np.argmax((above & (months >= peak[:, None]))[:, ::-1], axis=1)
+    at = values[seasons, last]
+    after = values[seasons, np.minimum(last + 1, MONTHS - 1)]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        end = np.where((last < MONTHS - 1) & ~np.isnan(after),
+                       last + (at - level) / (at - after), last)
+    return start, end
+
+def _derivative_extremes(values: np.ndarray, peak: np.ndarray):
+    """
+    Fractional month positions of the steepest green-up before the peak and the steepest
+    senescence after it, at the midpoint between the two months of the steepest change.
+    """
+    slope = np.diff(values, axis=1)
+    steps = np.arange(MONTHS - 1)
+    rising = np.where(steps < peak[:, None], slope, np.nan)
+    falling = np.where(steps >= peak[:, None], slope, np.nan)
+    start = np.nanargmax(np.where(np.isnan(rising), -np.inf, rising), axis=1) + 0.5
+    end = np.nanargmin(np.where(np.isnan(falling), np.inf, falling), axis=1) + 0.5
+    start = np.where(np.isnan(rising).all(axis=1), np.nan, start)
+    end = np.where(np.isnan(falling).all(axis=1), np.nan, end)
+    return start, end
+
+def month_position_to_date(years: np.ndarray, position: np.ndarray) -> np.ndarray:
+    """
+    Purpose:
+        Converts fractional month positions (0 = first day of January, 11.5 = mid December)
+        into dates, NaT where the position is NaN.
+    """
+    valid = ~np.isnan(position)
+    whole = np.where(valid, np.floor(position), 0).astype(np.int64)
+    month = (years.astype(np.int64) - 1970) * MONTHS + whole
+    start = month.astype('datetime64[M]').astype('datetime64[D]')
+    length = ((month + 1).astype('datetime64[M]').astype('datetime64[D]') - start).astype(np.int64)
+    days = np.round((np.where(valid, position, 0) - whole) * length).astype(np.int64)
+    return np.where(valid, start + days.astype('timedelta64[D]'), np.datetime64('NaT'))
+
+def season_metrics(frame: pd.DataFrame, value_column: str, id_column: str = 'ID', method: str = 'threshold',
+                   threshold: float = 0.5, window: int = 3) -> pd.DataFrame:
+    """
+    Purpose:
+        Start of season (bloom onset), peak and end of season of every point and calendar
+        year in the frame, computed for all seasons at once without a per-row loop.
+        * threshold: the season starts when the smoothed NDVI rises above
+          base + threshold * amplitude before the peak and ends when it falls below it after
+        * derivative: the season starts at the steepest green-up before the peak and ends
+          at the steepest senescence after it
+
+    Args:
+        frame - rows with id_column, a datetime Date column and value_column
+        value_column - column holding the NDVI values
+        id_column - column identifying the point of each row
+        method - 'threshold' or 'derivative'
+        threshold - fraction of the seasonal amplitude used by the threshold method
+        window - months in the moving average applied before detection, 1 for none
+
+    Returns:
+        DataFrame with one row per point and year: id_column, year, start_of_season, peak,
+        end_of_season (dates), their day of year, peak_ndvi, base_ndvi, amplitude and
+        observations. Dates are NaT for seasons with too few months or no clear season.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    if not 0 <= threshold <= 1:
+        raise ValueError("threshold must be between 0 and 1")
+    if window < 1:
+        raise ValueError("window must be at least 1 month")
+    ids, years, values = season_matrix(frame, value_column, id_column)
+    observations = (~np.isnan(values)).sum(axis=1)
+    smoothed = smooth(values, window)
+
+    empty = np.isnan(smoothed).all(axis=1)
+    filled = np.where(empty[:, None], 0, smoothed)
+    with np.errstate(invalid='ignore'):
+        peak = np.nanargmax(np.where(np.isnan(filled), -np.inf, filled), axis=1)
+        base = np.nanmin(np.where(empty[:, None], 0, smoothed), axis=1)
+    peak_ndvi = smoothed[np.arange(len(smoothed)), peak]
+    amplitude = peak_ndvi - base
+
+    if method == 'threshold':
+        start, end = _threshold_crossings(smoothed, peak, base + threshold * amplitude)
+    else:
+        start, end = _derivative_extremes(smoothed, peak)
+
+    seasonal = ~empty & (observations >= MIN_OBSERVATIONS) & (amplitude >= MIN_AMPLITUDE)
+    positions = {
+        "start_of_season": np.where(seasonal, start, np.nan),
+        "peak": np.where(seasonal, peak, np.nan),
+        "end_of_season": np.where(seasonal, end, np.nan),
+    }
+
+    metrics = {id_column: ids, "year": years}
+    for name, position in positions.items():
+        dates = month_position_to_date(years, position)
+        metrics[name] = dates
+        metrics[f"{name}_doy"] = np.where(np.isnat(dates), np.nan,
+                                          (dates - (years - 1970).astype('datetime64[Y]').astype('datetime64[D]'))
+                                          .astype('timedelta64[D]').astype(np.float64) + 1)
+    metrics["peak_ndvi"] = np.where(seasonal, peak_ndvi, np.nan).astype(np.float32)
+    metrics["base_ndvi"] = np.where(seasonal, base, np.nan).astype(np.float32)
+    metrics["amplitude"] = np.where(seasonal, amplitude, np.nan).astype(np.float32)
+    metrics["observations"] = observations.astype(np.int16)
+    return pd.DataFrame(metrics)
@@ -0,0 +1,224 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from tools import DATE_FORMAT
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS popularity (
+    key        TEXT PRIMARY KEY,
+    latitude   TEXT NOT NULL,
+    longitude  TEXT NOT NULL,
+    date_start TEXT NOT NULL,
+    date_end   TEXT NOT NULL,
+    score      REAL NOT NULL,
+    requests   INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS popularity_score ON popularity(score);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+def _earlier(a: str, b: str) -> str:
+    return min(a, b, key=lambda date: datetime.strptime(date, DATE_FORMAT))
+
+def _later(a: str, b: str) -> str:
+    return max(a, b, key=lambda date: datetime.strptime(date, DATE_FORMAT))
+
+class PopularityTracker:
+    """
+    Request frequency per pixel, with the union of the date ranges asked for it. Requests
+    are counted in memory and merged into a SQLite table by flush(), so every worker
+    process contributes to one ranking that survives restarts. Scores decay with a
+    half-life, so locations that stopped being asked for drop out of the top.
+    Args:
+    - path (string)      : SQLite file of the table, outside the cache directory
+    - half_life (float)  : seconds after which a request counts half
+    - max_entries (int)  : pixels kept in the table, the least popular are forgotten
+    """
+    def __init__(self, path: str, half_life: float = 7 * 24 * 60 * 60, max_entries: int = 10_000):
+        self.path        = path
+        self.half_life   = half_life
+        self.max_entries = max_entries
+        self.lock        = threading.Lock()
+        self.pending     = {} # key -> [latitude, longitude, date_start, date_end, requests]
+        self.local       = threading.local()
+        self.recorded    = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            self.local.db = db
+        return db
+
+    def record(self, key: str, latitude, longitude, date_start: str, date_end: str) -> None:
+        """
+        Counts one request for a pixel and widens its tracked range to cover the request.
+        """
+        with self.lock:
+            entry = self.pending.get(key)
+            if entry is None:
+                self.pending[key] = [str(latitude), str(longitude), date_start, date_end, 1]
+            else:
+                entry[2] = _earlier(entry[2], date_start)
+                entry[3] = _later(entry[3], date_end)
+                entry[4] += 1
+            self.recorded += 1
+
+    def flush(self) -> int:
+        """
+        Merges the requests counted since the last flush into the shared table, decaying
+        the existing scores, and trims it to max_entries.
+
+        Returns:
+            number of pixels merged
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        now = time.time()
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            for key, (latitude, longitude, date_start, date_end, requests) in pending.items():
+                row = db.execute("SELECT date_start, date_end, score, updated_at FROM popularity WHERE key = ?",
+                                 (key,)).fetchone()
+                score = requests
+                if row is not None:
+                    date_start, date_end = _earlier(row[0], date_start), _later(row[1], date_end)
+                    score += row[2] * 0.5 ** ((now - row[3]) / self.half_life)
+                db.execute("INSERT INTO popularity(key, latitude, longitude, date_start, date_end, score, requests, updated_at) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                           "date_start = excluded.date_start, date_end = excluded.date_end, score = excluded.score, "
+                           "requests = requests + excluded.requests, updated_at = excluded.updated_at",
+                           (key, latitude, longitude, date_start, date_end, score, requests, now))
+            rows = db.execute("SELECT key, score, updated_at FROM popularity").fetchall()
+            if len(rows) > self.max_entries: # by decayed score, stale favourites are forgotten too
+                rows.sort(key=lambda row: row[1] * 0.5 ** ((now - row[2]) / self.half_life), reverse=True)
+                db.executemany("DELETE FROM popularity WHERE key = ?", [(row[0],) for row in rows[self.max_entries:]])
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return len(pending)
+
+    def top(self, n: int) -> list:
+        """
+        The n most popular pixels by decayed score.
+
+        Returns:
+            list of dicts with key, latitude, longitude, date_start, date_end, score and requests
+        """
+        now = time.time()
+        rows = self._connection().execute(
+            "SELECT key, latitude, longitude, date_start, date_end, score, requests, updated_at FROM popularity").fetchall()
+        entries = [{"key": key, "latitude": latitude, "longitude": longitude, "date_start": date_start,
+                    "date_end": date_end, "score": score * 0.5 ** ((now - updated_at) / self.half_life),
+                    "requests": requests}
+                   for key, latitude, longitude, date_start, date_end, score, requests, updated_at in rows]
+        entries.sort(key=lambda entry: entry["score"], reverse=True)
+        return entries[:n]
+
+    def claim(self, name: str, interval: float) -> bool:
+        """
+        True for exactly one caller across all processes per interval, e.g. so only one
+        worker runs a prefetch cycle.
+        """
+        now = time.time()
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+            claimed = row is None or now - row[0] >= interval
+            if claimed:
+                db.execute("INSERT OR REPLACE INTO meta(name, value) VALUES (?, ?)", (name, now))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return claimed
+
+    def stats(self) -> dict:
+        with self.lock:
+            pending = len(self.pending)
+            recorded = self.recorded
+        tracked = self._connection().execute("SELECT COUNT(*) FROM popularity").fetchone()[0]
+        return {"recorded": recorded, "pending": pending, "tracked": tracked}
+
+class Prefetcher:
+    """
+    Background thread that keeps the most popular pixels warm: every `interval` seconds it
+    flushes the popularity counts and hands the top `top_n` entries to `refresh`, which
+    fetches whatever of them is missing from the cache within `task_budget` AppEEARS tasks.
+    Worker processes share the ranking, and only one of them runs each cycle.
+    Args:
+    - tracker (PopularityTracker) : ranking of the pixels
+    - refresh (callable)          : refresh(entries, task_budget) -> (tasks submitted, points refreshed)
+    - interval (float)            : seconds between cycles
+    - top_n (int)                 : entries refreshed per cycle
+    - task_budget (int)           : AppEEARS tasks a cycle may submit
+    - flush_interval (float)      : seconds between flushes of this process's counts
+    """
+    def __init__(self, tracker: PopularityTracker, refresh, interval: float = 60 * 60, top_n: int = 200,
+                 task_budget: int = 5, flush_interval: float = 60):
+        self.tracker        = tracker
+        self.refresh        = refresh
+        self.interval       = interval
+        self.top_n          = top_n
+        self.task_budget    = task_budget
+        self.flush_interval = flush_interval
+        self.lock           = threading.Lock()
+        self.thread         = None
+        self.cycles         = 0
+        self.tasks          = 0
+        self.points         = 0
+        self.last_cycle     = None
+
+    def record(self, key: str, latitude, longitude, date_start: str, date_end: str) -> None:
+        """
+        Counts a request, starting the background thread on first use.
+        """
+        self.tracker.record(key, latitude, longitude, date_start, date_end)
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+                self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.tracker.flush()
+                if self.task_budget > 0 and self.tracker.claim('prefetch', self.interval):
+                    self.run_cycle()
+            except Exception as e:
+                print(f"Prefetch cycle failed: {e}")
+
+    def run_cycle(self) -> None:
+        entries = self.tracker.top(self.top_n)
+        if not entries:
+            return
+        tasks, points = self.refresh(entries, self.task_budget)
+        with self.lock:
+            self.cycles += 1
+            self.tasks += tasks
+            self.points += points
+            self.last_cycle = time.time()
+        print(f"Prefetch refreshed {points} of {len(entries)} popular pixels with {tasks} AppEEARS tasks")
+
+    def stats(self) -> dict:
+        stats = self.tracker.stats()
+        with self.lock:
+            stats.update({"cycles": self.cycles, "tasks": self.tasks, "points": self.points,
+                          "last_cycle": self.last_cycle, "task_budget": self.task_budget, "top_n": self.top_n})
+        return stats
@@ -0,0 +1,125 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+ACTIONS = ('off', 'mask', 'drop')
+
+# MOD13 VI_Quality bit fields: name -> (first bit, number of bits)
+QUALITY_BITS = {
+    "modland": (0, 2),         # 0 good, 1 check other QA, 2 probably cloudy, 3 not produced
+    "usefulness": (2, 4),      # 0 highest quality ... 12 lowest, 13-15 not useful
+    "aerosol": (6, 2),         # 0 climatology, 1 low, 2 intermediate, 3 high
+    "adjacent_cloud": (8, 1),
+    "brdf_correction": (9, 1),
+    "mixed_clouds": (10, 1),
+    "land_water": (11, 3),     # 1 land, 2 coastline/shoreline, the rest is water
+    "snow_ice": (14, 1),
+    "shadow": (15, 1),
+}
+LAND = (1, 2)
+
+def decode(quality: np.ndarray) -> dict:
+    """
+    Purpose:
+        Splits 16-bit MOD13 VI quality values into their bit fields in one pass per field.
+
+    Args:
+        quality - array of VI_Quality values, NaN where the layer had no value
+
+    Returns:
+        dict of field name -> uint8 array, see QUALITY_BITS
+    """
+    bits = np.nan_to_num(np.asarray(quality, dtype=np.float64), nan=0).astype(np.uint16)
+    return {name: ((bits >> first) & ((1 << length) - 1)).astype(np.uint8)
+            for name, (first, length) in QUALITY_BITS.items()}
+
+class QualityFilter:
+    """
+    Pipeline stage between the download of an extract and its caching and indexing that
+    masks (NDVI set to NaN) or drops observations the VI quality layer marks as bad, so
+    every cache hit, search and analytic downstream works on clean data.
+    Args:
+    - action (string)         : 'off', 'mask' or 'drop'
+    - max_modland (int)       : worst MODLAND summary kept: 0 good only, 1 also "check
+                                other QA", 2 also "probably cloudy"
+    - max_usefulness (int)    : worst VI usefulness index kept (0 best, 15 not useful)
+    - max_aerosol (int)       : worst aerosol quantity kept (3 keeps high aerosol)
+    - reject_adjacent_cloud (bool), reject_mixed_clouds (bool), reject_snow (bool),
+      reject_shadow (bool)    : drop observations with the respective flag set
+    - land_only (bool)        : drop observations the land/water mask marks as water
+    """
+    def __init__(self, action: str = 'mask', max_modland: int = 1, max_usefulness: int = 11,
+                 max_aerosol: int = 2, reject_adjacent_cloud: bool = False, reject_mixed_clouds: bool = True,
+                 reject_snow: bool = True, reject_shadow: bool = True, land_only: bool = False):
+        if action not in ACTIONS:
+            raise ValueError(f"quality action must be one of {', '.join(ACTIONS)}")
+        self.action                = action
+        self.max_modland           = max_modland
+        self.max_usefulness        = max_usefulness
+        self.max_aerosol           = max_aerosol
+        self.reject_adjacent_cloud = reject_adjacent_cloud
+        self.reject_mixed_clouds   = reject_mixed_clouds
+        self.reject_snow           = reject_snow
+        self.reject_shadow         = reject_shadow
+        self.land_only             = land_only
+        self.lock                  = threading.Lock()
+        self.checked               = 0
+        self.rejected              = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.action != 'off'
+
+    def good(self, quality: np.ndarray) -> np.ndarray:
+        """
+        Purpose:
+            Boolean array, True where an observation passes the policy. Observations
+            without a quality value pass, there is nothing to judge them by.
+        """
+        fields = decode(quality)
+        good = (fields["modland"] <= self.max_modland) & (fields["usefulness"] <= self.max_usefulness) \
+            & (fields["aerosol"] <= self.max_aerosol)
+        if self.reject_adjacent_cloud:
+            good &= fields["adjacent_cloud"] == 0
+        if self.reject_mixed_clouds:
+            good &= fields["mixed_clouds"] == 0
+        if self.reject_snow:
+            good &= fields["snow_ice"] == 0
+        if self.reject_shadow:
+            good &= fields["shadow"] == 0
+        if self.land_only:
+            good &= np.isin(fields["land_water"], LAND)
+        return good | np.isnan(np.asarray(quality, dtype=np.float64))
+
+    def apply(self, frame: pd.DataFrame, value_columns: list, quality_column: str) -> pd.DataFrame:
+        """
+        Purpose:
+            Applies the policy to a typed extract: value columns of bad observations are
+            set to NaN ('mask') or their rows removed ('drop'). Frames without the quality
+            column are returned as is.
+
+        Args:
+            frame - typed extract, see columnar.frame_from_rows
+            value_columns - columns masked by the 'mask' action, e.g. the NDVI layer
+            quality_column - column holding the VI_Quality values
+
+        Returns:
+            filtered DataFrame
+        """
+        if not self.enabled or quality_column not in frame.columns:
+            return frame
+        good = self.good(frame[quality_column].to_numpy(dtype=np.float64, na_value=np.nan))
+        with self.lock:
+            self.checked += len(good)
+            self.rejected += int((~good).sum())
+        if good.all():
+            return frame
+        if self.action == 'drop':
+            return frame[good].reset_index(drop=True)
+        masked = {name: frame[name].where(good) for name in value_columns if name in frame.columns}
+        return frame.assign(**masked)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"action": self.action, "observations": self.checked, "rejected": self.rejected}
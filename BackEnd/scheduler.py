@@ -0,0 +1,454 @@
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """
+    Gathers items that share a batch key for a short window, or until the batch is full,
+    and hands them to one call of run_batch. Used to merge point requests with the same
+    product, layer and dates into a single multi-coordinate AppEEARS task.
+    Args:
+    - run_batch (callable) : called as run_batch(batch_key, items) on a worker thread, where
+                             items is a dict of item_id -> item. Returns a dict of
+                             item_id -> result; ids missing from it resolve to None.
+    - window (float)       : seconds to wait for more items after the first one arrives
+    - max_batch (int)      : number of distinct items that flushes a batch immediately
+    """
+    def __init__(self, run_batch, window: float = 0.5, max_batch: int = 50):
+        self.run_batch = run_batch
+        self.window    = window
+        self.max_batch = max_batch
+        self.lock      = threading.Lock()
+        self.pending   = {} # batch_key -> (items, futures, timer)
+        self.batches   = 0
+        self.items     = 0
+        self.largest   = 0
+
+    def submit(self, batch_key: str, item_id: str, item) -> Future:
+        """
+        Adds an item to the open batch for its key. Items with the same id in one batch
+        are sent once and share the result.
+
+        Returns:
+            Future resolved with the item's result once its batch has run
+        """
+        future = Future()
+        flush_now = False
+        with self.lock:
+            if batch_key not in self.pending:
+                timer = threading.Timer(self.window, self._flush, args=(batch_key,))
+                timer.daemon = True
+                self.pending[batch_key] = ({}, {}, timer)
+                timer.start()
+            items, futures, timer = self.pending[batch_key]
+            items.setdefault(item_id, item)
+            futures.setdefault(item_id, []).append(future)
+            if len(items) >= self.max_batch:
+                timer.cancel()
+                flush_now = True
+        if flush_now:
+            threading.Thread(target=self._flush, args=(batch_key,), daemon=True).start()
+        return future
+
+    def _flush(self, batch_key: str) -> None:
+        with self.lock:
+            batch = self.pending.pop(batch_key, None)
+            if batch is None: # already flushed because it filled up
+                return
+            items, futures, _ = batch
+            self.batches += 1
+            self.items += len(items)
+            self.largest = max(self.largest, len(items))
+
+        try:
+            results = self.run_batch(batch_key, items)
+        except BaseException as e:
+            for waiting in futures.values():
+                for future in waiting:
+                    future.set_exception(e)
+            return
+        for item_id, waiting in futures.items():
+            for future in waiting:
+                future.set_result(results.get(item_id))
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "open_batches": len(self.pending),
+                "batches": self.batches,
+                "points": self.items,
+                "largest_batch": self.largest,
+            }
+
+class AsyncMicroBatcher:
+    """
+    MicroBatcher for the event loop: items wait for their batch as asyncio futures and
+    run_batch is a coroutine, so a waiting batch holds no thread. Must be used from one
+    event loop.
+    Args:
+    - run_batch (coroutine function) : awaited as run_batch(batch_key, items), see MicroBatcher
+    - window (float)                 : seconds to wait for more items after the first one arrives
+    - max_batch (int)                : number of distinct items that flushes a batch immediately
+    """
+    def __init__(self, run_batch, window: float = 0.5, max_batch: int = 50):
+        self.run_batch = run_batch
+        self.window    = window
+        self.max_batch = max_batch
+        self.pending   = {} # batch_key -> (items, futures, timer handle)
+        self.batches   = 0
+        self.items     = 0
+        self.largest   = 0
+
+    def submit(self, batch_key: str, item_id: str, item) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if batch_key not in self.pending:
+            timer = loop.call_later(self.window, self._flush, batch_key)
+            self.pending[batch_key] = ({}, {}, timer)
+        items, futures, timer = self.pending[batch_key]
+        items.setdefault(item_id, item)
+        futures.setdefault(item_id, []).append(future)
+        if len(items) >= self.max_batch:
+            timer.cancel()
+            self._flush(batch_key)
+        return future
+
+    def _flush(self, batch_key: str) -> None:
+        batch = self.pending.pop(batch_key, None)
+        if batch is None:
+            return
+        items, futures, _ = batch
+        self.batches += 1
+        self.items += len(items)
+        self.largest = max(self.largest, len(items))
+        asyncio.get_running_loop().create_task(self._run(batch_key, items, futures))
+
+    async def _run(self, batch_key: str, items: dict, futures: dict) -> None:
+        try:
+            results = await self.run_batch(batch_key, items)
+        except Exception as e:
+            for waiting in futures.values():
+                for future in waiting:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for item_id, waiting in futures.items():
+            for future in waiting:
+                if not future.done():
+                    future.set_result(results.get(item_id))
+
+    def stats(self) -> dict:
+        return {
+            "open_batches": len(self.pending),
+            "batches": self.batches,
+            "points": self.items,
+            "largest_batch": self.largest,
+        }
+
+TERMINAL_STATUSES = ('done', 'failed', 'error')
+
+class _Watched:
+    def __init__(self, now: float, interval: float):
+        self.future     = Future()
+        self.submitted  = now
+        self.next_check = now + interval
+        self.interval   = interval
+        self.progress   = 0
+        self.checked    = now
+
+class TaskPoller:
+    """
+    One background thread that polls the status of every outstanding AppEEARS task,
+    instead of every waiting request sleeping and polling its own task.
+    Intervals adapt per task: a task making progress is checked about halfway to its
+    estimated completion, a task that is not moving backs off exponentially, and never
+    more often than a tenth of its age, up to max_interval. Every interval is jittered so tasks submitted together spread out.
+    Args:
+    - check_bulk (callable) : returns a dict of task id -> status dict for many tasks in one
+                              call, or None if the bulk check is not available
+    - check_one (callable)  : returns the status dict of a single task id; used for tasks
+                              the bulk check did not report (e.g. already finished)
+    - on_status (callable)  : called as on_status(task_id, status, progress) after each check
+    - min_interval (float)  : first and shortest interval between checks of a task, seconds
+    - max_interval (float)  : longest interval between checks of a task, seconds
+    - backoff (float)       : factor the interval grows by while a task makes no progress
+    - jitter (float)        : relative random spread applied to every interval
+    - max_age (float)       : seconds after which a task that never reached a final status,
+                              or could not be checked, is given up as 'error'
+    """
+    def __init__(self, check_bulk, check_one, on_status=None, min_interval: float = 2,
+                 max_interval: float = 60, backoff: float = 1.5, jitter: float = 0.2,
+                 max_age: float = 6 * 60 * 60):
+        self.check_bulk   = check_bulk
+        self.check_one    = check_one
+        self.on_status    = on_status
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff      = backoff
+        self.jitter       = jitter
+        self.max_age      = max_age
+        self.condition    = threading.Condition()
+        self.tasks        = {} # task id -> _Watched
+        self.thread       = None
+        self.checks       = 0
+        self.bulk_checks  = 0
+        self.expired      = 0
+
+    def watch(self, task_id: str) -> Future:
+        """
+        Starts tracking a task. Watching a task that is already tracked returns its future.
+
+        Returns:
+            Future resolved with the final status of the task ('done', 'failed' or 'error'),
+            'error' as well once the task is older than max_age
+        """
+        with self.condition:
+            watched = self.tasks.get(task_id)
+            if watched is None:
+                watched = _Watched(time.monotonic(), self._jittered(self.min_interval))
+                self.tasks[task_id] = watched
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='task-poller', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+            return watched.future
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while True:
+                    now = time.monotonic()
+                    due = [id for id, watched in self.tasks.items() if watched.next_check <= now]
+                    if due:
+                        break
+                    wake = min((watched.next_check for watched in self.tasks.values()), default=None)
+                    self.condition.wait(None if wake is None else wake - now)
+            self._check(due)
+
+    def _check(self, due: list) -> None:
+        statuses = {}
+        with self.condition:
+            tracked = set(self.tasks)
+        if len(tracked) > 1:
+            # one bulk call answers every tracked task, and finishes tasks that were not yet due
+            try:
+                statuses = self.check_bulk() or {}
+                self.bulk_checks += 1
+            except Exception as e:
+                print(f"Bulk status check failed: {e}")
+        for task_id in due:
+            status = statuses.get(task_id)
+            if status is None:
+                try:
+                    status = self.check_one(task_id)
+                    self.checks += 1
+                except Exception as e:
+                    print(f"Status check of task {task_id} failed: {e}")
+            self._update(task_id, status)
+        for task_id, status in statuses.items():
+            if task_id in tracked and task_id not in due and status.get('status') in TERMINAL_STATUSES:
+                self._update(task_id, status)
+
+    def _update(self, task_id: str, status: dict) -> None:
+        now = time.monotonic()
+        state = (status or {}).get('status', 'unknown')
+        progress = progress_value((status or {}).get('progress'))
+        if self.on_status is not None and status is not None:
+            self.on_status(task_id, state, progress)
+
+        with self.condition:
+            watched = self.tasks.get(task_id)
+            if watched is None:
+                return
+            if state in TERMINAL_STATUSES:
+                del self.tasks[task_id]
+                watched.future.set_result(state)
+                return
+            expired = now - watched.submitted >= self.max_age
+            if expired:
+                del self.tasks[task_id]
+                self.expired += 1
+            else:
+                if progress > watched.progress:
+                    # check again about halfway to the completion estimated from the progress rate
+                    rate = (progress - watched.progress) / max(now - watched.checked, 1e-3)
+                    interval = (100 - progress) / rate / 2
+                else:
+                    # no progress: back off, and check long-running tasks less often than young ones
+                    interval = max(watched.interval * self.backoff, (now - watched.submitted) / 10)
+                watched.interval = min(max(interval, self.min_interval), self.max_interval)
+                watched.progress = max(progress, watched.progress)
+                watched.checked = now
+                watched.next_check = now + self._jittered(watched.interval)
+        if expired:
+            # never finished, or could not be checked: give the waiters and the task's
+            # submission slot back instead of holding them forever
+            print(f"Task {task_id} has no final status after {self.max_age:.0f}s, giving up")
+            if self.on_status is not None:
+                self.on_status(task_id, 'error', progress)
+            watched.future.set_result('error')
+
+    def stats(self) -> dict:
+        with self.condition:
+            now = time.monotonic()
+            return {
+                "pending_tasks": len(self.tasks),
+                "oldest_task_seconds": max((now - watched.submitted for watched in self.tasks.values()), default=0),
+                "status_checks": self.checks,
+                "bulk_checks": self.bulk_checks,
+                "expired": self.expired,
+            }
+
+PRIORITIES = ('interactive', 'batch', 'prefetch') # most urgent first
+
+class _Submission:
+    def __init__(self, task: dict, client: str, now: float):
+        self.task     = task
+        self.client   = client
+        self.queued   = now
+        self.future   = Future()
+
+class SubmissionScheduler:
+    """
+    Paces task submissions to AppEEARS. Tasks wait in one queue per priority and leave
+    through a single dispatcher thread when a token of the rate limiter is available and
+    fewer than max_outstanding submitted tasks are unfinished. A higher priority queue is
+    always served first; inside a queue clients take turns, so one client's backfill
+    cannot starve another's requests.
+    Args:
+    - submit (callable)     : called as submit(task) on the dispatcher thread, returns the
+                              AppEEARS reply with the task_id
+    - rate (float)          : tasks per second the token bucket refills with
+    - burst (int)           : tokens the bucket holds, i.e. tasks submitted back to back
+    - max_outstanding (int) : submitted tasks that have not finished yet, see release()
+    - task_timeout (float)  : seconds after which an unreleased task no longer counts
+    """
+    def __init__(self, submit, rate: float = 1, burst: int = 5, max_outstanding: int = 20,
+                 task_timeout: float = 6 * 60 * 60):
+        self.submit_task     = submit
+        self.rate            = rate
+        self.burst           = burst
+        self.max_outstanding = max_outstanding
+        self.task_timeout    = task_timeout
+        self.condition       = threading.Condition()
+        self.queues          = {priority: OrderedDict() for priority in PRIORITIES} # client -> deque
+        self.tokens          = float(burst)
+        self.refilled        = time.monotonic()
+        self.outstanding     = {} # task id -> submission time
+        self.thread          = None
+        self.submitted       = {priority: 0 for priority in PRIORITIES}
+        self.waited          = {priority: 0.0 for priority in PRIORITIES}
+        self.longest_wait    = {priority: 0.0 for priority in PRIORITIES}
+
+    def submit(self, task: dict, priority: str = 'interactive', client: str = None) -> Future:
+        """
+        Queues a task.
+
+        Returns:
+            Future resolved with the AppEEARS reply once the task was submitted
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+        submission = _Submission(task, client, time.monotonic())
+        with self.condition:
+            self.queues[priority].setdefault(client, deque()).append(submission)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='task-submitter', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return submission.future
+
+    def release(self, task_id: str) -> None:
+        """
+        Frees the slot of a submitted task once it finished, failed or was abandoned.
+        """
+        with self.condition:
+            if self.outstanding.pop(task_id, None) is not None:
+                self.condition.notify()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+        for task_id, submitted in list(self.outstanding.items()):
+            if now - submitted > self.task_timeout:
+                del self.outstanding[task_id]
+
+    def _next(self):
+        """
+        Oldest submission of the next client in turn of the most urgent non-empty queue.
+        """
+        for priority in PRIORITIES:
+            clients = self.queues[priority]
+            if clients:
+                client, waiting = next(iter(clients.items()))
+                submission = waiting.popleft()
+                del clients[client]
+                if waiting:
+                    clients[client] = waiting # back of the line
+                return priority, submission
+        return None, None
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    queued = any(self.queues.values())
+                    if queued and self.tokens >= 1 and len(self.outstanding) < self.max_outstanding:
+                        break
+                    if queued and self.tokens < 1:
+                        self.condition.wait((1 - self.tokens) / self.rate)
+                    else:
+                        self.condition.wait(60 if queued else None) # woken by submit() or release()
+                priority, submission = self._next()
+                self.tokens -= 1
+                wait = now - submission.queued
+                self.submitted[priority] += 1
+                self.waited[priority] += wait
+                self.longest_wait[priority] = max(self.longest_wait[priority], wait)
+
+            try:
+                reply = self.submit_task(submission.task)
+            except BaseException as e:
+                submission.future.set_exception(e)
+                continue
+            task_id = reply.get('task_id') if isinstance(reply, dict) else None
+            if task_id is not None:
+                with self.condition:
+                    self.outstanding[task_id] = time.monotonic()
+            submission.future.set_result(reply)
+
+    def stats(self) -> dict:
+        with self.condition:
+            now = time.monotonic()
+            queues = {}
+            for priority in PRIORITIES:
+                waiting = [submission for queue in self.queues[priority].values() for submission in queue]
+                queues[priority] = {
+                    "depth": len(waiting),
+                    "clients": len(self.queues[priority]),
+                    "oldest_wait_seconds": max((now - submission.queued for submission in waiting), default=0),
+                    "submitted": self.submitted[priority],
+                    "mean_wait_seconds": self.waited[priority] / self.submitted[priority] if self.submitted[priority] else 0,
+                    "max_wait_seconds": self.longest_wait[priority],
+                }
+            return {"outstanding": len(self.outstanding), "max_outstanding": self.max_outstanding,
+                    "tokens": round(self.tokens, 2), "queues": queues}
+
+def progress_value(progress) -> int:
+    """
+    AppEEARS reports progress either as a number or as {"summary": n, "details": [...]}.
+    """
+    if isinstance(progress, dict):
+        progress = progress.get('summary', 0)
+    try:
+        return int(progress or 0)
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,130 @@
+import math
+import threading
+from collections import OrderedDict
+
+KM_PER_DEGREE = 111.32
+
+class PixelIndex:
+    """
+    In-memory grid hash of the pixels this process has fetched or read from the cache,
+    so a lookup near an already known pixel is answered without Elasticsearch. Every
+    pixel keeps, per year, the cache key and file of its tile; a tile is forgotten when
+    the cache evicts its file, and the least recently used pixels are dropped beyond
+    `capacity`.
+    Args:
+    - capacity (int)       : pixels kept in the index
+    - cell_degrees (float) : side of a grid cell; about the pixel size keeps cells small
+    """
+    def __init__(self, capacity: int = 100_000, cell_degrees: float = 0.01):
+        self.capacity     = capacity
+        self.cell_degrees = cell_degrees
+        self.lock         = threading.Lock()
+        self.pixels       = OrderedDict() # pixel key -> (latitude, longitude, {year: (cache key, file path)})
+        self.cells        = {}            # (row, column) -> set of pixel keys
+        self.files        = {}            # file path -> set of (pixel key, year)
+        self.hits         = 0
+        self.misses       = 0
+
+    def _cell(self, latitude: float, longitude: float) -> tuple:
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    def add(self, pixel: str, latitude: float, longitude: float, year: int, key: str, file_path: str) -> None:
+        """
+        Records that the tile of `pixel` for `year` is cached under `key` in `file_path`.
+        """
+        with self.lock:
+            entry = self.pixels.get(pixel)
+            if entry is None:
+                entry = (latitude, longitude, {})
+                self.pixels[pixel] = entry
+                self.cells.setdefault(self._cell(latitude, longitude), set()).add(pixel)
+            self.pixels.move_to_end(pixel)
+            old = entry[2].get(year)
+            if old is not None:
+                self._unlink_file(old[1], pixel, year)
+            entry[2][year] = (key, file_path)
+            self.files.setdefault(file_path, set()).add((pixel, year))
+            while len(self.pixels) > self.capacity:
+                self._remove_pixel(next(iter(self.pixels)))
+
+    def _unlink_file(self, file_path: str, pixel: str, year: int) -> None:
+        users = self.files.get(file_path)
+        if users is not None:
+            users.discard((pixel, year))
+            if not users:
+                del self.files[file_path]
+
+    def _remove_pixel(self, pixel: str) -> None:
+        latitude, longitude, years = self.pixels.pop(pixel)
+        for year, (_, file_path) in years.items():
+            self._unlink_file(file_path, pixel, year)
+        cell = self._cell(latitude, longitude)
+        self.cells[cell].discard(pixel)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def discard_file(self, file_path: str) -> None:
+        """
+        Forgets every tile stored in a file, e.g. when the cache evicted it.
+        """
+        with self.lock:
+            for pixel, year in self.files.pop(file_path, set()):
+                entry = self.pixels.get(pixel)
+                if entry is None:
+                    continue
+                entry[2].pop(year, None)
+                if not entry[2]:
+                    self._remove_pixel(pixel)
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> list:
+        """
+        Purpose:
+            Pixels within radius_km of a coordinate, nearest first, from the grid cells
+            the radius overlaps.
+
+        Returns:
+            list of (distance in km, pixel key, {year: (cache key, file path)})
+        """
+        with self.lock:
+            return self._within(latitude, longitude, radius_km)
+
+    def _within(self, latitude: float, longitude: float, radius_km: float) -> list:
+        lat_cells = math.ceil(radius_km / KM_PER_DEGREE / self.cell_degrees)
+        lon_km = KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6)
+        lon_cells = math.ceil(radius_km / lon_km / self.cell_degrees)
+        row, column = self._cell(latitude, longitude)
+        found = []
+        for r in range(row - lat_cells, row + lat_cells + 1):
+            for c in range(column - lon_cells, column + lon_cells + 1):
+                for pixel in self.cells.get((r, c), ()):
+                    pixel_lat, pixel_lon, years = self.pixels[pixel]
+                    distance = math.hypot((pixel_lat - latitude) * KM_PER_DEGREE, (pixel_lon - longitude) * lon_km)
+                    if distance <= radius_km:
+                        found.append((distance, pixel, dict(years)))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def nearest(self, latitude: float, longitude: float, radius_km: float):
+        """
+        Nearest pixel within radius_km as (distance, pixel key, years), None if there is none.
+        The search and the LRU promotion share one lock hold, so an eviction cannot drop
+        the pixel in between.
+        """
+        with self.lock:
+            found = self._within(latitude, longitude, radius_km)
+            if found:
+                self.hits += 1
+                self.pixels.move_to_end(found[0][1])
+            else:
+                self.misses += 1
+        return found[0] if found else None
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "pixels": len(self.pixels),
+                "tiles": sum(len(users) for users in self.files.values()),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
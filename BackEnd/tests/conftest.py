@@ -0,0 +1,15 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+# the backend modules import each other by their bare names, as when the app is run from BackEnd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope="session")
+def backend(tmp_path_factory):
+    # the app keeps its cache, queue, index and baseline files relative to the working
+    # directory, and its background threads keep using it, so it is not changed back
+    os.chdir(tmp_path_factory.mktemp("backend"))
+    return importlib.import_module("app")
@@ -0,0 +1,87 @@
+import json
+import threading
+from concurrent.futures import Future
+
+import pandas as pd
+import pytest
+
+from tools import year_tiles
+
+def test_stream_tiles_gives_up_on_an_evicted_tile(backend, tmp_path, monkeypatch):
+    opened = []
+    def tracked_open(*args, **kwargs):
+        opened.append(open(*args, **kwargs))
+        return opened[-1]
+    monkeypatch.setattr(backend, "open", tracked_open, raising=False)
+    cached = tmp_path / "2020.csv"
+    cached.write_text("ID,Date,NDVI\np,2020-01-01,0.5\n")
+    tiles = year_tiles("01-01-2020", "12-31-2021")
+    tile_paths = {tiles[0]: str(cached), tiles[1]: str(tmp_path / "evicted.csv")}
+    assert backend.stream_tiles(tiles, tile_paths, "01-01-2020", "12-31-2021", "csv") is None
+    assert len(opened) == 1 and opened[0].closed
+    assert backend.stream_tiles(tiles, tile_paths, "01-01-2020", "12-31-2021", "ndjson") is None
+
+def test_stream_tiles_sends_a_single_cached_year_as_is(backend, tmp_path):
+    cached = tmp_path / "2020.csv"
+    cached.write_text("ID,Date,NDVI\np,2020-01-01,0.5\n")
+    tiles = year_tiles("01-01-2020", "12-31-2020")
+    with backend.app.test_request_context():
+        response = backend.stream_tiles(tiles, {tiles[0]: str(cached)}, "01-01-2020", "12-31-2020", "csv")
+        response.direct_passthrough = False
+        assert response.get_data(as_text=True) == cached.read_text()
+        response.close()
+
+def test_batches_are_submitted_with_the_most_urgent_claim(backend):
+    backend.claim_points("k", ["a", "b"], "prefetch", None)
+    backend.claim_points("k", ["b"], "interactive", "client")
+    backend.claim_points("k", ["b"], "prefetch", None) # does not downgrade the interactive claim
+    assert backend.batch_submitter("k", {"a": None, "b": None}) == ("interactive", "client")
+    assert not any(key == "k" for key, _ in backend.point_submitters)
+
+def test_access_data_batch_answers_every_point(backend, monkeypatch):
+    submitted = []
+    def submit_tiles(input, tiles, priority, client):
+        submitted.append((input.lat, priority))
+        future = Future()
+        if float(input.lat) > 50: # AppEEARS task failed
+            result = None
+        else:
+            result = {tile: pd.DataFrame({"Date": pd.to_datetime(["2020-06-01"]), "NDVI": [0.5]}) for tile in tiles}
+        threading.Timer(0.1, future.set_result, [result]).start() # the task takes a while
+        return future
+    monkeypatch.setattr(backend, "submit_tiles", submit_tiles)
+    monkeypatch.setattr(backend, "elastic_msearch", lambda searches: [None] * len(searches))
+    client = backend.app.test_client()
+
+    def post(body):
+        response = client.post("/api/access_data/batch", json=body)
+        return response.status_code, {line["id"]: line for line in map(json.loads, response.get_data(as_text=True).splitlines())}
+
+    dates = {"date_start": "01-01-2020", "date_end": "12-31-2020"}
+    status, lines = post({**dates, "points": [{"id": "a", "latitude": 40.7128, "longitude": -74.006},
+                                              {"id": "same", "latitude": 40.7128, "longitude": -74.006},
+                                              {"id": "north", "latitude": 60.0, "longitude": 10.0}]})
+    assert status == 200 and set(lines) == {"a", "same", "north"}
+    assert lines["a"]["rows"] == lines["same"]["rows"] and lines["a"]["rows"][0]["NDVI"] == 0.5
+    assert lines["north"] == {"id": "north", "message": "Task failed or ended with error"}
+    assert len(submitted) == 2 and {priority for _, priority in submitted} == {"batch"} # a and same share one fetch
+
+    status, lines = post({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-74.006, 40.7128]},
+         "properties": {"id": "nyc", **dates}}]})
+    assert status == 200 and lines["nyc"]["rows"][0]["NDVI"] == 0.5
+
+    assert client.post("/api/access_data/batch", json={**dates, "points": [{"id": "x", "longitude": 1}]}).status_code == 400
+
+@pytest.mark.parametrize("query", [
+    "min_lat=41&min_lon=-75&max_lat=40&max_lon=-73", "min_lat=40&min_lon=-75&max_lat=41&max_lon=-73&precision=30",
+    "min_lat=40&min_lon=-75&max_lat=95&max_lon=-73", "latitude=91&longitude=0"])
+def test_ndvi_stats_rejects_bad_areas_before_searching(backend, query):
+    response = backend.app.test_client().get(f"/api/ndvi_stats?date_start=01-01-2020&date_end=12-31-2020&{query}")
+    assert response.status_code == 400
+
+def test_quality_filter_is_opt_in(backend):
+    # enabling it adds a layer to every task, and so changes every cache key
+    task = backend.make_task(backend.canonical_input(backend.input_parameters(40.7128, -74.006, "01-01-2020", "12-31-2020")))
+    assert not backend.quality_filter.enabled
+    assert [layer["layer"] for layer in task["params"]["layers"]] == [backend.NDVI_LAYER]
@@ -0,0 +1,12 @@
+from appeears import AppEEARSClient
+
+def retry_of(client):
+    return client.session.get_adapter("https://appeears.earthdatacloud.nasa.gov/api/").max_retries
+
+def test_task_submissions_are_not_resent_after_a_reply_or_read_error():
+    retry = retry_of(AppEEARSClient("https://appeears.earthdatacloud.nasa.gov/api/"))
+    assert retry.is_retry("GET", 503) and retry.is_retry("GET", 429)
+    assert not retry.is_retry("POST", 503) and not retry.is_retry("POST", 429)
+    assert not retry._is_method_retryable("POST") # read errors
+    assert retry._is_method_retryable("GET")
+    assert retry.connect == retry.total # connection errors are retried for POST too
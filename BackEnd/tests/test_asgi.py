@@ -0,0 +1,21 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+@pytest.fixture
+def asgi(backend):
+    return pytest.importorskip("asgi")
+
+class RejectingSubmissions:
+    def submit(self, task, priority, client):
+        future = Future()
+        future.set_result({"message": "Invalid coordinates"})
+        return future
+
+def test_a_rejected_task_fails_the_batch_cleanly(asgi, backend, monkeypatch):
+    monkeypatch.setattr(backend, "submissions", RejectingSubmissions())
+    input = backend.canonical_input(backend.input_parameters(40.7128, -74.006, "01-01-2020", "12-31-2020"))
+    tiles = backend.year_tiles(input.date_start, input.date_end)
+    points = {backend.point_id(input): (input, tiles)}
+    assert asyncio.run(asgi.run_point_batch("k", points)) == {}
@@ -0,0 +1,47 @@
+import os
+import time
+
+from cache_index import KEY_SUFFIX, CacheIndex
+
+def cached_file(directory, name, size):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as file:
+        file.write(b"x" * size)
+    return path
+
+def test_put_evicts_least_recently_used_files(tmp_path):
+    evicted = []
+    cache = CacheIndex(str(tmp_path), capacity_bytes=100, on_evict=evicted.append)
+    a, b, c = (cached_file(str(tmp_path), name, 40) for name in ("a.csv", "b.csv", "c.csv"))
+    cache.put("a", a, size=40)
+    cache.put("b", b, size=40)
+    assert cache.get("a") == a
+    assert cache.put("c", c, size=40) == [b]
+    assert not os.path.exists(b) and not os.path.exists(b + KEY_SUFFIX) and evicted == [b]
+    assert "b" not in cache and cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["size_bytes"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 80, 1, 1, 1)
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = CacheIndex(str(tmp_path), capacity_bytes=100, ttl=0.05)
+    path = cached_file(str(tmp_path), "a.csv", 10)
+    cache.put("a", path, size=10)
+    time.sleep(0.1)
+    assert cache.get("a") is None and not os.path.exists(path)
+    assert cache.stats()["expirations"] == 1
+
+def test_index_is_shared_and_rebuilt_from_sidecars(tmp_path):
+    path = cached_file(str(tmp_path), "a.csv", 10)
+    CacheIndex(str(tmp_path), capacity_bytes=100).put("a", path, size=10)
+    assert CacheIndex(str(tmp_path), capacity_bytes=100).get("a") == path # another process sees it
+
+    os.remove(os.path.join(str(tmp_path), "index.sqlite3"))
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(os.path.join(str(tmp_path), "index.sqlite3" + suffix)):
+            os.remove(os.path.join(str(tmp_path), "index.sqlite3" + suffix))
+    orphan = cached_file(str(tmp_path), "orphan.csv", 10)
+    os.utime(orphan, (time.time() - 3600, time.time() - 3600))
+    cache = CacheIndex(str(tmp_path), capacity_bytes=100)
+    assert cache.rebuild() == {"dropped": 0, "restored": 1, "removed": 1}
+    assert cache.get("a") == path and not os.path.exists(orphan)
+    assert cache.file_paths() == [path]
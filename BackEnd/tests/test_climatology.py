@@ -0,0 +1,95 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from climatology import (MIN_YEARS, BaselineBuilder, Climatology, MonthlySeries, monthly_climatology,
+                         seasonal_climatology)
+
+def series(pixel, years, value):
+    dates = pd.date_range(f"{years[0]}-01-01", f"{years[-1]}-12-01", freq="MS")
+    values = [value(date) for date in dates]
+    return pd.DataFrame({"pixel": pixel, "Date": dates, "NDVI": np.array(values, dtype=np.float32)})
+
+def test_monthly_climatology_statistics():
+    years = list(range(2011, 2021))
+    frame = pd.concat([series("a", years, lambda date: 0.1 * (date.year - 2010) / 10 + date.month / 100),
+                       series("b", years[:2], lambda date: 0.5)])
+    baseline = monthly_climatology(frame, "NDVI", "pixel")
+    assert list(baseline.pixels) == ["a", "b"] and baseline.years == (2011, 2020)
+    a = baseline.rows(["a"])[0]
+    np.testing.assert_allclose(baseline.mean[a, 0], np.mean([0.01 * k + 0.01 for k in range(1, 11)]), rtol=1e-5)
+    assert list(baseline.count[a]) == [10] * 12
+    assert list(baseline.count[baseline.rows(["b"])[0]]) == [2] * 12
+    assert (np.diff(baseline.percentiles[a, :, 0]) >= 0).all()
+
+def test_anomalies_z_and_unknown_pixels():
+    years = list(range(2011, 2021))
+    frame = series("a", years, lambda date: 0.5 + (0.02 if date.year % 2 else -0.02))
+    baseline = monthly_climatology(frame, "NDVI", "pixel")
+    scores = baseline.anomalies(["a", "a", "zz"], np.array(["2021-06-01", "2021-07-01", "2021-06-01"], dtype="datetime64[ns]"),
+                                [0.6, 0.5, 0.5])
+    assert abs(scores["z"][0] - 5) < 1e-3 and abs(scores["z"][1]) < 1e-3
+    assert scores["percentile"][0] == 90
+    assert scores.iloc[2].isna().all()
+
+def test_identical_years_have_no_z_score():
+    # float32 nanstd of 7 identical values is ~6e-8, not 0
+    baseline = monthly_climatology(series("a", list(range(2014, 2021)), lambda date: 0.7), "NDVI", "pixel")
+    scores = baseline.anomalies(["a"], np.array(["2021-03-01"], dtype="datetime64[ns]"), [0.7])
+    assert np.isnan(scores["z"][0])
+
+def test_too_few_years_have_no_z_score():
+    frame = series("a", list(range(2021 - MIN_YEARS, 2021)), lambda date: 0.5 + (date.year - 2000) / 1000)
+    baseline = monthly_climatology(frame, "NDVI", "pixel")
+    assert not np.isnan(baseline.anomalies(["a"], np.array(["2021-03-01"], dtype="datetime64[ns]"), [0.9])["z"][0])
+    short = monthly_climatology(frame[frame["Date"].dt.year > 2021 - MIN_YEARS], "NDVI", "pixel")
+    assert np.isnan(short.anomalies(["a"], np.array(["2021-03-01"], dtype="datetime64[ns]"), [0.9])["z"][0])
+
+def test_save_and_load_round_trip(tmp_path):
+    baseline = monthly_climatology(series("a", [2019, 2020], lambda date: 0.4), "NDVI", "pixel")
+    baseline.save(str(tmp_path / "baseline.npz"))
+    loaded = Climatology.load(str(tmp_path / "baseline.npz"))
+    assert list(loaded.pixels) == ["a"] and loaded.years == (2019, 2020) and loaded.levels == baseline.levels
+    np.testing.assert_array_equal(loaded.mean, baseline.mean)
+    assert Climatology.load(str(tmp_path / "missing.npz")) is None
+
+def test_builder_loads_fresh_baseline_instead_of_building(tmp_path):
+    path = str(tmp_path / "baseline.npz")
+    monthly_climatology(series("a", [2019, 2020], lambda date: 0.4), "NDVI", "pixel").save(path)
+    builder = BaselineBuilder(lambda: (_ for _ in ()).throw(AssertionError("built")), path)
+    builder._refresh()
+    assert builder.stats()["pixels"] == 1 and builder.stats()["builds"] == 0
+
+def test_series_folded_in_chunks_builds_the_same_baseline():
+    years = list(range(2011, 2021))
+    frame = pd.concat([series("a", years, lambda date: 0.3 + date.year % 3 / 10 + date.month / 100),
+                       series("b", years, lambda date: 0.2 + date.year % 4 / 20)], ignore_index=True)
+    folded = MonthlySeries()
+    for start in range(0, len(frame), 7): # chunks that split years and pixels
+        folded.add(frame.iloc[start:start + 7], "NDVI", "pixel")
+    assert len(folded) == 20 and folded.observations == len(frame)
+    whole = monthly_climatology(frame, "NDVI", "pixel")
+    rebuilt = seasonal_climatology(*folded.matrix())
+    assert list(rebuilt.pixels) == list(whole.pixels) and rebuilt.years == whole.years
+    for name in ("mean", "std", "percentiles", "count"):
+        np.testing.assert_allclose(getattr(rebuilt, name), getattr(whole, name), rtol=1e-6)
+
+def test_first_source_wins_for_a_month_seen_twice():
+    folded = MonthlySeries()
+    folded.add(series("a", [2020], lambda date: 0.4), "NDVI", "pixel")
+    folded.add(series("a", [2020], lambda date: 0.9), "NDVI", "pixel")
+    folded.add(None, "NDVI", "pixel")
+    ids, years, values = folded.matrix()
+    assert list(ids) == ["a"] and list(years) == [2020] and np.allclose(values, 0.4)
+
+def test_started_builder_builds_before_the_first_lookup(tmp_path):
+    folded = MonthlySeries()
+    folded.add(series("a", [2019, 2020], lambda date: 0.4), "NDVI", "pixel")
+    builder = BaselineBuilder(lambda: folded, str(tmp_path / "baseline.npz"))
+    assert builder.current() is None
+    builder.start()
+    deadline = time.monotonic() + 5
+    while builder.current() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert list(builder.current().pixels) == ["a"] and builder.stats()["builds"] == 1
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from columnar import COLUMNS_SUFFIX, frame_csv, frame_records, load_columns, read_csv, read_tile, write_columns
+
+CSV = """ID,Latitude,Longitude,Date,MOD13A3_061__1_km_monthly_NDVI,MOD13A3_061__1_km_monthly_VI_Quality,MODIS_Tile
+p1,40.7125,-74.005833,2020-01-01,0.2512,2116,h12v04
+p1,40.7125,-74.005833,2020-02-01,,,h12v04
+p2,41.5,-73.9,2020-01-01,0.6,4,h12v04
+"""
+NDVI = "MOD13A3_061__1_km_monthly_NDVI"
+
+def cached_csv(tmp_path):
+    path = tmp_path / "tile.csv"
+    path.write_text(CSV)
+    return str(path)
+
+def test_read_csv_types_every_column(tmp_path):
+    frame = read_csv(cached_csv(tmp_path))
+    assert frame[NDVI].dtype == np.float32 and np.isnan(frame[NDVI][1])
+    assert frame["Latitude"].dtype == np.float64
+    assert frame["Date"].dtype.kind == "M"
+    assert isinstance(frame["ID"].dtype, pd.CategoricalDtype)
+    assert frame["MOD13A3_061__1_km_monthly_VI_Quality"].dtype == np.float32 # uint16 with a gap keeps NaN
+
+def test_columnar_round_trip_memory_maps_numeric_columns(tmp_path):
+    path = cached_csv(tmp_path)
+    frame = read_csv(path)
+    columns_path = write_columns(frame, path)
+    assert columns_path == path + COLUMNS_SUFFIX
+    loaded = load_columns(columns_path)
+    pd.testing.assert_frame_equal(loaded, frame, check_categorical=False)
+    assert list(load_columns(columns_path, ["Date", NDVI]).columns) == ["Date", NDVI]
+
+def test_read_tile_builds_the_columnar_copy_once(tmp_path):
+    path = cached_csv(tmp_path)
+    assert not os.path.exists(path + COLUMNS_SUFFIX)
+    first = read_tile(path, ["ID", NDVI])
+    assert os.path.exists(path + COLUMNS_SUFFIX) and list(first.columns) == ["ID", NDVI]
+    os.remove(path)
+    assert list(read_tile(path)["ID"]) == ["p1", "p1", "p2"] # served from the columnar copy
+    os.remove(path + COLUMNS_SUFFIX)
+    assert read_tile(path) is None
+
+def test_read_tile_rebuilds_a_corrupt_columnar_copy(tmp_path):
+    path = cached_csv(tmp_path)
+    with open(path + COLUMNS_SUFFIX, "wb") as file:
+        file.write(b"not a zip")
+    assert len(read_tile(path)) == 3
+    assert len(load_columns(path + COLUMNS_SUFFIX)) == 3
+
+def test_serialization_formats_dates_and_missing_values(tmp_path):
+    frame = read_csv(cached_csv(tmp_path))
+    records = frame_records(frame)
+    assert records[0]["Date"] == "2020-01-01" and records[1][NDVI] is None
+    assert frame_csv(frame).splitlines()[0] == CSV.splitlines()[0]
@@ -0,0 +1,70 @@
+import hashlib
+import os
+import time
+
+import pytest
+
+from downloads import PART_SUFFIX, BundleDownloader, DownloadError, sweep
+
+class FakeResponse:
+    def __init__(self, status_code, body=b""):
+        self.status_code = status_code
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+class FakeClient:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.ranges = []
+
+    def get(self, url, stream=True, headers=None):
+        self.ranges.append((headers or {}).get("Range"))
+        offset = int(self.ranges[-1][6:-1]) if self.ranges[-1] else 0
+        return FakeResponse(206 if offset else self.status_code, self.body[offset:])
+
+def entry(body, **extra):
+    return {"file_id": "f1", "file_name": "extract.csv", "file_size": len(body),
+            "sha256": hashlib.sha256(body).hexdigest(), **extra}
+
+def test_download_verifies_and_renames(tmp_path):
+    body = b"ID,Date\n" * 1000
+    path = BundleDownloader(FakeClient(body), backoff=0).download("t1", [entry(body)], str(tmp_path))["f1"]
+    assert path == str(tmp_path / "f1.csv")
+    assert open(path, "rb").read() == body
+    assert not os.path.exists(path + PART_SUFFIX)
+
+def test_download_resumes_a_partial_file(tmp_path):
+    body = b"0123456789" * 100
+    (tmp_path / f"f1.csv{PART_SUFFIX}").write_bytes(body[:300])
+    client = FakeClient(body)
+    downloader = BundleDownloader(client, backoff=0)
+    downloader.download("t1", [entry(body)], str(tmp_path))
+    assert client.ranges == ["bytes=300-"]
+    assert downloader.stats()["resumed"] == 1
+
+def test_failed_download_leaves_no_part_file(tmp_path):
+    downloader = BundleDownloader(FakeClient(b"", status_code=500), attempts=2, backoff=0)
+    with pytest.raises(DownloadError):
+        downloader.download("t1", [entry(b"abc")], str(tmp_path))
+    assert os.listdir(tmp_path) == []
+    assert downloader.stats()["failed"] == 1
+
+def test_sweep_removes_old_files_it_is_not_told_to_keep(tmp_path):
+    old = time.time() - 3600
+    for name in ("stale.csv", "stale.csv.part", "queued.csv", "fresh.csv"):
+        (tmp_path / name).write_text("x")
+        if name != "fresh.csv":
+            os.utime(tmp_path / name, (old, old))
+    assert sweep(str(tmp_path), keep={str(tmp_path / "queued.csv")}, grace=600) == 2
+    assert sorted(os.listdir(tmp_path)) == ["fresh.csv", "queued.csv"]
+    assert sweep(str(tmp_path / "missing")) == 0
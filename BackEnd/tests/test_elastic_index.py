@@ -0,0 +1,38 @@
+from collections import Counter
+
+import pytest
+
+from elastic_index import SEASON_FIELD, SEASON_RUNTIME_MAPPINGS, SEASONS, indices_for_range, season_months, season_start
+
+def test_indices_for_range_touches_each_year_once():
+    assert indices_for_range("2019-12-01", "2021-01-31").split(",") == ["ndvi-v1-2019", "ndvi-v1-2020", "ndvi-v1-2021"]
+
+@pytest.mark.parametrize("date, start", [
+    ("2021-01-15", "2020-12-01"), ("2021-02-01", "2020-12-01"), ("2021-03-01", "2021-03-01"),
+    ("2021-05-31", "2021-03-01"), ("2021-06-01", "2021-06-01"), ("2021-08-01", "2021-06-01"),
+    ("2021-09-01", "2021-09-01"), ("2021-11-30", "2021-09-01"), ("2021-12-01", "2021-12-01"),
+])
+def test_season_start_uses_meteorological_seasons(date, start):
+    assert season_start(date) == start
+
+def test_seasons_cover_every_month_exactly_once():
+    months = [f"{year}-{month:02d}" for year in (2020, 2021) for month in range(1, 13)]
+    buckets = Counter(season_start(f"{month}-01") for month in months)
+    covered = []
+    for start in sorted(buckets):
+        name, season = season_months(start)
+        assert name == SEASONS[int(start[5:7])]
+        assert [month for month in months if season_start(f"{month}-01") == start] == \
+               [month for month in season if month in months]
+        covered.extend(month for month in season if month in months)
+    assert sorted(covered) == months
+    assert season_months("2020-12-01") == ("DJF", ["2020-12", "2021-01", "2021-02"])
+
+@pytest.mark.parametrize("start", ["2021-01-01", "2021-04-01", "2021-03-15"])
+def test_season_months_rejects_dates_that_open_no_season(start):
+    with pytest.raises(ValueError):
+        season_months(start)
+
+def test_season_runtime_field_is_a_date():
+    assert SEASON_RUNTIME_MAPPINGS[SEASON_FIELD]["type"] == "date"
+    assert "% 3" in SEASON_RUNTIME_MAPPINGS[SEASON_FIELD]["script"]["source"]
@@ -0,0 +1,112 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+from ingest import QUEUED, RUNNING, SCHEMA, IngestQueue
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+def insert(path, payload, state, owner):
+    with sqlite3.connect(path) as db:
+        db.executescript(SCHEMA)
+        db.execute("INSERT INTO jobs(payload, state, owner, enqueued_at) VALUES (?, ?, ?, ?)",
+                   (json.dumps(payload), state, owner, time.time()))
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def test_jobs_run_on_workers_and_leave_the_table(tmp_path):
+    done = []
+    queue = IngestQueue(str(tmp_path / "queue.sqlite3"), done.append, workers=2)
+    ids = [queue.put({"n": n}) for n in range(5)]
+    wait_for(lambda: len(done) == 5)
+    assert sorted(job["n"] for job in done) == list(range(5))
+    assert queue.drain(timeout=5)
+    assert queue.unfinished(ids) == set() and queue.stats()["processed"] == 5
+
+def test_full_queue_pushes_back_then_runs_inline(tmp_path):
+    release, done = threading.Event(), []
+    def handler(payload):
+        release.wait(5)
+        done.append(payload["n"])
+    queue = IngestQueue(str(tmp_path / "queue.sqlite3"), handler, workers=1, max_pending=1, block_timeout=0.2)
+    first = queue.put({"n": 0})
+    wait_for(lambda: queue.stats()["running"] == 1)
+    second = queue.put({"n": 1})
+    assert queue.unfinished([first, second]) == {first, second}
+    started = time.monotonic()
+    release.set()
+    assert queue.put({"n": 2}) in (None, second + 1)
+    assert time.monotonic() - started < 5
+    assert queue.drain(timeout=5) and sorted(done) == [0, 1, 2]
+
+def test_backpressure_runs_the_job_on_the_caller_after_the_timeout(tmp_path):
+    done = []
+    queue = IngestQueue(str(tmp_path / "queue.sqlite3"), done.append, workers=0, max_pending=1, block_timeout=0.1)
+    assert queue.put({"n": 0}) is not None
+    assert queue.put({"n": 1}) is None
+    assert done == [{"n": 1}] and queue.stats()["inline"] == 1
+
+def test_failing_job_is_retried_then_given_up(tmp_path):
+    attempts, given_up = [], []
+    def handler(payload):
+        attempts.append(payload)
+        raise RuntimeError("broken bundle")
+    queue = IngestQueue(str(tmp_path / "queue.sqlite3"), handler, max_attempts=3, on_failed=given_up.append)
+    id = queue.put({"files": ["a.npz"]})
+    wait_for(lambda: given_up)
+    assert len(attempts) == 3 and given_up == [{"files": ["a.npz"]}]
+    assert queue.unfinished([id]) == set() and queue.payloads() == []
+    assert queue.stats()["failed_jobs"] == 1
+    queue.drain(timeout=1)
+
+def test_jobs_of_a_dead_process_are_replayed(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    insert(path, {"n": "orphan"}, RUNNING, dead_pid())
+    insert(path, {"n": "queued"}, QUEUED, None)
+    done = []
+    queue = IngestQueue(path, done.append)
+    assert queue.stats()["replayed"] == 1
+    queue.start()
+    wait_for(lambda: len(done) == 2)
+    assert queue.drain(timeout=5)
+
+def test_jobs_owned_by_a_reused_pid_are_replayed(tmp_path):
+    # after a container restart the new process has the same PID as the one that died
+    path = str(tmp_path / "queue.sqlite3")
+    insert(path, {"n": "orphan"}, RUNNING, os.getpid())
+    done = []
+    queue = IngestQueue(path, done.append)
+    assert queue.stats()["replayed"] == 1
+    queue.start()
+    wait_for(lambda: done == [{"n": "orphan"}])
+    queue.drain(timeout=5)
+
+def test_jobs_of_a_live_process_are_left_alone(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    insert(path, {"n": "busy"}, RUNNING, os.getppid())
+    queue = IngestQueue(path, lambda payload: None)
+    assert queue.stats()["replayed"] == 0 and queue.stats()["running"] == 1
+    assert queue.payloads() == [{"n": "busy"}]
+
+def test_drain_leaves_unstarted_jobs_for_the_next_start(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = IngestQueue(path, lambda payload: None, workers=0)
+    queue.put({"n": 0})
+    assert not queue.drain(timeout=0.1)
+    assert queue.drain() is False
+    done = []
+    restarted = IngestQueue(path, done.append)
+    restarted.start()
+    wait_for(lambda: done == [{"n": 0}])
+    restarted.drain(timeout=5)
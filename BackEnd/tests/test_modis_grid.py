@@ -0,0 +1,32 @@
+import math
+
+import pytest
+
+from modis_grid import GRID_X_MIN, GRID_Y_MAX, PIXEL_SIZE_M, snap_to_pixel
+
+EARTH_RADIUS_M = 6371007.181 # sphere of the MODIS sinusoidal projection
+
+@pytest.mark.parametrize("latitude, longitude, tile, line, sample", [
+    (40.7128, -74.0060, "h12v04", 1114, 468),   # New York
+    (-33.8688, 151.2093, "h30v12", 464, 666),  # Sydney
+    (0.0005, 0.0005, "h18v08", 1199, 0),       # just north east of the grid's origin
+])
+def test_known_coordinates_snap_to_their_pixel(latitude, longitude, tile, line, sample):
+    pixel = snap_to_pixel(latitude, longitude)
+    assert (pixel.tile, pixel.line, pixel.sample) == (tile, line, sample)
+    assert pixel.pixel_id == f"{tile}_{line:04d}_{sample:04d}"
+
+@pytest.mark.parametrize("latitude, longitude", [(40.7128, -74.0060), (-33.8688, 151.2093), (64.1, -21.9), (-0.5, 36.8)])
+def test_pixel_matches_the_closed_form_sinusoidal_projection(latitude, longitude):
+    x = EARTH_RADIUS_M * math.radians(longitude) * math.cos(math.radians(latitude))
+    y = EARTH_RADIUS_M * math.radians(latitude)
+    column, row = math.floor((x - GRID_X_MIN) / PIXEL_SIZE_M), math.floor((GRID_Y_MAX - y) / PIXEL_SIZE_M)
+    pixel = snap_to_pixel(latitude, longitude)
+    assert (int(pixel.tile[1:3]) * 1200 + pixel.sample, int(pixel.tile[4:6]) * 1200 + pixel.line) == (column, row)
+
+def test_points_inside_one_pixel_share_its_id_and_center():
+    pixel = snap_to_pixel(40.7128, -74.0060)
+    nearby = snap_to_pixel(float(pixel.latitude) + 0.002, float(pixel.longitude) - 0.002) # ~200 m from the center
+    assert nearby == pixel
+    assert snap_to_pixel(pixel.latitude, pixel.longitude) == pixel # strings, and the center snaps to itself
+    assert snap_to_pixel(float(pixel.latitude) + 0.009, pixel.longitude).line == pixel.line - 1 # ~1 km north
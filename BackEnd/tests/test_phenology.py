@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from phenology import MONTHS, season_matrix, season_metrics, smooth
+
+def moving_average(row, window):
+    half = window // 2
+    out = []
+    for month in range(MONTHS):
+        values = [v for v in row[max(month - half, 0):month - half + window] if not np.isnan(v)]
+        out.append(np.mean(values) if values else np.nan)
+    return np.array(out)
+
+def seasons(values_by_point, year=2021):
+    rows = []
+    for point, values in values_by_point.items():
+        for month, value in enumerate(values, start=1):
+            rows.append({"ID": point, "Date": pd.Timestamp(year, month, 1), "NDVI": value})
+    return pd.DataFrame(rows)
+
+@pytest.mark.parametrize("window", [1, 2, 3, 4, 5, 6, 12])
+def test_smooth_matches_centered_moving_average(window):
+    values = np.random.default_rng(window).random((3, MONTHS)).astype(np.float32)
+    values[1, [0, 4, 5]] = np.nan
+    smoothed = smooth(values, window)
+    assert smoothed.shape == values.shape
+    for row, expected in zip(smoothed, values):
+        np.testing.assert_allclose(row, moving_average(expected, window), rtol=1e-5)
+
+def test_smooth_all_missing_stays_missing():
+    assert np.isnan(smooth(np.full((1, MONTHS), np.nan, dtype=np.float32), 4)).all()
+
+@pytest.mark.parametrize("window", [0, -3])
+def test_smooth_rejects_empty_window(window):
+    with pytest.raises(ValueError):
+        smooth(np.zeros((1, MONTHS), dtype=np.float32), window)
+
+def test_season_matrix_lays_out_points_and_years():
+    frame = pd.concat([seasons({"a": [0.1] * 12}, 2020), seasons({"a": [0.2] * 12, "b": [0.3] * 12}, 2021)])
+    ids, years, values = season_matrix(frame, "NDVI")
+    assert list(ids) == ["a", "a", "b"] and list(years) == [2020, 2021, 2021]
+    np.testing.assert_allclose(values[:, 0], [0.1, 0.2, 0.3])
+
+def test_season_matrix_masks_fill_values():
+    _, _, values = season_matrix(seasons({"a": [-0.3] + [0.5] * 11}), "NDVI")
+    assert np.isnan(values[0, 0]) and not np.isnan(values[0, 1:]).any()
+
+@pytest.mark.parametrize("window", [1, 2, 3, 4])
+def test_season_metrics_finds_spring_onset(window):
+    bell = [0.2, 0.2, 0.25, 0.4, 0.6, 0.8, 0.8, 0.6, 0.4, 0.25, 0.2, 0.2]
+    metrics = season_metrics(seasons({"a": bell}), "NDVI", window=window)
+    row = metrics.iloc[0]
+    assert row["start_of_season"].month in (3, 4, 5)
+    assert row["peak"].month in (6, 7)
+    assert row["end_of_season"].month in (8, 9, 10)
+    assert row["start_of_season"] < row["peak"] < row["end_of_season"]
+
+def test_season_metrics_derivative_method():
+    bell = [0.2, 0.2, 0.25, 0.4, 0.6, 0.8, 0.8, 0.6, 0.4, 0.25, 0.2, 0.2]
+    row = season_metrics(seasons({"a": bell}), "NDVI", method="derivative", window=1).iloc[0]
+    assert row["start_of_season"].month == 4 and row["end_of_season"].month == 8
+
+def test_season_metrics_flat_and_sparse_seasons_have_no_onset():
+    frame = seasons({"flat": [0.5] * 12, "sparse": [0.2, 0.8] + [np.nan] * 10})
+    metrics = season_metrics(frame, "NDVI")
+    assert metrics["start_of_season"].isna().all()
+    assert list(metrics["observations"]) == [12, 2]
+
+@pytest.mark.parametrize("arguments", [{"method": "spline"}, {"threshold": 1.5}, {"threshold": -0.1}, {"window": 0}])
+def test_season_metrics_rejects_bad_arguments(arguments):
+    with pytest.raises(ValueError):
+        season_metrics(seasons({"a": [0.5] * 12}), "NDVI", **arguments)
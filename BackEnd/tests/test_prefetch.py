@@ -0,0 +1,43 @@
+import time
+
+from prefetch import PopularityTracker, Prefetcher
+
+def test_tracker_ranks_pixels_and_widens_their_ranges(tmp_path):
+    tracker = PopularityTracker(str(tmp_path / "popularity.sqlite3"))
+    for _ in range(3):
+        tracker.record("hot", 40.7, -74.0, "03-01-2021", "06-30-2021")
+    tracker.record("hot", 40.7, -74.0, "01-01-2020", "02-01-2021")
+    tracker.record("cold", 41.0, -73.0, "01-01-2021", "12-31-2021")
+    assert tracker.flush() == 2 and tracker.flush() == 0
+    top = tracker.top(5)
+    assert [entry["key"] for entry in top] == ["hot", "cold"]
+    assert (top[0]["date_start"], top[0]["date_end"], top[0]["requests"]) == ("01-01-2020", "06-30-2021", 4)
+    assert tracker.stats() == {"recorded": 5, "pending": 0, "tracked": 2}
+
+def test_scores_decay_and_the_table_is_trimmed(tmp_path):
+    tracker = PopularityTracker(str(tmp_path / "popularity.sqlite3"), half_life=0.05, max_entries=1)
+    tracker.record("old", 1, 1, "01-01-2021", "12-31-2021")
+    tracker.record("old", 1, 1, "01-01-2021", "12-31-2021")
+    tracker.flush()
+    time.sleep(0.25) # five half-lives: 2 requests are worth less than 1 now
+    tracker.record("new", 2, 2, "01-01-2021", "12-31-2021")
+    tracker.flush()
+    assert [entry["key"] for entry in tracker.top(5)] == ["new"]
+
+def test_one_claim_per_interval_across_processes(tmp_path):
+    path = str(tmp_path / "popularity.sqlite3")
+    first, second = PopularityTracker(path), PopularityTracker(path)
+    assert first.claim("prefetch", 60) and not second.claim("prefetch", 60)
+    assert second.claim("prefetch", 0)
+
+def test_prefetch_cycle_refreshes_the_top_entries(tmp_path):
+    tracker = PopularityTracker(str(tmp_path / "popularity.sqlite3"))
+    tracker.record("hot", 40.7, -74.0, "01-01-2021", "12-31-2021")
+    tracker.flush()
+    refreshed = []
+    prefetcher = Prefetcher(tracker, lambda entries, budget: refreshed.append((entries, budget)) or (1, len(entries)),
+                            top_n=10, task_budget=3)
+    prefetcher.run_cycle()
+    assert [entry["key"] for entry in refreshed[0][0]] == ["hot"] and refreshed[0][1] == 3
+    stats = prefetcher.stats()
+    assert (stats["cycles"], stats["tasks"], stats["points"]) == (1, 1, 1)
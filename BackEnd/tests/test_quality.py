@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from quality import QualityFilter, decode
+
+NDVI, QUALITY = "NDVI", "VI_Quality"
+
+def bits(modland=0, usefulness=0, aerosol=1, mixed_clouds=0, land_water=1, snow_ice=0, shadow=0):
+    return modland | usefulness << 2 | aerosol << 6 | mixed_clouds << 10 | land_water << 11 | snow_ice << 14 | shadow << 15
+
+def extract(*qualities):
+    return pd.DataFrame({NDVI: np.linspace(0.1, 0.9, len(qualities)).astype(np.float32),
+                         QUALITY: np.array(qualities, dtype=np.float32)})
+
+def test_decode_splits_the_bit_fields():
+    fields = decode(np.array([bits(modland=2, usefulness=5, aerosol=3, land_water=2, shadow=1), np.nan]))
+    assert (fields["modland"][0], fields["usefulness"][0], fields["aerosol"][0]) == (2, 5, 3)
+    assert (fields["land_water"][0], fields["shadow"][0], fields["snow_ice"][0]) == (2, 1, 0)
+    assert fields["modland"][1] == 0
+
+def test_good_applies_every_rule_and_passes_missing_quality():
+    quality = np.array([bits(), bits(modland=2), bits(usefulness=13), bits(aerosol=3), bits(mixed_clouds=1),
+                        bits(snow_ice=1), bits(shadow=1), bits(land_water=0), np.nan])
+    assert list(QualityFilter().good(quality)) == [True, False, False, False, False, False, False, True, True]
+    assert not QualityFilter(land_only=True).good(quality)[7]
+
+def test_mask_blanks_bad_values_and_counts_them():
+    quality_filter = QualityFilter("mask")
+    filtered = quality_filter.apply(extract(bits(), bits(snow_ice=1), bits()), [NDVI], QUALITY)
+    assert len(filtered) == 3 and np.isnan(filtered[NDVI][1]) and not filtered[NDVI][[0, 2]].isna().any()
+    assert quality_filter.stats() == {"action": "mask", "observations": 3, "rejected": 1}
+
+def test_drop_removes_bad_rows():
+    filtered = QualityFilter("drop").apply(extract(bits(modland=3), bits()), [NDVI], QUALITY)
+    assert len(filtered) == 1 and list(filtered.index) == [0]
+
+def test_off_and_frames_without_quality_pass_through():
+    frame = extract(bits(modland=3))
+    assert QualityFilter("off").apply(frame, [NDVI], QUALITY) is frame
+    assert QualityFilter().apply(frame[[NDVI]], [NDVI], QUALITY).equals(frame[[NDVI]])
+    with pytest.raises(ValueError):
+        QualityFilter("discard")
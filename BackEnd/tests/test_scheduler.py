@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import MicroBatcher, SubmissionScheduler, TaskPoller, progress_value
+
+def test_micro_batcher_merges_items_within_the_window():
+    batches = []
+    def run_batch(key, items):
+        batches.append((key, dict(items)))
+        return {id: f"{key}:{item}" for id, item in items.items()}
+    batcher = MicroBatcher(run_batch, window=0.1, max_batch=10)
+    futures = [batcher.submit("dates", id, id.upper()) for id in ("a", "b", "a")]
+    futures.append(batcher.submit("other", "c", "C"))
+    assert [future.result(2) for future in futures] == ["dates:A", "dates:B", "dates:A", "other:C"]
+    assert sorted(batches) == [("dates", {"a": "A", "b": "B"}), ("other", {"c": "C"})]
+    assert batcher.stats() == {"open_batches": 0, "batches": 2, "points": 3, "largest_batch": 2}
+
+def test_micro_batcher_flushes_a_full_batch_right_away():
+    flushed = threading.Event()
+    def run_batch(key, items):
+        flushed.set()
+        return {id: len(items) for id in items}
+    batcher = MicroBatcher(run_batch, window=60, max_batch=2)
+    first, second = batcher.submit("k", "a", 1), batcher.submit("k", "b", 2)
+    assert flushed.wait(2) and first.result(2) == second.result(2) == 2
+
+def test_micro_batcher_hands_failures_and_missing_results_to_every_waiter():
+    batcher = MicroBatcher(lambda key, items: {"a": 1}, window=0.05)
+    assert batcher.submit("k", "b", None).result(2) is None
+    def fail(key, items):
+        raise RuntimeError("AppEEARS is down")
+    failing = MicroBatcher(fail, window=0.05)
+    futures = [failing.submit("k", id, None) for id in ("a", "b")]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(2)
+
+def test_task_poller_resolves_a_task_once_it_is_done():
+    replies = iter([{"status": "queued"}, {"status": "processing", "progress": {"summary": 50}}, {"status": "done"}])
+    seen = []
+    poller = TaskPoller(lambda: None, lambda task_id: next(replies),
+                        on_status=lambda task_id, status, progress: seen.append((task_id, status, progress)),
+                        min_interval=0.01, max_interval=0.05, jitter=0)
+    assert poller.watch("t1").result(5) == "done"
+    assert seen == [("t1", "queued", 0), ("t1", "processing", 50), ("t1", "done", 0)]
+    assert poller.stats()["pending_tasks"] == 0
+
+def test_task_poller_answers_many_tasks_with_one_bulk_check():
+    bulk_calls = []
+    def check_bulk():
+        bulk_calls.append(1)
+        return {"t1": {"status": "done"}, "t2": {"status": "failed"}}
+    poller = TaskPoller(check_bulk, lambda task_id: pytest.fail("checked one by one"), min_interval=0.05, jitter=0)
+    watchers = [poller.watch("t1"), poller.watch("t2"), poller.watch("t1")]
+    assert [future.result(5) for future in watchers] == ["done", "failed", "done"]
+    assert poller.stats()["bulk_checks"] == len(bulk_calls) >= 1
+
+def test_task_poller_intervals_follow_progress_and_back_off_without_it():
+    poller = TaskPoller(lambda: None, lambda task_id: None, min_interval=1, max_interval=100, backoff=2, jitter=0)
+    poller.thread = threading.current_thread() # keep the background thread out of the test
+    poller.watch("t1")
+    watched = poller.tasks["t1"]
+    watched.checked -= 10
+    poller._update("t1", {"status": "processing", "progress": 50})
+    assert 4.9 <= watched.interval <= 5.1 # 5%/s leaves 10 s for the other 50%, checked halfway
+    interval = watched.interval
+    poller._update("t1", {"status": "processing", "progress": 50})
+    assert watched.interval == min(interval * 2, 100)
+
+def test_task_poller_gives_up_on_tasks_without_a_final_status():
+    seen = []
+    def check_one(task_id):
+        raise ConnectionError("status endpoint down")
+    poller = TaskPoller(lambda: None, check_one, on_status=lambda *update: seen.append(update),
+                        min_interval=0.01, max_interval=0.02, jitter=0, max_age=0.1)
+    assert poller.watch("t1").result(5) == "error"
+    assert seen == [("t1", "error", 0)] # lets the app release the task's submission slot
+    assert poller.stats()["pending_tasks"] == 0 and poller.stats()["expired"] == 1
+
+@pytest.mark.parametrize("progress, value", [(None, 0), (40, 40), ("75", 75), ({"summary": 20}, 20), ("n/a", 0)])
+def test_progress_value(progress, value):
+    assert progress_value(progress) == value
+
+def test_submission_scheduler_serves_priorities_first_and_clients_in_turn():
+    order = []
+    def submit(task):
+        order.append(task["name"])
+        return {"task_id": task["name"]}
+    scheduler = SubmissionScheduler(submit, rate=1000, burst=100, max_outstanding=1)
+    futures = [scheduler.submit({"name": "first"}, "interactive", "a")]
+    assert futures[0].result(2) == {"task_id": "first"} # holds the only slot until released
+    for name, priority, client in [("P0", "prefetch", None), ("A0", "batch", "a"), ("A1", "batch", "a"),
+                                   ("B0", "batch", "b"), ("I0", "interactive", "c")]:
+        futures.append(scheduler.submit({"name": name}, priority, client))
+    for submitted in range(2, len(futures) + 1):
+        scheduler.release(order[-1])
+        deadline = time.monotonic() + 2
+        while len(order) < submitted and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert all(future.result(2) for future in futures)
+    assert order == ["first", "I0", "A0", "B0", "A1", "P0"]
+    assert scheduler.stats()["queues"]["batch"]["submitted"] == 3
+
+def test_submission_scheduler_paces_submissions_with_its_token_bucket():
+    times = []
+    scheduler = SubmissionScheduler(lambda task: times.append(time.monotonic()) or {}, rate=20, burst=2)
+    futures = [scheduler.submit({}, "batch") for _ in range(6)]
+    for future in futures:
+        future.result(5)
+    assert times[1] - times[0] < 0.04 # the burst goes out back to back
+    assert times[-1] - times[0] >= 4 / 20 * 0.9 # the rest at the refill rate
+
+def test_submission_scheduler_reports_failures_and_rejects_unknown_priorities():
+    def submit(task):
+        raise RuntimeError("rejected")
+    scheduler = SubmissionScheduler(submit)
+    with pytest.raises(RuntimeError):
+        scheduler.submit({}, "interactive").result(2)
+    with pytest.raises(ValueError):
+        scheduler.submit({}, "urgent")
+    assert scheduler.stats()["outstanding"] == 0
@@ -0,0 +1,49 @@
+from spatial_index import PixelIndex
+
+def test_nearest_finds_pixels_within_the_radius():
+    index = PixelIndex(cell_degrees=0.01)
+    index.add("p1", 40.7125, -74.0058, 2020, "k2020", "a_2020.csv")
+    index.add("p1", 40.7125, -74.0058, 2021, "k2021", "a_2021.csv")
+    index.add("p2", 40.7300, -74.0058, 2020, "k", "b_2020.csv")
+    distance, pixel, years = index.nearest(40.7128, -74.0060, radius_km=0.5)
+    assert pixel == "p1" and distance < 0.1 and years == {2020: ("k2020", "a_2020.csv"), 2021: ("k2021", "a_2021.csv")}
+    assert [pixel for _, pixel, _ in index.within(40.7128, -74.0060, radius_km=5)] == ["p1", "p2"]
+    assert index.nearest(41.0, -74.0, radius_km=0.5) is None
+    assert (index.stats()["hits"], index.stats()["misses"]) == (1, 1)
+
+def test_evicted_files_and_old_pixels_are_forgotten():
+    index = PixelIndex(capacity=2)
+    index.add("p1", 10.0, 10.0, 2020, "k", "a.csv")
+    index.add("p1", 10.0, 10.0, 2021, "k", "shared.csv")
+    index.add("p2", 10.001, 10.0, 2021, "k", "shared.csv")
+    index.discard_file("shared.csv")
+    assert index.nearest(10.001, 10.0, 0.5)[1] == "p1" # p2 had no tile left
+    assert index.stats()["tiles"] == 1
+    index.add("p3", 20.0, 20.0, 2020, "k", "c.csv")
+    index.add("p4", 30.0, 30.0, 2020, "k", "d.csv")
+    assert index.stats()["pixels"] == 2 and index.nearest(10.0, 10.0, 0.5) is None
+
+class EvictAfterRelease:
+    """
+    Lock that runs `evict` the first time it is released, like a cache eviction that
+    gets the lock as soon as a lookup lets go of it.
+    """
+    def __init__(self, lock, evict):
+        self.inner, self.evict = lock, evict
+
+    def __enter__(self):
+        return self.inner.__enter__()
+
+    def __exit__(self, *exc):
+        self.inner.__exit__(*exc)
+        evict, self.evict = self.evict, None
+        if evict is not None:
+            evict()
+
+def test_eviction_during_a_lookup_does_not_break_it():
+    index = PixelIndex()
+    index.add("p1", 10.0, 10.0, 2020, "k", "a.csv")
+    index.lock = EvictAfterRelease(index.lock, lambda: index.discard_file("a.csv"))
+    distance, pixel, years = index.nearest(10.0, 10.0, 0.5)
+    assert pixel == "p1" and years == {2020: ("k", "a.csv")}
+    assert index.stats()["pixels"] == 0 and index.nearest(10.0, 10.0, 0.5) is None
@@ -0,0 +1,136 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from tools import (LRUCache, SingleFlight, input_parameters, merge_tiles, tile_year, validate_box, validate_input,
+                   year_tiles)
+
+def test_year_tiles_splits_range_into_calendar_years():
+    assert year_tiles("03-15-2019", "02-01-2021") == [
+        ("01-01-2019", "12-31-2019"), ("01-01-2020", "12-31-2020"), ("01-01-2021", "12-31-2021")]
+    assert year_tiles("01-01-2020", "12-31-2020") == [("01-01-2020", "12-31-2020")]
+
+@pytest.mark.parametrize("date_start, date_end", [("01-01-2022", "12-31-2021"), ("2020-01-01", "12-31-2021")])
+def test_year_tiles_rejects_malformed_ranges(date_start, date_end):
+    with pytest.raises(ValueError):
+        year_tiles(date_start, date_end)
+
+def test_merge_tiles_joins_consecutive_years_only():
+    tiles = year_tiles("01-01-2018", "12-31-2022")
+    assert merge_tiles([tiles[0], tiles[1], tiles[3], tiles[4]]) == [
+        {"startDate": "01-01-2018", "endDate": "12-31-2019"},
+        {"startDate": "01-01-2021", "endDate": "12-31-2022"}]
+    assert [tile_year(tile) for tile in tiles] == [2018, 2019, 2020, 2021, 2022]
+
+def test_validate_input_accepts_well_formed_input():
+    validate_input(input_parameters("40.7128", "-74.006", "01-01-2020", "12-31-2021"))
+    validate_input(input_parameters(40.7128, -74.006, None, None))
+
+@pytest.mark.parametrize("latitude, longitude, date_start, date_end", [
+    (None, "-74", "01-01-2020", "12-31-2021"),
+    ("north", "-74", "01-01-2020", "12-31-2021"),
+    ("91", "-74", "01-01-2020", "12-31-2021"),
+    ("nan", "-74", "01-01-2020", "12-31-2021"),
+    ("40", "-74", "13-45-2020", "12-31-2021"),
+    ("40", "-74", None, "12-31-2021"),
+    ("40", "-74", "01-01-2022", "12-31-2021"),
+])
+def test_validate_input_rejects_malformed_input(latitude, longitude, date_start, date_end):
+    with pytest.raises(ValueError):
+        validate_input(input_parameters(latitude, longitude, date_start, date_end))
+
+def test_lru_cache_evicts_least_recently_used_bytes():
+    evicted = []
+    cache = LRUCache(capacity_bytes=100, on_evict=lambda key, value: evicted.append(key))
+    cache.put("a", "A", size=40)
+    cache.put("b", "B", size=40)
+    assert cache.get("a") == "A" # b is now the oldest
+    assert cache.put("c", "C", size=40) == [("b", "B")]
+    assert "b" not in cache and cache.get("b") is None
+    assert evicted == ["b"]
+    assert cache.stats() == {"entries": 2, "size_bytes": 80, "capacity_bytes": 100, "hits": 1, "misses": 1,
+                             "evictions": 1, "expirations": 0}
+
+def test_lru_cache_rejects_entries_larger_than_the_budget():
+    cache = LRUCache(capacity_bytes=10)
+    assert cache.put("big", "B", size=11) == [("big", "B")]
+    assert len(cache) == 0
+
+def test_lru_cache_replaces_and_pops_without_notifying():
+    evicted = []
+    cache = LRUCache(capacity_bytes=100, on_evict=lambda key, value: evicted.append((key, value)))
+    cache.put("a", "old", size=10)
+    cache.put("a", "new", size=20)
+    assert evicted == [("a", "old")] and cache.stats()["size_bytes"] == 20
+    assert cache.pop("a") == "new" and cache.pop("a") is None
+    assert evicted == [("a", "old")]
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(capacity_bytes=100, ttl=0.05)
+    cache.put("a", "A", size=1)
+    cache.put("forever", "F", size=1, ttl=60)
+    time.sleep(0.1)
+    assert "a" not in cache and cache.get("a") is None and cache.get("forever") == "F"
+    assert cache.stats()["expirations"] == 1
+
+def test_single_flight_runs_concurrent_calls_once():
+    flight, calls, started, release = SingleFlight(), [], threading.Event(), threading.Event()
+    def fetch(task):
+        calls.append(task)
+        started.set()
+        release.wait(2)
+        return {"task_id": task}
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", fetch, "t1")))
+    leader.start()
+    started.wait(2)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("key", fetch, "t2"))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while flight.stats()["waiting"] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(2)
+    assert calls == ["t1"] and results == [{"task_id": "t1"}] * 4
+    assert flight.stats() == {"in_flight": 0, "waiting": 0, "executed": 1, "coalesced": 3}
+
+def test_single_flight_submit_joins_calls_without_blocking():
+    flight, started, results = SingleFlight(), [], []
+    def start(task):
+        started.append((task, Future()))
+        return started[-1][1]
+    first, second = flight.submit("key", start, "t1"), flight.submit("key", start, "t2")
+    follower = threading.Thread(target=lambda: results.append(flight.do("key", start, "t3")))
+    follower.start()
+    while flight.stats()["waiting"] < 2:
+        time.sleep(0.01)
+    assert first is second and not first.done() and [task for task, _ in started] == ["t1"]
+    started[0][1].set_result({"task_id": "t1"})
+    follower.join(2)
+    assert first.result(2) == {"task_id": "t1"} and results == [{"task_id": "t1"}]
+    assert flight.stats() == {"in_flight": 0, "waiting": 0, "executed": 1, "coalesced": 2}
+    assert isinstance(flight.submit("key", lambda: 1 / 0).exception(2), ZeroDivisionError)
+
+def test_single_flight_shares_errors_and_runs_again_afterwards():
+    flight = SingleFlight()
+    def fail():
+        raise RuntimeError("AppEEARS is down")
+    with pytest.raises(RuntimeError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: 42) == 42
+    assert flight.stats()["executed"] == 2
+
+def test_validate_box_accepts_a_box_and_zoom_level():
+    validate_box(40.0, -75.0, 41.0, -73.0, 0)
+    validate_box(-90, -180, 90, 180, 29)
+
+@pytest.mark.parametrize("min_lat, min_lon, max_lat, max_lon, precision", [
+    (41.0, -75.0, 40.0, -73.0, 10), (40.0, -73.0, 41.0, -75.0, 10), (40.0, -75.0, 40.0, -73.0, 10),
+    (-91.0, -75.0, 41.0, -73.0, 10), (40.0, -75.0, 41.0, 181.0, 10), (40.0, -75.0, 41.0, -73.0, 30),
+    (40.0, -75.0, 41.0, -73.0, -1)])
+def test_validate_box_rejects_boxes_elasticsearch_would_refuse(min_lat, min_lon, max_lat, max_lon, precision):
+    with pytest.raises(ValueError):
+        validate_box(min_lat, min_lon, max_lat, max_lon, precision)
@@ -1,31 +1,218 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date, datetime
+
+DATE_FORMAT = '%m-%d-%Y' # format of the dates sent by the frontend and to AppEEARS
+GEOTILE_MAX_PRECISION = 29 # deepest zoom level of an Elasticsearch geotile_grid
+
+
 class LRUCache:
+    """
+    Thread-safe least-recently-used cache whose capacity is a budget in bytes rather
+    than an entry count. Every entry carries the size of the data it stands for (the
+    cached CSV on disk) and an optional expiry time, so stale extracts age out on their own.
+    Args:
+    - capacity_bytes (int)   : total size of all entries before the oldest ones are evicted
+    - ttl (float)            : default lifetime of an entry in seconds, None to never expire
+    - on_evict (callable)    : called as on_evict(key, value) for every entry that is evicted,
+                               expired or replaced. Runs outside the lock.
+    """
+    def __init__(self, capacity_bytes: int, ttl: float = None, on_evict=None):
+        self.capacity_bytes = capacity_bytes
+        self.ttl            = ttl
+        self.on_evict       = on_evict
+        self.cache          = OrderedDict() # key -> (value, size, expires_at)
+        self.size_bytes     = 0
+        self.lock           = threading.Lock()
+        self.hits           = 0
+        self.misses         = 0
+        self.evictions      = 0
+        self.expirations    = 0
 
-    def __init__(self, capacity: int):
-        self.capacity = capacity
-        self.cache = {}
-
-    def get(self, key: str) -> str:
-        if key not in self.cache:
-            return ""
-        val = self.cache[key]
-        self.cache.pop(key)
-        self.cache[key] = val
-        return val
-
-    def put(self, key: str, value: str) -> None:
-        if key in self.cache:
-            old_val = self.cache.pop(key)
-            self.cache[key] = value
-            return old_val
-        elif len(self.cache) < self.capacity:
-            self.cache[key] = value
-            return ""
-        else:
-            for k in self.cache.keys():
-                old_val = self.cache.pop(k)
-                break
-            self.cache[key] = value
-            return old_val
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            entry = self.cache.get(key)
+            return entry is not None and not self._expired(entry)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.cache)
+
+    def _expired(self, entry) -> bool:
+        expires_at = entry[2]
+        return expires_at is not None and expires_at <= time.monotonic()
+
+    def _remove(self, key: str):
+        value, size, _ = self.cache.pop(key)
+        self.size_bytes -= size
+        return value
+
+    def _notify(self, removed) -> None:
+        if self.on_evict is None:
+            return
+        for key, value in removed:
+            self.on_evict(key, value)
+
+    def get(self, key: str):
+        """
+        Single atomic lookup: returns the value and marks it most recently used,
+        or None on a miss. Expired entries count as misses and are evicted.
+        """
+        removed = []
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None and self._expired(entry):
+                removed.append((key, self._remove(key)))
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                value = None
+            else:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                value = entry[0]
+        self._notify(removed)
+        return value
+
+    def put(self, key: str, value, size: int = 0, ttl: float = None) -> list:
+        """
+        Inserts or replaces an entry of `size` bytes, evicting the least recently used
+        entries until the cache fits its byte budget again. An entry larger than the
+        whole budget is not stored and is handed straight back as evicted.
+
+        Returns:
+            list of (key, value) pairs that were evicted by this call
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        removed = []
+        with self.lock:
+            if key in self.cache:
+                old_value = self._remove(key)
+                if old_value != value:
+                    removed.append((key, old_value))
+            if size > self.capacity_bytes:
+                removed.append((key, value))
+                self.evictions += 1
+            else:
+                self.cache[key] = (value, size, expires_at)
+                self.size_bytes += size
+                while self.size_bytes > self.capacity_bytes:
+                    old_key = next(iter(self.cache))
+                    removed.append((old_key, self._remove(old_key)))
+                    self.evictions += 1
+        self._notify(removed)
+        return removed
+
+    def pop(self, key: str):
+        """
+        Removes an entry without calling on_evict, e.g. when its file vanished from disk.
+        Returns the value or None if the key was not cached.
+        """
+        with self.lock:
+            if key not in self.cache:
+                return None
+            return self._remove(key)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.cache),
+                "size_bytes": self.size_bytes,
+                "capacity_bytes": self.capacity_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one execution. The first caller
+    runs the function, every caller arriving while it is in flight waits on the same
+    future and gets the same result (or exception).
+    """
+    def __init__(self):
+        self.lock      = threading.Lock()
+        self.in_flight = {} # key -> Future
+        self.waiters   = {} # key -> number of callers attached to the in-flight call
+        self.executed  = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn, *args, **kwargs):
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+                self.waiters[key] = 0
+            else:
+                self.waiters[key] += 1
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+                del self.waiters[key]
+                self.executed += 1
+        return future.result()
+
+    def submit(self, key: str, start, *args, **kwargs) -> Future:
+        """
+        Non-blocking do() for work that already runs elsewhere: start(*args, **kwargs)
+        returns a Future, and is only called when no call for the key is in flight.
+        Callers of do() and submit() for the same key share one execution.
+
+        Returns:
+            Future of the result, shared by every caller of the key while it is in flight
+        """
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.waiters[key] += 1
+                self.coalesced += 1
+                return future
+            future = Future()
+            self.in_flight[key] = future
+            self.waiters[key] = 0
+
+        def settle(done: Future) -> None:
+            with self.lock:
+                del self.in_flight[key]
+                del self.waiters[key]
+                self.executed += 1
+            if done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(done.result())
+
+        try:
+            started = start(*args, **kwargs)
+        except BaseException as e:
+            started = Future()
+            started.set_exception(e)
+        started.add_done_callback(settle)
+        return future
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "in_flight": len(self.in_flight),
+                "waiting": sum(self.waiters.values()),
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+            }
 
 class input_parameters:
     """
@@ -37,10 +224,103 @@ class input_parameters:
     - date_end (string)   : End of the date range for which to extract data: MM-DD-YYYY
     - recurring (bool)    : Makes the data ignore one year and return data for a range of years
     - year_range (int[])  : [-1,-1] if not recurring, [year start, year end] if recurring is true
+    - pixel_id (string)   : MODIS grid cell the coordinate was snapped to, None if not snapped
     """
-    def __init__(self, latitude, longitude, date_start, date_end):
+    def __init__(self, latitude, longitude, date_start, date_end, pixel_id=None):
         self.lat           = latitude
         self.lon           = longitude
-        self.date_start    = date_start 
+        self.date_start    = date_start
         self.date_end      = date_end
-    
\ No newline at end of file
+        self.pixel_id      = pixel_id
+
+def validate_input(input_params: input_parameters) -> None:
+    """
+    Purpose:
+        Rejects request input the pipeline cannot work with, before any tier is asked.
+        Dates are only checked when the input has any, e.g. not for a bare pixel lookup.
+
+    Raises:
+        ValueError describing the offending parameter
+    """
+    try:
+        latitude, longitude = float(input_params.lat), float(input_params.lon)
+    except (TypeError, ValueError):
+        raise ValueError("latitude and longitude are required and must be numbers")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("latitude must be within [-90, 90] and longitude within [-180, 180]")
+    if input_params.date_start is None and input_params.date_end is None:
+        return
+    try:
+        start = datetime.strptime(input_params.date_start, DATE_FORMAT)
+        end = datetime.strptime(input_params.date_end, DATE_FORMAT)
+    except (TypeError, ValueError):
+        raise ValueError("date_start and date_end are required as MM-DD-YYYY")
+    if start > end:
+        raise ValueError("date_start must not be after date_end")
+
+def validate_box(min_lat: float, min_lon: float, max_lat: float, max_lon: float, precision: int) -> None:
+    """
+    Purpose:
+        Rejects a bounding box and geotile precision Elasticsearch would refuse, so the
+        caller answers with a 400 instead of a failed aggregation.
+
+    Raises:
+        ValueError describing the offending parameter
+    """
+    for latitude, longitude in ((min_lat, min_lon), (max_lat, max_lon)):
+        validate_input(input_parameters(latitude, longitude, None, None))
+    if not (min_lat < max_lat and min_lon < max_lon):
+        raise ValueError("min_lat must be below max_lat and min_lon below max_lon")
+    if not 0 <= precision <= GEOTILE_MAX_PRECISION:
+        raise ValueError(f"precision must be within [0, {GEOTILE_MAX_PRECISION}]")
+
+def year_tiles(date_start: str, date_end: str) -> list:
+    """
+    Purpose:
+        Splits a date range into the calendar years it touches. Each year is one cache
+        tile, so overlapping ranges reuse the years that were already downloaded.
+
+    Args:
+        date_start - Start of the date range: MM-DD-YYYY
+        date_end   - End of the date range: MM-DD-YYYY
+
+    Returns:
+        list of (startDate, endDate) pairs in MM-DD-YYYY, one per year, in order
+
+    Raises:
+        ValueError if a date is not MM-DD-YYYY or the range is reversed
+    """
+    first = datetime.strptime(date_start, DATE_FORMAT).year
+    last = datetime.strptime(date_end, DATE_FORMAT).year
+    if first > last:
+        raise ValueError("date_start must not be after date_end")
+    return [(f"01-01-{year}", f"12-31-{year}") for year in range(first, last + 1)]
+
+def tile_year(tile: tuple) -> int:
+    return datetime.strptime(tile[0], DATE_FORMAT).year
+
+def tile_is_final(tile: tuple) -> bool:
+    """
+    True if the tile ended before today, i.e. no more composites will be published for it.
+    """
+    return datetime.strptime(tile[1], DATE_FORMAT).date() < date.today()
+
+def merge_tiles(tiles: list) -> list:
+    """
+    Purpose:
+        Joins consecutive year tiles into continuous ranges so a task for the missing
+        tiles sends as few date ranges as possible.
+
+    Args:
+        tiles - list of (startDate, endDate) year tiles in order
+
+    Returns:
+        list of {"startDate", "endDate"} dicts as used by the AppEEARS task params
+    """
+    ranges = []
+    for tile in tiles:
+        if ranges and tile_year(tile) == datetime.strptime(ranges[-1]["endDate"], DATE_FORMAT).year + 1:
+            ranges[-1]["endDate"] = tile[1]
+        else:
+            ranges.append({"startDate": tile[0], "endDate": tile[1]})
+    return ranges